@@ -3,8 +3,34 @@
 from typing import Annotated
 
 from fastapi import Depends
+from starlette.requests import HTTPConnection
 
 from app.core import Settings, get_settings
+from app.services import ExecutionService, OllamaService
 
 # 配置依赖
 SettingsDep = Annotated[Settings, Depends(get_settings)]
+
+
+def get_execution_service(connection: HTTPConnection) -> ExecutionService:
+    """获取执行服务实例（依赖注入）
+
+    执行服务在应用启动时创建并保存在 app.state 上，HTTP和WebSocket请求共用。
+    """
+    return connection.app.state.execution_service
+
+
+# 执行服务依赖
+ExecutionServiceDep = Annotated[ExecutionService, Depends(get_execution_service)]
+
+
+def get_ollama_service(connection: HTTPConnection) -> OllamaService:
+    """获取Ollama服务实例（依赖注入）
+
+    Ollama客户端在应用启动时创建并保存在 app.state 上，所有请求复用同一个连接池。
+    """
+    return connection.app.state.ollama_service
+
+
+# Ollama服务依赖
+OllamaServiceDep = Annotated[OllamaService, Depends(get_ollama_service)]
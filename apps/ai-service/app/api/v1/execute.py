@@ -1,8 +1,10 @@
 """执行API端点"""
 
-from typing import Optional
-from fastapi import APIRouter, HTTPException, Depends, Query
-from fastapi.responses import JSONResponse
+import asyncio
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
 from app.schemas.execution import (
     ExecutionCreate,
@@ -11,23 +13,13 @@ from app.schemas.execution import (
     ExecutionLog,
 )
 from app.services import ExecutionService
-from app.core import get_logger
+from app.core import get_logger, get_settings, json_dumps
+from app.api.deps import get_execution_service
 
 logger = get_logger(__name__)
 
 router = APIRouter()
 
-# 全局执行服务实例
-_execution_service: Optional[ExecutionService] = None
-
-
-def get_execution_service() -> ExecutionService:
-    """获取执行服务实例（依赖注入）"""
-    global _execution_service
-    if _execution_service is None:
-        _execution_service = ExecutionService()
-    return _execution_service
-
 
 @router.post("/execute", response_model=ExecutionResponse, status_code=202)
 async def execute_workflow(
@@ -66,19 +58,10 @@ async def execute_workflow(
         logger.info(
             "execute_workflow_started",
             execution_id=request.execution_id,
-            status=result["status"],
+            status=result.status,
         )
 
-        return ExecutionResponse(
-            id=result["execution_id"],
-            workflow_id=result["workflow_id"],
-            status=result["status"],
-            input_data=result["input_data"],
-            output_data=result.get("output_data"),
-            error_message=result.get("error_message"),
-            started_at=result.get("started_at"),
-            completed_at=result.get("completed_at"),
-        )
+        return result
 
     except Exception as e:
         logger.exception("execute_workflow_error", error=str(e))
@@ -106,7 +89,7 @@ async def get_execution_status(
         HTTPException: 执行不存在
     """
     try:
-        status = service.get_execution_status(execution_id)
+        status = await service.get_execution_status(execution_id)
         
         if status is None:
             raise HTTPException(
@@ -138,7 +121,7 @@ async def get_execution_logs(
     level: Optional[str] = Query(None, description="日志级别过滤 (info, warning, error)"),
     limit: Optional[int] = Query(None, description="返回数量限制"),
     service: ExecutionService = Depends(get_execution_service),
-) -> JSONResponse:
+) -> ORJSONResponse:
     """获取执行日志
     
     Args:
@@ -154,13 +137,13 @@ async def get_execution_logs(
         HTTPException: 获取失败
     """
     try:
-        logs = service.get_execution_logs(
+        logs = await service.get_execution_logs(
             execution_id=execution_id,
             level=level,
             limit=limit,
         )
 
-        return JSONResponse(
+        return ORJSONResponse(
             content={
                 "execution_id": execution_id,
                 "logs": logs,
@@ -176,11 +159,121 @@ async def get_execution_logs(
         )
 
 
+async def _iter_execution_events(
+    service: ExecutionService,
+    execution_id: str,
+) -> AsyncIterator[Dict[str, Any]]:
+    """迭代执行事件，直到执行进入终止状态
+    
+    首个事件为当前状态快照，之后依次返回执行上下文推送的事件；
+    超过websocket_heartbeat_ms没有事件时返回heartbeat事件以保持连接。
+    
+    Args:
+        service: 执行服务
+        execution_id: 执行ID
+        
+    Yields:
+        事件数据
+    """
+    heartbeat_interval = get_settings().websocket_heartbeat_ms / 1000 or None
+    queue = service.subscribe(execution_id)
+    try:
+        current = await service.get_execution_status(execution_id)
+        if current is None:
+            return
+
+        yield {
+            "type": "status",
+            "execution_id": execution_id,
+            "status": current["status"],
+        }
+        if current["status"] in service.TERMINAL_STATUSES:
+            return
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=heartbeat_interval)
+            except asyncio.TimeoutError:
+                yield {"type": "heartbeat", "execution_id": execution_id}
+                continue
+
+            yield event
+            if event["type"] == "status" and event["status"] in service.TERMINAL_STATUSES:
+                return
+    finally:
+        service.unsubscribe(execution_id, queue)
+
+
+@router.websocket("/execute/{execution_id}/events")
+async def execution_events_ws(
+    websocket: WebSocket,
+    execution_id: str,
+    service: ExecutionService = Depends(get_execution_service),
+) -> None:
+    """通过WebSocket推送执行事件
+    
+    替代轮询status/logs端点，执行结束后服务端关闭连接。
+    
+    Args:
+        websocket: WebSocket连接
+        execution_id: 执行ID
+        service: 执行服务
+    """
+    if await service.get_execution_status(execution_id) is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    logger.info("execution_events_ws_connected", execution_id=execution_id)
+
+    try:
+        async for event in _iter_execution_events(service, execution_id):
+            await websocket.send_text(json_dumps(event).decode())
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.info("execution_events_ws_disconnected", execution_id=execution_id)
+
+
+@router.get("/execute/{execution_id}/events")
+async def execution_events_sse(
+    execution_id: str,
+    service: ExecutionService = Depends(get_execution_service),
+) -> StreamingResponse:
+    """通过SSE推送执行事件（不支持WebSocket的客户端使用）
+    
+    Args:
+        execution_id: 执行ID
+        service: 执行服务
+        
+    Returns:
+        text/event-stream 响应
+        
+    Raises:
+        HTTPException: 执行不存在
+    """
+    if await service.get_execution_status(execution_id) is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Execution {execution_id} not found",
+        )
+
+    async def event_stream() -> AsyncIterator[bytes]:
+        async for event in _iter_execution_events(service, execution_id):
+            data = json_dumps(event)
+            yield b"event: " + event["type"].encode() + b"\ndata: " + data + b"\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/execute/{execution_id}/stop")
 async def stop_execution(
     execution_id: str,
     service: ExecutionService = Depends(get_execution_service),
-) -> JSONResponse:
+) -> ORJSONResponse:
     """停止执行
     
     Args:
@@ -206,7 +299,7 @@ async def stop_execution(
 
         logger.info("stop_execution_success", execution_id=execution_id)
 
-        return JSONResponse(
+        return ORJSONResponse(
             content={
                 "execution_id": execution_id,
                 "status": "stopped",
@@ -228,7 +321,7 @@ async def stop_execution(
 async def pause_execution(
     execution_id: str,
     service: ExecutionService = Depends(get_execution_service),
-) -> JSONResponse:
+) -> ORJSONResponse:
     """暂停执行
     
     Args:
@@ -254,7 +347,7 @@ async def pause_execution(
 
         logger.info("pause_execution_success", execution_id=execution_id)
 
-        return JSONResponse(
+        return ORJSONResponse(
             content={
                 "execution_id": execution_id,
                 "status": "paused",
@@ -276,7 +369,7 @@ async def pause_execution(
 async def resume_execution(
     execution_id: str,
     service: ExecutionService = Depends(get_execution_service),
-) -> JSONResponse:
+) -> ORJSONResponse:
     """恢复执行
     
     Args:
@@ -302,7 +395,7 @@ async def resume_execution(
 
         logger.info("resume_execution_success", execution_id=execution_id)
 
-        return JSONResponse(
+        return ORJSONResponse(
             content={
                 "execution_id": execution_id,
                 "status": "running",
@@ -2,5 +2,12 @@
 
 from app.core.config import Settings, get_settings
 from app.core.logging import get_logger, setup_logging
+from app.core.serialization import json_dumps
 
-__all__ = ["Settings", "get_settings", "get_logger", "setup_logging"]
+__all__ = [
+    "Settings",
+    "get_settings",
+    "get_logger",
+    "setup_logging",
+    "json_dumps",
+]
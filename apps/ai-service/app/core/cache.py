@@ -0,0 +1,148 @@
+"""响应缓存中间件"""
+
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Pattern, Sequence, Tuple
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class CachedResponse(NamedTuple):
+    """缓存的响应"""
+
+    generated_at: float
+    stale_at: float
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+
+def default_cache_rules() -> Tuple[Tuple[str, float], ...]:
+    """默认缓存规则 (路径正则, TTL秒)，只缓存被轮询的状态和日志端点"""
+    settings = get_settings()
+    return (
+        (r"/execute/[^/]+/status$", settings.status_cache_ttl_ms / 1000),
+        (r"/execute/[^/]+/logs$", settings.logs_cache_ttl_ms / 1000),
+    )
+
+
+class CacheMiddleware:
+    """GET响应短时缓存中间件
+
+    以 (path, query_string) 为键缓存匹配规则的GET响应，
+    将TTL窗口内的重复轮询合并为一次处理和序列化。
+
+    - 响应头 X-Cache: HIT/MISS 标识是否命中
+    - 请求头 Cache-Control: no-cache 跳过缓存读取
+    - 只缓存200响应
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        rules: Optional[Sequence[Tuple[str, float]]] = None,
+        maxsize: int = 1024,
+    ):
+        """初始化缓存中间件
+
+        Args:
+            app: ASGI应用
+            rules: 缓存规则 (路径正则, TTL秒)，默认从配置读取；TTL不大于0的规则不缓存
+            maxsize: 最大缓存条目数，超出时淘汰最久未使用的条目
+        """
+        self.app = app
+        if rules is None:
+            rules = default_cache_rules()
+        self.rules: List[Tuple[Pattern[str], float]] = [
+            (re.compile(pattern), ttl) for pattern, ttl in rules if ttl > 0
+        ]
+        self.maxsize = maxsize
+        self._cache: "OrderedDict[Tuple[str, bytes], CachedResponse]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _match_ttl(self, path: str) -> Optional[float]:
+        """获取路径对应的TTL，不缓存时返回None"""
+        for pattern, ttl in self.rules:
+            if pattern.search(path):
+                return ttl
+        return None
+
+    def _store(self, key: Tuple[str, bytes], response: CachedResponse) -> None:
+        """写入缓存并淘汰超出容量的条目"""
+        self._cache[key] = response
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        ttl = self._match_ttl(path)
+        if ttl is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = (path, scope.get("query_string", b""))
+        now = time.monotonic()
+        no_cache = "no-cache" in Headers(scope=scope).get("cache-control", "")
+
+        if not no_cache:
+            cached = self._cache.get(key)
+            if cached is not None and cached.stale_at > now:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                logger.debug("cache_hit", path=path, hits=self.hits)
+                await self._send_cached(cached, send)
+                return
+
+        self.misses += 1
+        logger.debug("cache_miss", path=path, misses=self.misses)
+
+        start: Dict[str, Any] = {}
+        body_parts: List[bytes] = []
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                start.update(message)
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (b"x-cache", b"MISS")],
+                }
+            elif message["type"] == "http.response.body":
+                body_parts.append(message.get("body", b""))
+                if not message.get("more_body", False) and start.get("status") == 200:
+                    self._store(
+                        key,
+                        CachedResponse(
+                            generated_at=now,
+                            stale_at=now + ttl,
+                            status=start["status"],
+                            headers=list(start.get("headers", [])),
+                            body=b"".join(body_parts),
+                        ),
+                    )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _send_cached(self, cached: CachedResponse, send: Send) -> None:
+        """发送缓存的响应"""
+        await send(
+            {
+                "type": "http.response.start",
+                "status": cached.status,
+                "headers": [*cached.headers, (b"x-cache", b"HIT")],
+            }
+        )
+        await send({"type": "http.response.body", "body": cached.body})
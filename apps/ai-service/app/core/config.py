@@ -15,6 +15,7 @@ class Settings(BaseSettings):
         env_file_encoding="utf-8",
         case_sensitive=False,
         extra="ignore",
+        frozen=True,
     )
 
     # 应用配置
@@ -26,15 +27,38 @@ class Settings(BaseSettings):
     # 服务配置
     host: str = Field(default="0.0.0.0", alias="HOST")
     port: int = Field(default=8000, alias="PORT")
+    # 事件循环和HTTP解析器实现，auto时uvicorn在已安装uvloop/httptools时自动使用
+    server_loop: str = Field(default="auto", alias="SERVER_LOOP")
+    server_http: str = Field(default="auto", alias="SERVER_HTTP")
 
     # Ollama配置
     ollama_base_url: str = Field(default="http://localhost:11434", alias="OLLAMA_BASE_URL")
     ollama_default_model: str = Field(default="llama2", alias="OLLAMA_DEFAULT_MODEL")
     ollama_timeout: float = Field(default=300.0, alias="OLLAMA_TIMEOUT")
     ollama_max_connections: int = Field(default=5, alias="OLLAMA_MAX_CONNECTIONS")
+    ollama_http2: bool = Field(default=False, alias="OLLAMA_HTTP2")
+    ollama_keepalive_expiry: float = Field(default=120.0, alias="OLLAMA_KEEPALIVE_EXPIRY")
+    ollama_models_cache_ttl: float = Field(default=60.0, alias="OLLAMA_MODELS_CACHE_TTL")
+    ollama_response_cache_size: int = Field(default=1024, alias="OLLAMA_RESPONSE_CACHE_SIZE")
+    ollama_response_cache_ttl: float = Field(default=300.0, alias="OLLAMA_RESPONSE_CACHE_TTL")
+
+    # 执行配置
+    max_logs_per_execution: int = Field(default=10000, alias="MAX_LOGS_PER_EXECUTION")
+    max_parallel_nodes: int = Field(default=8, alias="MAX_PARALLEL_NODES")
+    max_retained_executions: int = Field(default=1000, alias="MAX_RETAINED_EXECUTIONS")
+    max_concurrent_executions: int = Field(default=16, alias="MAX_CONCURRENT_EXECUTIONS")
+    max_concurrent_llm_nodes: int = Field(default=4, alias="MAX_CONCURRENT_LLM_NODES")
+    log_flush_interval_ms: int = Field(default=50, alias="LOG_FLUSH_INTERVAL_MS")
+    node_result_cache_size: int = Field(default=0, alias="NODE_RESULT_CACHE_SIZE")
+
+    # 推送和缓存配置
+    status_cache_ttl_ms: int = Field(default=1000, alias="STATUS_CACHE_TTL_MS")
+    logs_cache_ttl_ms: int = Field(default=2000, alias="LOGS_CACHE_TTL_MS")
+    websocket_heartbeat_ms: int = Field(default=30000, alias="WEBSOCKET_HEARTBEAT_MS")
 
     # Redis配置 (可选)
     redis_url: Optional[str] = Field(default=None, alias="REDIS_URL")
+    state_ttl_seconds: int = Field(default=86400, alias="STATE_TTL_SECONDS")
 
     # BFF回调配置
     bff_base_url: str = Field(default="http://localhost:3001", alias="BFF_BASE_URL")
@@ -54,5 +78,8 @@ class Settings(BaseSettings):
 
 @lru_cache
 def get_settings() -> Settings:
-    """获取配置单例"""
+    """获取配置单例
+
+    需要通过依赖覆盖替换配置的场景（如测试）使用此函数。
+    """
     return Settings()
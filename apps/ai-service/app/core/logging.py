@@ -10,23 +10,39 @@ from structlog.types import EventDict, Processor
 from app.core.config import get_settings
 
 
-def add_app_context(logger: Any, method_name: str, event_dict: EventDict) -> EventDict:
-    """添加应用上下文信息"""
-    settings = get_settings()
-    event_dict["app"] = settings.app_name
-    event_dict["version"] = settings.app_version
-    return event_dict
+def make_app_context_processor(app_name: str, app_version: str) -> Processor:
+    """创建添加应用上下文信息的处理器
+
+    应用名称和版本在配置日志时确定，处理器直接使用闭包中的值，
+    避免每条日志都读取配置。
+
+    Args:
+        app_name: 应用名称
+        app_version: 应用版本
+
+    Returns:
+        structlog处理器
+    """
+
+    def add_app_context(logger: Any, method_name: str, event_dict: EventDict) -> EventDict:
+        """添加应用上下文信息"""
+        event_dict["app"] = app_name
+        event_dict["version"] = app_version
+        return event_dict
+
+    return add_app_context
 
 
 def setup_logging() -> None:
     """配置结构化日志"""
     settings = get_settings()
+    log_level = getattr(logging, settings.log_level.upper())
 
     # 配置标准库logging
     logging.basicConfig(
         format="%(message)s",
         stream=sys.stdout,
-        level=getattr(logging, settings.log_level.upper()),
+        level=log_level,
     )
 
     # 配置structlog处理器
@@ -35,7 +51,7 @@ def setup_logging() -> None:
         structlog.stdlib.add_logger_name,
         structlog.stdlib.add_log_level,
         structlog.stdlib.PositionalArgumentsFormatter(),
-        add_app_context,
+        make_app_context_processor(settings.app_name, settings.app_version),
         structlog.processors.TimeStamper(fmt="iso"),
         structlog.processors.StackInfoRenderer(),
     ]
@@ -54,15 +70,16 @@ def setup_logging() -> None:
         )
 
     # 配置structlog
+    # 低于日志级别的调用直接返回，不进入处理器链
     structlog.configure(
         processors=processors,
-        wrapper_class=structlog.stdlib.BoundLogger,
+        wrapper_class=structlog.make_filtering_bound_logger(log_level),
         context_class=dict,
         logger_factory=structlog.stdlib.LoggerFactory(),
         cache_logger_on_first_use=True,
     )
 
 
-def get_logger(name: str) -> structlog.stdlib.BoundLogger:
+def get_logger(name: str) -> structlog.typing.FilteringBoundLogger:
     """获取logger实例"""
     return structlog.get_logger(name)
@@ -0,0 +1,28 @@
+"""JSON序列化工具"""
+
+from typing import Any
+
+import orjson
+
+
+def _default(obj: Any) -> Any:
+    """orjson不支持的类型的转换函数
+
+    bytes按UTF-8解码为字符串（如输出节点as_bytes生成的JSON文本），
+    其他类型转换为字符串。
+    """
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return bytes(obj).decode("utf-8", errors="replace")
+    return str(obj)
+
+
+def json_dumps(obj: Any) -> bytes:
+    """序列化为JSON，用于持久化和推送给客户端的数据
+
+    Args:
+        obj: 待序列化的数据
+
+    Returns:
+        bytes: UTF-8编码的JSON
+    """
+    return orjson.dumps(obj, default=_default)
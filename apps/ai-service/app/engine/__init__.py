@@ -1,13 +1,17 @@
 """工作流引擎模块"""
 
 from app.engine.workflow_engine import WorkflowEngine, WorkflowEngineError
-from app.engine.context import ExecutionContext
+from app.engine.context import ExecutionContext, current_context
+from app.engine.state_store import RedisStateStore, StateStoreError
 from app.engine.nodes import NodeExecutor, NodeExecutionError, NodeValidationError
 
 __all__ = [
     "WorkflowEngine",
     "WorkflowEngineError",
     "ExecutionContext",
+    "current_context",
+    "RedisStateStore",
+    "StateStoreError",
     "NodeExecutor",
     "NodeExecutionError",
     "NodeValidationError",
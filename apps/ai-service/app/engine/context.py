@@ -1,12 +1,81 @@
 """执行上下文管理"""
 
+import asyncio
+import contextvars
+import inspect
 import re
-from typing import Any, Dict, Optional, Callable
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional, Callable, Tuple
 from datetime import datetime
 import logging
 
+from app.core.config import get_settings
+
 logger = logging.getLogger(__name__)
 
+# 日志级别到日志方法的映射，记录日志时直接查表
+_LOG_METHODS: Dict[str, Callable[..., None]] = {
+    level: getattr(logger, level)
+    for level in ("debug", "info", "warning", "error", "critical")
+}
+
+# 变量引用格式 {{variable}}
+_VAR_RE = re.compile(r'\{\{([^}]+)\}\}')
+
+
+@lru_cache(maxsize=1024)
+def _parse_template(text: str) -> Tuple[Tuple[str, Optional[str], str], ...]:
+    """将模板预解析为片段序列
+    
+    同一模板在多次执行中复用解析结果，避免重复的正则扫描。
+    
+    Args:
+        text: 模板文本
+        
+    Returns:
+        片段元组 (literal, var_path, placeholder)，var_path为None表示末尾的纯文本片段
+    """
+    segments = []
+    pos = 0
+    
+    for match in _VAR_RE.finditer(text):
+        segments.append((text[pos:match.start()], match.group(1).strip(), match.group(0)))
+        pos = match.end()
+    
+    segments.append((text[pos:], None, ""))
+    return tuple(segments)
+
+
+@lru_cache(maxsize=4096)
+def _split_path(path: str) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    """拆分点分隔路径为 (前缀, 剩余部分) 序列
+    
+    Args:
+        path: 点分隔的路径，如 "nodes.node1.result"
+        
+    Returns:
+        按前缀从长到短排列的元组，如
+        (("nodes.node1", ("result",)), ("nodes", ("node1", "result")))
+    """
+    parts = tuple(path.split("."))
+    return tuple(
+        (".".join(parts[:i]), parts[i:])
+        for i in range(len(parts) - 1, 0, -1)
+    )
+
+
+_MISSING = object()
+
+# 当前任务所属的执行上下文，由WorkflowEngine在执行期间设置。
+# TaskGroup创建的节点任务会复制该上下文，不接收context参数的辅助代码
+# （如日志、工具函数）也能获取当前执行
+current_context: contextvars.ContextVar["ExecutionContext"] = contextvars.ContextVar(
+    "current_context"
+)
+
 
 class ExecutionContext:
     """工作流执行上下文
@@ -18,14 +87,50 @@ class ExecutionContext:
     - 实现节点间数据传递
     - 实现变量解析和替换
     - 存储执行历史
+    
+    事件回调通过队列异步分发：start()后事件先放入有界队列，
+    由独立的消费任务调用callback，回调中的I/O不会阻塞节点执行。
+    执行期间的日志按log_flush_interval_ms合并为logs_batch事件。
     """
 
+    __slots__ = (
+        "execution_id",
+        "workflow_id",
+        "input_data",
+        "callback",
+        "_event_q",
+        "_event_consumer",
+        "_callback_tasks",
+        "log_flush_interval",
+        "_log_buffer",
+        "_log_flusher",
+        "_last_log_at",
+        "status",
+        "started_at",
+        "completed_at",
+        "error",
+        "variables",
+        "node_outputs",
+        "node_statuses",
+        "_status_counts",
+        "logs",
+        "dropped_logs",
+    )
+
+    # 事件队列容量，队列满时丢弃最早的事件
+    EVENT_QUEUE_SIZE = 1024
+    
+    # 连续相同日志的合并窗口（秒），窗口内的重复日志只累加count
+    LOG_DEDUP_WINDOW = 0.1
+
     def __init__(
         self,
         execution_id: str,
         workflow_id: str,
         input_data: Dict[str, Any],
         callback: Optional[Callable] = None,
+        max_logs: Optional[int] = None,
+        log_flush_interval_ms: Optional[int] = None,
     ):
         """初始化执行上下文
         
@@ -34,11 +139,33 @@ class ExecutionContext:
             workflow_id: 工作流ID
             input_data: 输入数据
             callback: 状态回调函数
+            max_logs: 保留的最大日志条数，默认从配置读取
+            log_flush_interval_ms: 日志批量推送间隔（毫秒），默认从配置读取，
+                为0时每条日志单独推送
         """
+        settings = get_settings()
+
         self.execution_id = execution_id
         self.workflow_id = workflow_id
         self.input_data = input_data
         self.callback = callback
+        
+        # 事件队列和消费任务，在start()时创建
+        self._event_q: Optional[asyncio.Queue] = None
+        self._event_consumer: Optional[asyncio.Task] = None
+        
+        # 未经事件队列直接调度的异步回调任务，保留强引用直到完成
+        self._callback_tasks: set[asyncio.Task] = set()
+        
+        # 待推送的日志缓冲和定时刷新任务，在start()时创建
+        if log_flush_interval_ms is None:
+            log_flush_interval_ms = settings.log_flush_interval_ms
+        self.log_flush_interval = log_flush_interval_ms / 1000
+        self._log_buffer: list[Dict[str, Any]] = []
+        self._log_flusher: Optional[asyncio.Task] = None
+        
+        # 最近一条日志的写入时间（单调时钟），用于合并连续重复日志
+        self._last_log_at = 0.0
 
         # 执行状态
         self.status = "pending"
@@ -55,15 +182,23 @@ class ExecutionContext:
         # 节点状态存储 {node_id: status}
         self.node_statuses: Dict[str, str] = {}
         
-        # 执行日志
-        self.logs: list[Dict[str, Any]] = []
+        # 各状态的节点数 {status: count}，随set_node_status增量维护
+        self._status_counts: Counter[str] = Counter()
+        
+        # 执行日志（环形缓冲，超出上限时丢弃最早的日志）
+        self.logs: deque[Dict[str, Any]] = deque(
+            maxlen=max_logs or settings.max_logs_per_execution
+        )
+        # 超出上限被丢弃的日志条数
+        self.dropped_logs = 0
 
         # 初始化输入变量
-        self.variables["input"] = input_data
+        self._store_variable("input", input_data)
 
         logger.info(
-            f"ExecutionContext initialized: execution_id={execution_id}, "
-            f"workflow_id={workflow_id}"
+            "ExecutionContext initialized: execution_id=%s, workflow_id=%s",
+            execution_id,
+            workflow_id,
         )
 
     def set_variable(self, key: str, value: Any) -> None:
@@ -73,8 +208,37 @@ class ExecutionContext:
             key: 变量名
             value: 变量值
         """
+        self._store_variable(key, value)
+        # 仅在DEBUG级别开启时才格式化（value可能是很大的对象）
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Variable set: %s = %s", key, value)
+
+    def _store_variable(self, key: str, value: Any) -> None:
+        """写入变量
+        
+        Args:
+            key: 变量名（可包含点，如 "nodes.node1"）
+            value: 变量值
+        """
         self.variables[key] = value
-        logger.debug(f"Variable set: {key} = {value}")
+
+    @contextmanager
+    def scoped_variable(self, key: str, value: Any) -> Iterator[None]:
+        """在with块内临时设置变量，退出时恢复原值
+        
+        Args:
+            key: 变量名
+            value: 临时变量值
+        """
+        previous = self.variables.get(key, _MISSING)
+        self._store_variable(key, value)
+        try:
+            yield
+        finally:
+            if previous is _MISSING:
+                del self.variables[key]
+            else:
+                self._store_variable(key, previous)
 
     def get_variable(self, key: str, default: Any = None) -> Any:
         """获取变量
@@ -96,8 +260,8 @@ class ExecutionContext:
             output: 输出数据
         """
         self.node_outputs[node_id] = output
-        self.variables[f"nodes.{node_id}"] = output
-        logger.debug(f"Node output set: {node_id}")
+        self._store_variable(f"nodes.{node_id}", output)
+        logger.debug("Node output set: %s", node_id)
 
     def get_node_output(self, node_id: str, default: Any = None) -> Any:
         """获取节点输出
@@ -118,17 +282,25 @@ class ExecutionContext:
             node_id: 节点ID
             status: 状态 (pending, running, success, failed, skipped)
         """
+        old_status = self.node_statuses.get(node_id)
+        if old_status == status:
+            # 状态未变化，不重复触发回调
+            return
+        
+        if old_status is not None:
+            self._status_counts[old_status] -= 1
+        self._status_counts[status] += 1
+        
         self.node_statuses[node_id] = status
-        logger.debug(f"Node status set: {node_id} = {status}")
+        logger.debug("Node status set: %s = %s", node_id, status)
         
         # 触发回调
-        if self.callback:
-            self.callback({
-                "type": "node_status",
-                "execution_id": self.execution_id,
-                "node_id": node_id,
-                "status": status,
-            })
+        self._emit({
+            "type": "node_status",
+            "execution_id": self.execution_id,
+            "node_id": node_id,
+            "status": status,
+        })
 
     def get_node_status(self, node_id: str) -> Optional[str]:
         """获取节点状态
@@ -158,39 +330,55 @@ class ExecutionContext:
         if not isinstance(text, str):
             return text
 
-        # 匹配 {{variable}} 格式
-        pattern = r'\{\{([^}]+)\}\}'
-        
-        def replace_var(match):
-            var_path = match.group(1).strip()
-            value = self._get_nested_value(var_path)
-            return str(value) if value is not None else match.group(0)
+        # 不含变量引用的文本无需解析
+        if "{{" not in text:
+            return text
+
+        get_nested_value = self._get_nested_value
+        parts = []
+        for literal, var_path, placeholder in _parse_template(text):
+            parts.append(literal)
+            if var_path is not None:
+                value = get_nested_value(var_path)
+                parts.append(str(value) if value is not None else placeholder)
         
-        result = re.sub(pattern, replace_var, text)
-        return result
+        return "".join(parts)
 
     def _get_nested_value(self, path: str) -> Any:
         """获取嵌套路径的值
         
+        变量名可包含点（如 "nodes.node1"），从最长的已存在变量名开始逐级查找。
+        只缓存路径的拆分结果，每次都在当前的变量值上查找，
+        变量值被原地修改后也能取到最新的值。
+        
         Args:
             path: 点分隔的路径，如 "input.user.name"
             
         Returns:
             值或None
         """
-        parts = path.split(".")
-        value = self.variables
+        variables = self.variables
+        value = variables.get(path, _MISSING)
+        if value is not _MISSING:
+            return value
         
-        for part in parts:
-            if isinstance(value, dict):
-                value = value.get(part)
-            else:
-                return None
+        for prefix, rest in _split_path(path):
+            value = variables.get(prefix, _MISSING)
+            if value is _MISSING:
+                continue
+            
+            for part in rest:
+                if isinstance(value, dict):
+                    value = value.get(part)
+                else:
+                    return None
+                
+                if value is None:
+                    return None
             
-            if value is None:
-                return None
+            return value
         
-        return value
+        return None
 
     def add_log(
         self,
@@ -201,46 +389,192 @@ class ExecutionContext:
     ) -> None:
         """添加执行日志
         
+        与上一条日志的 (level, message, node_id) 相同且间隔在LOG_DEDUP_WINDOW内时，
+        不新增日志而是累加上一条的count；上一条已推送过时重新推送以更新count。
+        
         Args:
             level: 日志级别 (info, warning, error)
             message: 日志消息
             node_id: 节点ID
             metadata: 额外元数据
         """
+        now = time.monotonic()
+        last_log_at, self._last_log_at = self._last_log_at, now
+        
+        if self.logs and now - last_log_at <= self.LOG_DEDUP_WINDOW:
+            last = self.logs[-1]
+            if (
+                last["level"] == level
+                and last["message"] == message
+                and last["node_id"] == node_id
+            ):
+                last["count"] += 1
+                # 仍在缓冲中的日志会随批次推送最新count
+                if not (self._log_buffer and self._log_buffer[-1] is last):
+                    self._emit({
+                        "type": "log",
+                        **last,
+                    })
+                return
+        
         log_entry = {
             "execution_id": self.execution_id,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(),
             "level": level,
             "message": message,
             "node_id": node_id,
             "metadata": metadata or {},
+            "count": 1,
         }
         
-        self.logs.append(log_entry)
+        logs = self.logs
+        if len(logs) == logs.maxlen:
+            self.dropped_logs += 1
+        logs.append(log_entry)
         
-        # 触发回调
-        if self.callback:
-            self.callback({
+        # 触发回调，定时刷新任务运行时先缓冲再批量推送
+        if self._log_flusher is not None:
+            self._log_buffer.append(log_entry)
+        else:
+            self._emit({
                 "type": "log",
                 **log_entry,
             })
         
         # 同时记录到logger
-        log_method = getattr(logger, level.lower(), logger.info)
-        log_method(f"[{self.execution_id}] {message}")
+        log_method = _LOG_METHODS.get(level) or _LOG_METHODS.get(level.lower(), logger.info)
+        log_method("[%s] %s", self.execution_id, message)
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        """分发事件给回调
+        
+        事件队列已创建时放入队列（满时丢弃最早的事件），否则直接调用回调。
+        
+        Args:
+            event: 事件数据
+        """
+        if self.callback is None:
+            return
+        
+        if self._event_q is None:
+            self._dispatch(event)
+            return
+        
+        try:
+            self._event_q.put_nowait(event)
+        except asyncio.QueueFull:
+            self._event_q.get_nowait()
+            self._event_q.put_nowait(event)
+            logger.warning("[%s] Event queue full, dropped oldest event", self.execution_id)
+
+    def _dispatch(self, event: Dict[str, Any]) -> None:
+        """直接调用回调，异步回调以任务方式调度
+        
+        事件循环只弱引用任务，任务保存在_callback_tasks中直到完成，
+        完成时记录回调抛出的异常。
+        """
+        result = self.callback(event)
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result)
+            self._callback_tasks.add(task)
+            task.add_done_callback(self._on_callback_done)
+
+    def _on_callback_done(self, task: asyncio.Task) -> None:
+        """异步回调任务完成时释放引用并记录异常"""
+        self._callback_tasks.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.error(
+                "[%s] Event callback failed",
+                self.execution_id,
+                exc_info=(type(error), error, error.__traceback__),
+            )
+
+    async def _consume_events(self, queue: asyncio.Queue) -> None:
+        """从事件队列取出事件并调用回调，收到None时结束"""
+        while True:
+            event = await queue.get()
+            if event is None:
+                return
+            
+            try:
+                result = self.callback(event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("[%s] Event callback failed", self.execution_id)
+
+    def _flush_logs(self) -> None:
+        """将缓冲的日志作为一个logs_batch事件推送"""
+        if not self._log_buffer:
+            return
+        
+        items = self._log_buffer
+        self._log_buffer = []
+        self._emit({
+            "type": "logs_batch",
+            "execution_id": self.execution_id,
+            "items": items,
+        })
+
+    async def _flush_logs_periodically(self) -> None:
+        """按间隔刷新日志缓冲"""
+        while True:
+            await asyncio.sleep(self.log_flush_interval)
+            self._flush_logs()
+
+    def _stop_log_flusher(self) -> None:
+        """停止定时刷新并推送剩余日志"""
+        if self._log_flusher is None:
+            return
+        
+        self._log_flusher.cancel()
+        self._log_flusher = None
+        self._flush_logs()
+
+    async def close(self) -> None:
+        """等待已入队的事件和直接调度的异步回调完成并停止消费任务"""
+        self._stop_log_flusher()
+        
+        if self._event_consumer is not None:
+            queue = self._event_q
+            consumer = self._event_consumer
+            self._event_q = None
+            self._event_consumer = None
+            
+            # 结束标记放在所有事件之后，消费任务处理完剩余事件后退出
+            try:
+                queue.put_nowait(None)
+            except asyncio.QueueFull:
+                queue.get_nowait()
+                queue.put_nowait(None)
+            
+            await consumer
+        
+        if self._callback_tasks:
+            # 异常已在任务完成时记录
+            await asyncio.gather(*self._callback_tasks, return_exceptions=True)
 
     def start(self) -> None:
         """开始执行"""
+        if self.callback is not None and self._event_consumer is None:
+            self._event_q = asyncio.Queue(maxsize=self.EVENT_QUEUE_SIZE)
+            self._event_consumer = asyncio.create_task(self._consume_events(self._event_q))
+            
+            if self.log_flush_interval > 0:
+                self._log_flusher = asyncio.create_task(self._flush_logs_periodically())
+        
         self.status = "running"
         self.started_at = datetime.now()
         self.add_log("info", "Workflow execution started")
         
-        if self.callback:
-            self.callback({
-                "type": "status",
-                "execution_id": self.execution_id,
-                "status": "running",
-            })
+        self._emit({
+            "type": "status",
+            "execution_id": self.execution_id,
+            "status": "running",
+        })
 
     def complete(self, output_data: Any) -> None:
         """完成执行
@@ -250,16 +584,16 @@ class ExecutionContext:
         """
         self.status = "completed"
         self.completed_at = datetime.now()
-        self.variables["output"] = output_data
+        self._store_variable("output", output_data)
         self.add_log("info", "Workflow execution completed")
+        self._stop_log_flusher()
         
-        if self.callback:
-            self.callback({
-                "type": "status",
-                "execution_id": self.execution_id,
-                "status": "completed",
-                "output": output_data,
-            })
+        self._emit({
+            "type": "status",
+            "execution_id": self.execution_id,
+            "status": "completed",
+            "output": output_data,
+        })
 
     def fail(self, error: str) -> None:
         """执行失败
@@ -271,14 +605,14 @@ class ExecutionContext:
         self.completed_at = datetime.now()
         self.error = error
         self.add_log("error", f"Workflow execution failed: {error}")
+        self._stop_log_flusher()
         
-        if self.callback:
-            self.callback({
-                "type": "status",
-                "execution_id": self.execution_id,
-                "status": "failed",
-                "error": error,
-            })
+        self._emit({
+            "type": "status",
+            "execution_id": self.execution_id,
+            "status": "failed",
+            "error": error,
+        })
 
     def get_execution_summary(self) -> Dict[str, Any]:
         """获取执行摘要
@@ -294,16 +628,13 @@ class ExecutionContext:
             "execution_id": self.execution_id,
             "workflow_id": self.workflow_id,
             "status": self.status,
-            "started_at": self.started_at.isoformat() if self.started_at else None,
-            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at,
             "duration": duration,
             "error": self.error,
             "node_count": len(self.node_statuses),
-            "completed_nodes": sum(
-                1 for s in self.node_statuses.values() if s == "success"
-            ),
-            "failed_nodes": sum(
-                1 for s in self.node_statuses.values() if s == "failed"
-            ),
+            "completed_nodes": self._status_counts["success"],
+            "failed_nodes": self._status_counts["failed"],
             "log_count": len(self.logs),
+            "dropped_logs": self.dropped_logs,
         }
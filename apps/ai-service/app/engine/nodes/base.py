@@ -1,6 +1,7 @@
 """节点执行器基类"""
 
 from abc import ABC, abstractmethod
+import copy
 from typing import Any, Dict, Optional
 from datetime import datetime
 import logging
@@ -11,6 +12,27 @@ from app.schemas.node import NodeResult
 logger = logging.getLogger(__name__)
 
 
+def _contains_templates(obj: Any) -> bool:
+    """递归检查对象中是否有包含 {{ 的字符串
+    
+    直接扫描，遇到第一个变量引用即返回；扫描的开销低于为配置计算内容摘要，
+    不做缓存，原地修改配置后也按当前内容判断。
+    
+    Args:
+        obj: 节点配置或其中的值
+        
+    Returns:
+        bool: 是否有字符串值包含 {{
+    """
+    if isinstance(obj, str):
+        return "{{" in obj
+    if isinstance(obj, dict):
+        return any(_contains_templates(value) for value in obj.values())
+    if isinstance(obj, list):
+        return any(_contains_templates(item) for item in obj)
+    return False
+
+
 class NodeExecutionError(Exception):
     """节点执行错误"""
 
@@ -33,8 +55,21 @@ class NodeExecutor(ABC):
     - 实现配置验证
     - 实现错误处理
     - 提供通用工具方法
+    
+    执行器实例只保存节点标识等不可变信息，执行状态通过context传递，
+    引擎会在多次执行（包括并发执行）间复用同一节点的执行器实例，
+    子类不应在实例上保存与单次执行相关的状态。
+    
+    使用__slots__避免每个实例携带__dict__，子类新增实例属性时需在
+    自己的__slots__中声明。
     """
 
+    __slots__ = ("node_id", "node_type", "logger")
+
+    # 是否为纯节点：输出只由配置和上下文数据决定且没有副作用，
+    # 引擎可以在启用结果缓存时跨执行复用其结果
+    pure = False
+
     def __init__(self, node_id: str, node_type: str):
         """初始化节点执行器
         
@@ -81,10 +116,64 @@ class NodeExecutor(ABC):
         """
         pass
 
+    def is_cacheable(self, node_config: Dict[str, Any]) -> bool:
+        """判断给定配置下的执行结果是否可以缓存
+        
+        Args:
+            node_config: 节点配置
+            
+        Returns:
+            bool: 是否可以缓存
+        """
+        return self.pure
+
+    def cache_inputs(self, node_config: Dict[str, Any], context: ExecutionContext) -> Any:
+        """获取决定执行结果的数据，用于计算结果缓存键
+        
+        默认为解析变量引用后的配置，以及source_node指定节点的输出
+        （未指定时为工作流输入）。读取其他上下文数据的执行器需要覆盖此方法。
+        
+        Args:
+            node_config: 节点配置
+            context: 执行上下文
+            
+        Returns:
+            可JSON序列化的数据
+        """
+        resolved_config = self._resolve_config_variables(node_config, context)
+        return (
+            resolved_config,
+            self.get_input_from_context(context, resolved_config.get("source_node")),
+        )
+
+    def restore(self, result: NodeResult, context: ExecutionContext) -> NodeResult:
+        """用缓存的结果完成节点执行
+        
+        与run成功时一样更新节点状态和输出，但不执行节点逻辑。
+        输出为缓存的深拷贝，下游修改输出不会影响缓存。
+        
+        Args:
+            result: 之前执行成功的结果
+            context: 执行上下文
+            
+        Returns:
+            NodeResult: 执行时间为0的结果副本
+        """
+        output = copy.deepcopy(result.output)
+        context.set_node_status(self.node_id, result.status)
+        context.set_node_output(self.node_id, output)
+        context.add_log(
+            "info",
+            f"Node {self.node_id} ({self.node_type}) restored from cache",
+            node_id=self.node_id,
+        )
+        return result.model_copy(update={"execution_time": 0.0, "output": output})
+
     async def run(
         self,
         node_config: Dict[str, Any],
         context: ExecutionContext,
+        validated: bool = False,
     ) -> NodeResult:
         """运行节点（包含错误处理和日志）
         
@@ -93,6 +182,7 @@ class NodeExecutor(ABC):
         Args:
             node_config: 节点配置
             context: 执行上下文
+            validated: 配置已通过验证时跳过validate_config
             
         Returns:
             NodeResult: 节点执行结果
@@ -109,7 +199,7 @@ class NodeExecutor(ABC):
             )
 
             # 验证配置
-            if not self.validate_config(node_config):
+            if not validated and not self.validate_config(node_config):
                 raise NodeValidationError(
                     f"Invalid configuration for node {self.node_id}"
                 )
@@ -153,7 +243,8 @@ class NodeExecutor(ABC):
             context.set_node_status(self.node_id, "failed")
             context.add_log("error", error_msg, node_id=self.node_id)
             
-            return NodeResult(
+            # 失败结果的字段均由此处生成，跳过模型校验
+            return NodeResult.model_construct(
                 node_id=self.node_id,
                 status="failed",
                 error=error_msg,
@@ -168,7 +259,7 @@ class NodeExecutor(ABC):
             context.set_node_status(self.node_id, "failed")
             context.add_log("error", error_msg, node_id=self.node_id)
             
-            return NodeResult(
+            return NodeResult.model_construct(
                 node_id=self.node_id,
                 status="failed",
                 error=error_msg,
@@ -183,7 +274,7 @@ class NodeExecutor(ABC):
             context.set_node_status(self.node_id, "failed")
             context.add_log("error", error_msg, node_id=self.node_id)
             
-            return NodeResult(
+            return NodeResult.model_construct(
                 node_id=self.node_id,
                 status="failed",
                 error=error_msg,
@@ -194,23 +285,36 @@ class NodeExecutor(ABC):
         self,
         config: Dict[str, Any],
         context: ExecutionContext,
+        memo: Optional[Dict[int, Dict[str, Any]]] = None,
     ) -> Dict[str, Any]:
         """解析配置中的变量引用
         
+        配置中不含变量引用时直接返回原配置，不做复制。
+        
         Args:
             config: 原始配置
             context: 执行上下文
+            memo: 单次解析内已解析的子配置 {id(config): resolved}，
+                同一子配置对象被多处引用时只解析一次
             
         Returns:
             解析后的配置
         """
+        if memo is None:
+            if not _contains_templates(config):
+                return config
+            memo = {}
+        elif id(config) in memo:
+            return memo[id(config)]
+        
         resolved = {}
+        memo[id(config)] = resolved
         
         for key, value in config.items():
             if isinstance(value, str):
                 resolved[key] = context.resolve_variables(value)
             elif isinstance(value, dict):
-                resolved[key] = self._resolve_config_variables(value, context)
+                resolved[key] = self._resolve_config_variables(value, context, memo)
             elif isinstance(value, list):
                 resolved[key] = [
                     context.resolve_variables(item) if isinstance(item, str) else item
@@ -240,14 +344,20 @@ class NodeExecutor(ABC):
         else:
             return context.input_data
 
-    def log_debug(self, message: str, context: ExecutionContext) -> None:
+    def log_debug(self, message: str, context: ExecutionContext, *args: Any) -> None:
         """记录调试日志
         
+        传入args时message作为%格式串，仅在DEBUG级别启用时才格式化。
+        
         Args:
             message: 日志消息
             context: 执行上下文
+            *args: 格式化参数
         """
-        self.logger.debug(f"Node {self.node_id}: {message}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            if args:
+                message = message % args
+            self.logger.debug("Node %s: %s", self.node_id, message)
 
     def log_info(self, message: str, context: ExecutionContext) -> None:
         """记录信息日志
@@ -0,0 +1,85 @@
+"""节点配置编译结果缓存"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Optional, TypeVar
+import copy
+import hashlib
+
+import orjson
+
+T = TypeVar("T")
+
+_KEY_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+
+def content_key(obj: Any) -> Optional[bytes]:
+    """计算配置内容的摘要
+
+    键顺序不影响摘要，原地修改配置后摘要随之变化。
+
+    Args:
+        obj: 可JSON序列化的配置
+
+    Returns:
+        16字节摘要，无法序列化时返回None
+    """
+    try:
+        payload = orjson.dumps(obj, option=_KEY_OPTIONS)
+    except TypeError:
+        return None
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+class CompiledCache(Generic[T]):
+    """按配置内容缓存编译结果的LRU缓存
+
+    以配置内容的摘要为键，不持有配置对象本身；配置被原地修改后
+    按新内容重新编译，不会返回过期的结果。编译函数收到配置的深拷贝，
+    编译结果与调用方之后对配置的修改互不影响。
+    """
+
+    def __init__(self, compile_fn: Callable[[Any], T], maxsize: int = 1024):
+        """初始化缓存
+
+        Args:
+            compile_fn: 编译函数，接收配置返回编译结果
+            maxsize: 最大条目数，超出时淘汰最久未使用的条目
+        """
+        self.compile_fn = compile_fn
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, T]" = OrderedDict()
+
+    def get(self, obj: Any) -> T:
+        """获取配置的编译结果，未缓存时编译并缓存
+
+        Args:
+            obj: 配置
+
+        Returns:
+            编译结果；配置无法序列化时每次重新编译，不缓存
+        """
+        key = content_key(obj)
+        if key is None:
+            return self.compile_fn(obj)
+
+        entries = self._entries
+        try:
+            value = entries[key]
+        except KeyError:
+            pass
+        else:
+            entries.move_to_end(key)
+            return value
+
+        value = self.compile_fn(copy.deepcopy(obj))
+        entries[key] = value
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
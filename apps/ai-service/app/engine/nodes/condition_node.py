@@ -1,15 +1,23 @@
 """条件节点执行器"""
 
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import logging
 import operator
+import sys
 
 from app.engine.nodes.base import NodeExecutor, NodeExecutionError, NodeValidationError
+from app.engine.nodes.cache import CompiledCache
 from app.engine.context import ExecutionContext
 from app.schemas.node import NodeResult
 
 logger = logging.getLogger(__name__)
 
+# 预编译的条件 (field, operator_name, op_func, expected_value, branch, requires_value)
+CompiledCondition = Tuple[str, str, Callable[[Any, Any], Any], Any, str, bool]
+
+# 条件列表的编译结果 (预编译的条件, eq跳转表)，跳转表为None表示不适用
+CompiledConditions = Tuple[Tuple[CompiledCondition, ...], Optional[Dict[Any, int]]]
+
 
 class ConditionNodeExecutor(NodeExecutor):
     """条件节点执行器
@@ -45,6 +53,10 @@ class ConditionNodeExecutor(NodeExecutor):
     }
     """
 
+    __slots__ = ()
+
+    pure = True
+
     # 支持的操作符
     OPERATORS = {
         "eq": operator.eq,           # 等于
@@ -57,6 +69,9 @@ class ConditionNodeExecutor(NodeExecutor):
         "in": lambda a, b: a in b,   # 在...中
     }
 
+    # 实际值为None时必然抛出TypeError的操作符，评估前直接跳过
+    VALUE_REQUIRED_OPERATORS = frozenset({"gt", "gte", "lt", "lte", "contains"})
+
     def __init__(self, node_id: str):
         """初始化条件节点执行器
         
@@ -65,6 +80,58 @@ class ConditionNodeExecutor(NodeExecutor):
         """
         super().__init__(node_id, "condition")
 
+    def cache_inputs(self, node_config: Dict[str, Any], context: ExecutionContext) -> Any:
+        """条件节点只读取各条件的字段值"""
+        resolved_config = self._resolve_config_variables(node_config, context)
+        return (
+            resolved_config,
+            {
+                condition["field"]: context._get_nested_value(condition["field"])
+                for condition in resolved_config.get("conditions", ())
+            },
+        )
+
+    def _matched_result(
+        self,
+        index: int,
+        condition: CompiledCondition,
+        actual_value: Any,
+        total: int,
+        context: ExecutionContext,
+    ) -> NodeResult:
+        """构建条件命中时的节点结果
+        
+        Args:
+            index: 命中的条件下标
+            condition: 命中的预编译条件
+            actual_value: 字段实际值
+            total: 条件总数
+            context: 执行上下文
+            
+        Returns:
+            NodeResult: 包含选中分支的节点结果
+        """
+        field_path, op_name, _, expected_value, branch, _ = condition
+        
+        self.log_info(
+            f"Condition {index} of {total} matched, selecting branch: {branch}",
+            context
+        )
+        
+        # 字段均已校验，跳过模型校验直接构造
+        return NodeResult.model_construct(
+            node_id=self.node_id,
+            status="success",
+            output={
+                "branch": branch,
+                "matched_condition": index,
+                "field": field_path,
+                "actual_value": actual_value,
+                "expected_value": expected_value,
+                "operator": op_name,
+            },
+        )
+
     def validate_config(self, config: Dict[str, Any]) -> bool:
         """验证节点配置
         
@@ -135,6 +202,9 @@ class ConditionNodeExecutor(NodeExecutor):
     ) -> NodeResult:
         """执行条件节点
         
+        每次执行只记录一条结果日志；DEBUG级别启用时，
+        各条件的评估过程汇总为一条调试日志在结束时输出。
+        
         Args:
             node_config: 节点配置
             context: 执行上下文
@@ -145,32 +215,63 @@ class ConditionNodeExecutor(NodeExecutor):
         Raises:
             NodeExecutionError: 执行错误
         """
+        # 评估过程记录，仅DEBUG级别启用时收集
+        trace: Optional[List[str]] = (
+            [] if self.logger.isEnabledFor(logging.DEBUG) else None
+        )
+        
         try:
-            conditions = node_config["conditions"]
+            conditions, eq_table = _CONDITIONS_CACHE.get(node_config["conditions"])
             default_branch = node_config.get("default_branch")
+            # 循环内用到的方法绑定为局部变量
+            get_field_value = self._get_field_value
+            log_warning = self.log_warning
+            total = len(conditions)
+            # 待逐条评估的条件
+            pending = conditions
             
-            self.log_info(
-                f"Evaluating {len(conditions)} conditions",
-                context
-            )
-            
-            # 评估每个条件
-            for i, condition in enumerate(conditions):
-                field_path = condition["field"]
-                op_name = condition["operator"]
-                expected_value = condition["value"]
-                branch = condition["branch"]
+            # switch形式的条件直接查跳转表
+            if eq_table is not None:
+                actual_value = get_field_value(conditions[0][0], context)
+                try:
+                    index = eq_table.get(actual_value)
+                except TypeError:
+                    # 不可哈希的实际值不会等于任何可哈希的比较值
+                    index = None
+                
+                if trace is not None:
+                    trace.append(
+                        f"eq table on {conditions[0][0]}: {actual_value} -> {index}"
+                    )
+                
+                if index is not None:
+                    return self._matched_result(
+                        index, conditions[index], actual_value, total, context
+                    )
                 
+                pending = ()
+            
+            # 评估每个条件，操作符已在编译时绑定，循环内不再查表
+            for i, (
+                field_path, op_name, op_func, expected_value, branch, requires_value
+            ) in enumerate(pending):
                 # 获取字段值
-                actual_value = self._get_field_value(field_path, context)
+                actual_value = get_field_value(field_path, context)
                 
-                # 评估条件
-                op_func = self.OPERATORS[op_name]
+                # 字段缺失时比较/包含操作必然失败，无需走异常路径
+                if actual_value is None and requires_value:
+                    log_warning(
+                        f"Condition {i} skipped: field {field_path} has no value "
+                        f"for operator {op_name}",
+                        context
+                    )
+                    continue
                 
+                # 评估条件
                 try:
                     result = op_func(actual_value, expected_value)
                 except Exception as e:
-                    self.log_warning(
+                    log_warning(
                         f"Condition {i} evaluation error: {str(e)}. "
                         f"Field: {field_path}, Operator: {op_name}, "
                         f"Actual: {actual_value}, Expected: {expected_value}",
@@ -179,40 +280,27 @@ class ConditionNodeExecutor(NodeExecutor):
                     continue
                 
                 # 记录评估结果
-                self.log_debug(
-                    f"Condition {i}: {field_path} {op_name} {expected_value} = {result} "
-                    f"(actual value: {actual_value})",
-                    context
-                )
+                if trace is not None:
+                    trace.append(
+                        f"{i}: {field_path} {op_name} {expected_value} = {result} "
+                        f"(actual value: {actual_value})"
+                    )
                 
                 # 如果条件满足，返回对应分支
                 if result:
-                    self.log_info(
-                        f"Condition {i} matched, selecting branch: {branch}",
-                        context
-                    )
-                    
-                    return NodeResult(
-                        node_id=self.node_id,
-                        status="success",
-                        output={
-                            "branch": branch,
-                            "matched_condition": i,
-                            "field": field_path,
-                            "actual_value": actual_value,
-                            "expected_value": expected_value,
-                            "operator": op_name,
-                        },
+                    return self._matched_result(
+                        i, conditions[i], actual_value, total, context
                     )
             
             # 所有条件都不满足，使用默认分支
             if default_branch:
                 self.log_info(
-                    f"No conditions matched, using default branch: {default_branch}",
+                    f"None of {total} conditions matched, "
+                    f"using default branch: {default_branch}",
                     context
                 )
                 
-                return NodeResult(
+                return NodeResult.model_construct(
                     node_id=self.node_id,
                     status="success",
                     output={
@@ -233,6 +321,10 @@ class ConditionNodeExecutor(NodeExecutor):
             error_msg = f"Unexpected error in condition node: {str(e)}"
             self.log_error(error_msg, context)
             raise NodeExecutionError(error_msg) from e
+        
+        finally:
+            if trace:
+                self.log_debug("Condition trace: %s", context, "; ".join(trace))
 
     def _get_field_value(
         self,
@@ -253,11 +345,11 @@ class ConditionNodeExecutor(NodeExecutor):
         Returns:
             字段值
         """
-        # 使用上下文的嵌套值获取方法
+        # 使用上下文的嵌套值获取方法，路径拆分和已解析的值由上下文缓存
         value = context._get_nested_value(field_path)
         
         if value is None:
-            self.logger.warning(f"Field not found: {field_path}")
+            self.logger.warning("Field not found: %s", field_path)
         
         return value
 
@@ -290,3 +382,71 @@ class ConditionNodeExecutor(NodeExecutor):
                 f"Error: {str(e)}"
             )
             return False
+
+
+def _build_eq_table(
+    compiled: Tuple[CompiledCondition, ...],
+) -> Optional[Dict[Any, int]]:
+    """构建eq条件的跳转表
+    
+    所有条件都是对同一字段的eq比较且比较值可哈希时（switch形式），
+    构建 {value: 条件下标} 跳转表，用一次哈希查找代替逐条比较。
+    相同的值保留第一个条件，与逐条评估的结果一致。
+    
+    Args:
+        compiled: 预编译的条件
+        
+    Returns:
+        跳转表，不适用时返回None
+    """
+    field_path = compiled[0][0]
+    if len(compiled) < 2 or not all(
+        entry[1] == "eq" and entry[0] == field_path for entry in compiled
+    ):
+        return None
+    
+    table: Dict[Any, int] = {}
+    try:
+        for i, entry in enumerate(compiled):
+            table.setdefault(entry[3], i)
+    except TypeError:
+        # 存在不可哈希的比较值
+        return None
+    return table
+
+
+def _compile_conditions(conditions: List[Dict[str, Any]]) -> CompiledConditions:
+    """将条件列表预编译为元组序列和eq跳转表
+    
+    字段读取和操作符查找在编译时完成，同一工作流多次执行时不再重复查找。
+    
+    Args:
+        conditions: 已验证的条件列表
+        
+    Returns:
+        CompiledConditions: (预编译的条件, eq跳转表)
+    """
+    operators = ConditionNodeExecutor.OPERATORS
+    value_required = ConditionNodeExecutor.VALUE_REQUIRED_OPERATORS
+    compiled = []
+    
+    for condition in conditions:
+        # 驻留操作符、字段和分支名，下游按名称查找时可直接比较引用
+        op_name = sys.intern(condition["operator"])
+        field_path = condition["field"]
+        if isinstance(field_path, str):
+            field_path = sys.intern(field_path)
+        compiled.append((
+            field_path,
+            op_name,
+            operators[op_name],
+            condition["value"],
+            sys.intern(condition["branch"]),
+            op_name in value_required,
+        ))
+    
+    compiled_tuple = tuple(compiled)
+    return compiled_tuple, _build_eq_table(compiled_tuple)
+
+
+_CONDITIONS_CACHE: CompiledCache[CompiledConditions] = CompiledCache(_compile_conditions)
@@ -1,14 +1,53 @@
 """输入节点执行器"""
 
-from typing import Any, Dict
+from typing import Any, Dict, FrozenSet, Tuple
 import logging
 
 from app.engine.nodes.base import NodeExecutor, NodeExecutionError, NodeValidationError
+from app.engine.nodes.cache import CompiledCache
 from app.engine.context import ExecutionContext
 from app.schemas.node import NodeResult
 
 logger = logging.getLogger(__name__)
 
+# 精确类型到schema类型名的映射，bool需单独映射（bool是int的子类）
+_TYPE_NAMES: Dict[type, str] = {
+    type(None): "null",
+    bool: "boolean",
+    int: "number",
+    float: "number",
+    str: "string",
+    list: "array",
+    dict: "object",
+}
+
+# 预编译的schema (必需字段集合, 按schema顺序的必需字段, 带类型的字段 (name, type))
+CompiledSchema = Tuple[FrozenSet[str], Tuple[str, ...], Tuple[Tuple[str, str], ...]]
+
+_MISSING = object()
+
+
+def _compile_schema(schema: Dict[str, Dict[str, Any]]) -> CompiledSchema:
+    """预编译输入schema
+    
+    Args:
+        schema: 数据schema
+        
+    Returns:
+        (必需字段集合, 按schema顺序的必需字段, 带类型的字段)
+    """
+    required = tuple(
+        name for name, spec in schema.items() if spec.get("required", False)
+    )
+    typed = tuple(
+        (name, spec["type"]) for name, spec in schema.items() if "type" in spec
+    )
+    return (frozenset(required), required, typed)
+
+
+# schema编译缓存，按schema内容缓存，同一schema多次执行时只编译一次
+_SCHEMA_CACHE: CompiledCache[CompiledSchema] = CompiledCache(_compile_schema)
+
 
 class InputNodeExecutor(NodeExecutor):
     """输入节点执行器
@@ -55,7 +94,13 @@ class InputNodeExecutor(NodeExecutor):
     }
     """
 
-    VALID_TYPES = ["string", "number", "boolean", "object", "array", "null"]
+    __slots__ = ()
+
+    pure = True
+
+    # 错误提示按此顺序展示，成员判断使用frozenset
+    VALID_TYPES_DISPLAY = ("string", "number", "boolean", "object", "array", "null")
+    VALID_TYPES = frozenset(VALID_TYPES_DISPLAY)
 
     def __init__(self, node_id: str):
         """初始化输入节点执行器
@@ -96,7 +141,7 @@ class InputNodeExecutor(NodeExecutor):
                     if field_type not in self.VALID_TYPES:
                         raise NodeValidationError(
                             f"Invalid type '{field_type}' for field '{field_name}'. "
-                            f"Valid types: {', '.join(self.VALID_TYPES)}"
+                            f"Valid types: {', '.join(self.VALID_TYPES_DISPLAY)}"
                         )
                 
                 # 验证required
@@ -170,17 +215,19 @@ class InputNodeExecutor(NodeExecutor):
             # 应用默认值
             if "defaults" in node_config and isinstance(input_data, dict):
                 defaults = node_config["defaults"]
-                output_data = {**defaults, **input_data}
+                missing = defaults.keys() - input_data.keys()
                 
-                applied_defaults = [
-                    key for key in defaults.keys() if key not in input_data
-                ]
-                
-                if applied_defaults:
+                # 输入已包含全部默认字段时直接使用输入，不复制
+                if missing:
+                    output_data = {**defaults, **input_data}
+                    
+                    applied_defaults = [key for key in defaults if key in missing]
                     self.log_info(
                         f"Applied default values for fields: {', '.join(applied_defaults)}",
                         context
                     )
+                else:
+                    output_data = input_data
             else:
                 output_data = input_data
             
@@ -193,7 +240,8 @@ class InputNodeExecutor(NodeExecutor):
                 context
             )
             
-            return NodeResult(
+            # 内部构造的结果无需校验
+            return NodeResult.model_construct(
                 node_id=self.node_id,
                 status="success",
                 output=output_data,
@@ -228,30 +276,28 @@ class InputNodeExecutor(NodeExecutor):
             )
         
         errors = []
+        required_set, required, typed = _SCHEMA_CACHE.get(schema)
         
-        # 验证每个字段
-        for field_name, field_spec in schema.items():
-            # 检查必需字段
-            if field_spec.get("required", False) and field_name not in data:
-                errors.append(f"Required field '{field_name}' is missing")
-                continue
-            
-            # 如果字段不存在且不是必需的，跳过
-            if field_name not in data:
+        # 检查必需字段，全部存在时一次集合判断即可跳过
+        if not required_set <= data.keys():
+            errors.extend(
+                f"Required field '{field_name}' is missing"
+                for field_name in required
+                if field_name not in data
+            )
+        
+        # 验证类型，不存在的字段跳过
+        for field_name, expected_type in typed:
+            field_value = data.get(field_name, _MISSING)
+            if field_value is _MISSING:
                 continue
             
-            field_value = data[field_name]
-            
-            # 验证类型
-            if "type" in field_spec:
-                expected_type = field_spec["type"]
-                actual_type = self._get_value_type(field_value)
-                
-                if actual_type != expected_type:
-                    errors.append(
-                        f"Field '{field_name}' has wrong type: "
-                        f"expected {expected_type}, got {actual_type}"
-                    )
+            actual_type = self._get_value_type(field_value)
+            if actual_type != expected_type:
+                errors.append(
+                    f"Field '{field_name}' has wrong type: "
+                    f"expected {expected_type}, got {actual_type}"
+                )
         
         # 如果有验证错误，抛出异常
         if errors:
@@ -267,12 +313,18 @@ class InputNodeExecutor(NodeExecutor):
     def _get_value_type(self, value: Any) -> str:
         """获取值的类型名称
         
+        常见的JSON类型按type(value)一次查表，子类（如OrderedDict）回退到isinstance判断。
+        
         Args:
             value: 值
             
         Returns:
             类型名称
         """
+        type_name = _TYPE_NAMES.get(type(value))
+        if type_name is not None:
+            return type_name
+        
         if value is None:
             return "null"
         elif isinstance(value, bool):
@@ -1,7 +1,9 @@
 """LLM节点执行器"""
 
 from typing import Any, Dict, AsyncIterator
+import io
 import logging
+import time
 
 from app.engine.nodes.base import NodeExecutor, NodeExecutionError, NodeValidationError
 from app.engine.context import ExecutionContext
@@ -26,6 +28,19 @@ class LLMNodeExecutor(NodeExecutor):
     - top_k: top_k参数（可选）
     """
 
+    __slots__ = ("ollama_service",)
+
+    # 流式生成进度日志的最小间隔（秒）
+    STREAM_LOG_INTERVAL = 0.5
+
+    # 可选参数映射 (节点配置键, Ollama参数名)
+    PARAM_MAP = (
+        ("temperature", "temperature"),
+        ("max_tokens", "num_predict"),
+        ("top_p", "top_p"),
+        ("top_k", "top_k"),
+    )
+
     def __init__(self, node_id: str, ollama_service: OllamaService):
         """初始化LLM节点执行器
         
@@ -88,6 +103,10 @@ class LLMNodeExecutor(NodeExecutor):
     ) -> NodeResult:
         """执行LLM节点
         
+        提示词和参数的构建是纯CPU操作，不含可并发的await；
+        WorkflowEngine在节点的所有上游完成后立即启动它，互不依赖的多个LLM节点
+        并发执行（受max_parallel_nodes和节点类型并发上限限制）。
+        
         Args:
             node_config: 节点配置
             context: 执行上下文
@@ -129,12 +148,15 @@ class LLMNodeExecutor(NodeExecutor):
                     **ollama_params
                 )
             
+            # 输出通常已是字符串，无需再转换
+            output_length = len(output) if isinstance(output, str) else len(str(output))
             self.log_info(
-                f"LLM generation completed, output length: {len(str(output))}",
+                f"LLM generation completed, output length: {output_length}",
                 context
             )
             
-            return NodeResult(
+            # 内部构造的结果无需校验
+            return NodeResult.model_construct(
                 node_id=self.node_id,
                 status="success",
                 output=output,
@@ -159,6 +181,9 @@ class LLMNodeExecutor(NodeExecutor):
         
         支持变量替换，格式: {{variable_name}}
         
+        模板的解析结果由上下文的_parse_template按模板文本缓存，
+        同一提示词多次执行只做一次正则扫描；不含变量引用时直接返回原文本。
+        
         Args:
             node_config: 节点配置
             context: 执行上下文
@@ -182,22 +207,11 @@ class LLMNodeExecutor(NodeExecutor):
         Returns:
             Dict: Ollama参数
         """
-        params = {}
-        
-        # 可选参数
-        if "temperature" in node_config:
-            params["temperature"] = node_config["temperature"]
-        
-        if "max_tokens" in node_config:
-            params["num_predict"] = node_config["max_tokens"]
-        
-        if "top_p" in node_config:
-            params["top_p"] = node_config["top_p"]
-        
-        if "top_k" in node_config:
-            params["top_k"] = node_config["top_k"]
-        
-        return params
+        return {
+            param: node_config[key]
+            for key, param in self.PARAM_MAP
+            if key in node_config
+        }
 
     async def _stream_generate(
         self,
@@ -217,7 +231,12 @@ class LLMNodeExecutor(NodeExecutor):
         Returns:
             str: 完整的生成文本
         """
-        full_output = []
+        # 写入缓冲并维护计数，避免每次记录日志时重新累加全部chunk长度
+        buffer = io.StringIO()
+        chunk_count = 0
+        total_length = 0
+        debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+        last_log_at = time.monotonic()
         
         # 获取流式生成器
         stream: AsyncIterator[str] = await self.ollama_service.generate(
@@ -229,14 +248,19 @@ class LLMNodeExecutor(NodeExecutor):
         
         # 收集流式输出
         async for chunk in stream:
-            full_output.append(chunk)
+            buffer.write(chunk)
+            chunk_count += 1
+            total_length += len(chunk)
             
-            # 可以在这里添加实时日志
-            if len(full_output) % 10 == 0:  # 每10个chunk记录一次
-                self.log_debug(
-                    f"Generated {len(full_output)} chunks, "
-                    f"total length: {sum(len(c) for c in full_output)}",
-                    context
-                )
+            # 按时间间隔记录进度，避免逐token生成时日志过于频繁
+            if debug_enabled:
+                now = time.monotonic()
+                if now - last_log_at >= self.STREAM_LOG_INTERVAL:
+                    last_log_at = now
+                    self.log_debug(
+                        "Generated %d chunks, total length: %d",
+                        context,
+                        chunk_count, total_length,
+                    )
         
-        return "".join(full_output)
+        return buffer.getvalue()
@@ -1,16 +1,33 @@
 """输出节点执行器"""
 
-from typing import Any, Dict
+from typing import Any, Callable, Dict, FrozenSet, NamedTuple, Optional
 import logging
 import json
 
+import orjson
+
 from app.engine.nodes.base import NodeExecutor, NodeExecutionError, NodeValidationError
+from app.engine.nodes.cache import CompiledCache
 from app.engine.context import ExecutionContext
 from app.schemas.node import NodeResult
 
 logger = logging.getLogger(__name__)
 
 
+class OutputPlan(NamedTuple):
+    """从节点配置预先解析出的执行计划"""
+
+    source_node: Optional[str]
+    format_type: str
+    formatter: Optional[Callable[..., Any]]
+    pretty: bool
+    as_bytes: bool
+    fields: Optional[FrozenSet[str]]
+    exclude_fields: Optional[FrozenSet[str]]
+    exclude_count: int
+    template: str
+
+
 class OutputNodeExecutor(NodeExecutor):
     """输出节点执行器
     
@@ -37,6 +54,9 @@ class OutputNodeExecutor(NodeExecutor):
     
     - pretty: 是否美化输出（可选，format为json时使用）
     
+    - as_bytes: 是否直接输出UTF-8字节（可选，format为json时使用）
+      大输出直接保留序列化得到的bytes，不再解码为字符串，降低峰值内存
+    
     示例配置:
     1. 原始输出:
     {
@@ -61,7 +81,11 @@ class OutputNodeExecutor(NodeExecutor):
     }
     """
 
-    VALID_FORMATS = ["raw", "json", "text", "custom"]
+    __slots__ = ()
+
+    # 错误提示按此顺序展示，成员判断使用frozenset
+    VALID_FORMATS_DISPLAY = ("raw", "json", "text", "custom")
+    VALID_FORMATS = frozenset(VALID_FORMATS_DISPLAY)
 
     def __init__(self, node_id: str):
         """初始化输出节点执行器
@@ -89,7 +113,7 @@ class OutputNodeExecutor(NodeExecutor):
             if format_type not in self.VALID_FORMATS:
                 raise NodeValidationError(
                     f"Invalid format: {format_type}. "
-                    f"Valid formats: {', '.join(self.VALID_FORMATS)}"
+                    f"Valid formats: {', '.join(self.VALID_FORMATS_DISPLAY)}"
                 )
             
             # 如果是custom格式，必须提供template
@@ -119,6 +143,11 @@ class OutputNodeExecutor(NodeExecutor):
             if not isinstance(config["pretty"], bool):
                 raise NodeValidationError("pretty must be a boolean")
         
+        # 验证as_bytes
+        if "as_bytes" in config:
+            if not isinstance(config["as_bytes"], bool):
+                raise NodeValidationError("as_bytes must be a boolean")
+        
         return True
 
     async def execute(
@@ -139,8 +168,10 @@ class OutputNodeExecutor(NodeExecutor):
             NodeExecutionError: 执行错误
         """
         try:
+            plan = _PLAN_CACHE.get(node_config)
+            
             # 获取输入数据
-            source_node = node_config.get("source_node")
+            source_node = plan.source_node
             if source_node:
                 input_data = context.get_node_output(source_node)
                 self.log_info(
@@ -160,18 +191,18 @@ class OutputNodeExecutor(NodeExecutor):
                 input_data = {}
             
             # 过滤字段
-            filtered_data = self._filter_fields(input_data, node_config, context)
+            filtered_data = self._filter_fields(input_data, plan, context)
             
             # 格式化输出
-            format_type = node_config.get("format", "raw")
-            output = self._format_output(filtered_data, format_type, node_config, context)
+            output = self._format_output(filtered_data, plan, context)
             
             self.log_info(
-                f"Output formatted as {format_type}, type: {type(output).__name__}",
+                f"Output formatted as {plan.format_type}, type: {type(output).__name__}",
                 context
             )
             
-            return NodeResult(
+            # 内部构造的结果无需校验
+            return NodeResult.model_construct(
                 node_id=self.node_id,
                 status="success",
                 output=output,
@@ -199,32 +230,40 @@ class OutputNodeExecutor(NodeExecutor):
         
         # 返回最后一个节点的输出
         # 注意：这假设node_outputs是有序的（Python 3.7+字典保持插入顺序）
-        last_node_id = list(context.node_outputs.keys())[-1]
+        last_node_id = next(reversed(context.node_outputs))
         return context.node_outputs[last_node_id]
 
     def _filter_fields(
         self,
         data: Any,
-        node_config: Dict[str, Any],
+        plan: OutputPlan,
         context: ExecutionContext,
     ) -> Any:
         """过滤字段
         
+        字段列表在执行计划中已转为集合，过滤时每个键只需一次哈希查找。
+        
         Args:
             data: 输入数据
-            node_config: 节点配置
+            plan: 执行计划
             context: 执行上下文
             
         Returns:
             过滤后的数据
         """
-        # 如果不是字典，无法过滤字段
-        if not isinstance(data, dict):
+        fields = plan.fields
+        excluded = plan.exclude_fields
+        
+        # 没有过滤配置，返回原始数据
+        if fields is None and excluded is None:
+            return data
+        
+        # 如果不是字典，无法过滤字段；普通dict先用类型比较，再兼容dict子类
+        if not (type(data) is dict or isinstance(data, dict)):
             return data
         
         # 包含特定字段
-        if "fields" in node_config:
-            fields = node_config["fields"]
+        if fields is not None:
             filtered = {k: v for k, v in data.items() if k in fields}
             
             self.log_info(
@@ -235,90 +274,155 @@ class OutputNodeExecutor(NodeExecutor):
             return filtered
         
         # 排除特定字段
-        if "exclude_fields" in node_config:
-            exclude_fields = node_config["exclude_fields"]
-            filtered = {k: v for k, v in data.items() if k not in exclude_fields}
+        if excluded is not None:
+            filtered = {k: v for k, v in data.items() if k not in excluded}
             
             self.log_info(
-                f"Excluded {len(exclude_fields)} fields, remaining: {len(filtered)}",
+                f"Excluded {plan.exclude_count} fields, remaining: {len(filtered)}",
                 context
             )
             
             return filtered
         
-        # 没有过滤配置，返回原始数据
         return data
 
     def _format_output(
         self,
         data: Any,
-        format_type: str,
-        node_config: Dict[str, Any],
+        plan: OutputPlan,
         context: ExecutionContext,
     ) -> Any:
         """格式化输出
         
         Args:
             data: 数据
-            format_type: 格式类型
-            node_config: 节点配置
+            plan: 执行计划
             context: 执行上下文
             
         Returns:
             格式化后的输出
         """
-        if format_type == "raw":
+        formatter = plan.formatter
+        if formatter is None:
+            self.log_warning(
+                f"Unknown format type: {plan.format_type}. Returning raw data.",
+                context
+            )
             return data
         
-        elif format_type == "json":
-            # JSON格式化
-            pretty = node_config.get("pretty", False)
-            
-            try:
-                if pretty:
-                    return json.dumps(data, indent=2, ensure_ascii=False)
-                else:
-                    return json.dumps(data, ensure_ascii=False)
-            except Exception as e:
-                self.log_warning(
-                    f"Failed to serialize to JSON: {str(e)}. Returning raw data.",
-                    context
-                )
-                return data
+        return formatter(self, data, plan, context)
+
+    def _format_raw(
+        self,
+        data: Any,
+        plan: OutputPlan,
+        context: ExecutionContext,
+    ) -> Any:
+        """原始输出"""
+        return data
+
+    def _format_json(
+        self,
+        data: Any,
+        plan: OutputPlan,
+        context: ExecutionContext,
+    ) -> Any:
+        """JSON格式化，序列化失败时返回原始数据
         
-        elif format_type == "text":
-            # 纯文本格式化
-            if isinstance(data, str):
-                return data
-            elif isinstance(data, dict):
-                # 将字典转换为键值对文本
-                lines = [f"{k}: {v}" for k, v in data.items()]
-                return "\n".join(lines)
-            else:
-                return str(data)
+        配置as_bytes时返回orjson生成的bytes，省去解码出的字符串副本。
+        """
+        pretty = plan.pretty
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
         
-        elif format_type == "custom":
-            # 自定义模板格式化
-            template = node_config.get("template", "")
-            
-            # 创建临时上下文用于变量解析
-            temp_context = ExecutionContext(
-                execution_id=context.execution_id,
-                workflow_id=context.workflow_id,
-                input_data=context.input_data,
-            )
-            
-            # 将输出数据设置为变量
-            temp_context.set_variable("output", data)
-            
-            # 解析模板
-            result = temp_context.resolve_variables(template)
-            
-            return result
+        try:
+            serialized = orjson.dumps(data, option=option)
+            return serialized if plan.as_bytes else serialized.decode()
+        except orjson.JSONEncodeError:
+            # orjson不支持的类型（如超出64位的整数）回退到标准库
+            pass
         
-        else:
+        try:
+            if pretty:
+                text = json.dumps(data, indent=2, ensure_ascii=False)
+            else:
+                text = json.dumps(data, ensure_ascii=False)
+            return text.encode() if plan.as_bytes else text
+        except Exception as e:
             self.log_warning(
-                f"Unknown format type: {format_type}. Returning raw data.",
+                f"Failed to serialize to JSON: {str(e)}. Returning raw data.",
                 context
             )
             return data
+
+    def _format_text(
+        self,
+        data: Any,
+        plan: OutputPlan,
+        context: ExecutionContext,
+    ) -> str:
+        """纯文本格式化"""
+        if isinstance(data, str):
+            return data
+        elif type(data) is dict or isinstance(data, dict):
+            # 将字典转换为键值对文本
+            return "\n".join(f"{k}: {v}" for k, v in data.items())
+        else:
+            return str(data)
+
+    def _format_custom(
+        self,
+        data: Any,
+        plan: OutputPlan,
+        context: ExecutionContext,
+    ) -> str:
+        """自定义模板格式化"""
+        template = plan.template
+        
+        # 将输出数据临时设置为变量后解析模板，解析完成后恢复
+        with context.scoped_variable("output", data):
+            result = context.resolve_variables(template)
+        
+        return result
+
+    # 格式类型到格式化方法的分派表
+    FORMATTERS = {
+        "raw": _format_raw,
+        "json": _format_json,
+        "text": _format_text,
+        "custom": _format_custom,
+    }
+
+
+def _compile_plan(node_config: Dict[str, Any]) -> OutputPlan:
+    """将节点配置解析为执行计划
+    
+    配置项读取、格式分派和字段集合构建在首次执行时完成，
+    同一配置多次执行时不再重复。
+    
+    Args:
+        node_config: 节点配置
+        
+    Returns:
+        OutputPlan: 执行计划
+    """
+    format_type = node_config.get("format", "raw")
+    fields = node_config.get("fields")
+    exclude_fields = node_config.get("exclude_fields")
+    return OutputPlan(
+        source_node=node_config.get("source_node"),
+        format_type=format_type,
+        formatter=OutputNodeExecutor.FORMATTERS.get(format_type),
+        pretty=node_config.get("pretty", False),
+        as_bytes=node_config.get("as_bytes", False),
+        fields=frozenset(fields) if fields is not None else None,
+        exclude_fields=(
+            frozenset(exclude_fields) if exclude_fields is not None else None
+        ),
+        exclude_count=len(exclude_fields) if exclude_fields is not None else 0,
+        template=node_config.get("template", ""),
+    )
+
+
+_PLAN_CACHE: CompiledCache[OutputPlan] = CompiledCache(_compile_plan)
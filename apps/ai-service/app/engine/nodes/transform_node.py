@@ -1,6 +1,10 @@
 """转换节点执行器"""
 
-from typing import Any, Dict
+from functools import lru_cache
+from operator import itemgetter
+from types import CodeType, SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import ast
 import logging
 import json
 import re
@@ -11,6 +15,267 @@ from app.schemas.node import NodeResult
 
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
+# 自定义表达式的执行环境，只暴露白名单内置函数
+_SAFE_GLOBALS: Dict[str, Any] = {
+    "__builtins__": {
+        "len": len,
+        "str": str,
+        "int": int,
+        "float": float,
+        "bool": bool,
+        "list": list,
+        "dict": dict,
+        "tuple": tuple,
+        "set": set,
+        "sum": sum,
+        "min": min,
+        "max": max,
+        "abs": abs,
+        "round": round,
+        "sorted": sorted,
+        "reversed": reversed,
+        "enumerate": enumerate,
+        "zip": zip,
+        "map": map,
+        "filter": filter,
+        "any": any,
+        "all": all,
+    },
+    # 只暴露序列化函数，避免通过模块属性访问到其他模块
+    "json": SimpleNamespace(loads=json.loads, dumps=json.dumps),
+}
+
+# 表达式中允许出现的语法节点（白名单），推导式、生成器、lambda等一律不允许；
+# 不含幂运算和移位，避免构造超大整数耗尽资源；乘法改写为_guarded_mul，
+# 限制序列重复的结果长度
+_ALLOWED_NODES = (
+    ast.Expression,
+    ast.Load,
+    ast.BoolOp,
+    ast.And,
+    ast.Or,
+    ast.BinOp,
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.FloorDiv,
+    ast.Mod,
+    ast.BitAnd,
+    ast.BitOr,
+    ast.BitXor,
+    ast.UnaryOp,
+    ast.Not,
+    ast.UAdd,
+    ast.USub,
+    ast.Invert,
+    ast.Compare,
+    ast.Eq,
+    ast.NotEq,
+    ast.Lt,
+    ast.LtE,
+    ast.Gt,
+    ast.GtE,
+    ast.In,
+    ast.NotIn,
+    ast.Is,
+    ast.IsNot,
+    ast.Call,
+    ast.keyword,
+    ast.Name,
+    ast.Constant,
+    ast.Subscript,
+    ast.Slice,
+    ast.List,
+    ast.Tuple,
+    ast.Dict,
+    ast.Set,
+    ast.IfExp,
+    ast.Attribute,
+)
+
+# 表达式中可以引用的名称
+_ALLOWED_NAMES = frozenset(_SAFE_GLOBALS["__builtins__"]) | {"input", "context", "json"}
+
+# 可以访问的属性：json序列化函数和str/dict/list的常用只读方法，
+# 不含format等可通过格式串访问任意属性的方法
+_ALLOWED_ATTRS = frozenset({
+    "loads",
+    "dumps",
+    "get",
+    "keys",
+    "values",
+    "items",
+    "count",
+    "index",
+    "find",
+    "upper",
+    "lower",
+    "title",
+    "capitalize",
+    "strip",
+    "lstrip",
+    "rstrip",
+    "split",
+    "rsplit",
+    "join",
+    "replace",
+    "startswith",
+    "endswith",
+    "isdigit",
+    "isalpha",
+    "isalnum",
+})
+
+
+@lru_cache(maxsize=512)
+def _fields_getter(fields: Tuple[Any, ...]) -> Callable[[Dict[str, Any]], Tuple[Any, ...]]:
+    """创建按字段顺序一次取出所有值的函数，同一字段列表只创建一次"""
+    if not fields:
+        return lambda data: ()
+    if len(fields) == 1:
+        # 单个字段时itemgetter返回值本身而非元组
+        get_one = itemgetter(fields[0])
+        return lambda data: (get_one(data),)
+    return itemgetter(*fields)
+
+
+def _get_all_fields(data: Dict[str, Any], fields: List[Any]) -> Optional[Tuple[Any, ...]]:
+    """按字段顺序取出所有字段值
+    
+    所有字段都存在时由itemgetter在一次调用中取出，任一字段缺失时返回None。
+    
+    Args:
+        data: 输入字典
+        fields: 字段列表
+        
+    Returns:
+        字段值元组，有字段缺失时返回None
+    """
+    try:
+        return _fields_getter(tuple(fields))(data)
+    except KeyError:
+        return None
+
+
+class UnsafeExpressionError(ValueError):
+    """自定义表达式包含不允许的语法"""
+
+    pass
+
+
+# 乘法重复序列时结果的最大长度
+_MAX_REPEAT_LENGTH = 1_000_000
+
+# 乘法会按另一个操作数重复的序列类型
+_SEQUENCE_TYPES = (str, bytes, bytearray, list, tuple)
+
+
+def _guarded_mul(left: Any, right: Any) -> Any:
+    """限制结果大小的乘法
+    
+    一侧是序列、另一侧是整数时（如 "a" * 100000 * 100000），先检查
+    重复后的长度，超出_MAX_REPEAT_LENGTH时拒绝，不分配结果。
+    
+    Raises:
+        UnsafeExpressionError: 序列重复后的长度超出限制
+    """
+    if isinstance(left, int) and isinstance(right, _SEQUENCE_TYPES):
+        sequence, times = right, left
+    elif isinstance(right, int) and isinstance(left, _SEQUENCE_TYPES):
+        sequence, times = left, right
+    else:
+        return left * right
+    
+    if len(sequence) * times > _MAX_REPEAT_LENGTH:
+        raise UnsafeExpressionError(
+            f"Repeating a sequence beyond {_MAX_REPEAT_LENGTH} items is not allowed"
+        )
+    return left * right
+
+
+class _GuardMultiplication(ast.NodeTransformer):
+    """将乘法改写为_guarded_mul调用"""
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        self.generic_visit(node)
+        if not isinstance(node.op, ast.Mult):
+            return node
+        return ast.copy_location(
+            ast.Call(
+                func=ast.Name(id="_guarded_mul", ctx=ast.Load()),
+                args=[node.left, node.right],
+                keywords=[],
+            ),
+            node,
+        )
+
+
+# 改写后的乘法在受限环境中调用，表达式本身不能引用（名称以下划线开头，不在白名单内）
+_SAFE_GLOBALS["_guarded_mul"] = _guarded_mul
+
+
+def _check_expression(tree: ast.Expression) -> None:
+    """检查表达式语法树是否只包含允许的结构
+    
+    按白名单检查：语法节点、名称和属性都必须在允许范围内，
+    调用只能针对白名单内置函数或允许的方法，下标不能是下划线开头的字符串。
+    推导式和生成器表达式不在白名单内，阻止通过 gi_frame、f_back 等帧属性
+    或 ().__class__ 等方式逃逸出受限环境。
+    
+    Args:
+        tree: 表达式语法树
+        
+    Raises:
+        UnsafeExpressionError: 包含不允许的语法
+    """
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise UnsafeExpressionError(
+                f"{type(node).__name__} is not allowed in expressions"
+            )
+        if isinstance(node, ast.Name) and node.id not in _ALLOWED_NAMES:
+            raise UnsafeExpressionError(f"Access to name '{node.id}' is not allowed")
+        if isinstance(node, ast.Attribute) and node.attr not in _ALLOWED_ATTRS:
+            raise UnsafeExpressionError(f"Access to attribute '{node.attr}' is not allowed")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, (ast.Name, ast.Attribute)):
+                raise UnsafeExpressionError("Only named functions and methods can be called")
+            if any(keyword.arg is None for keyword in node.keywords):
+                raise UnsafeExpressionError("Keyword argument unpacking is not allowed")
+        if (
+            isinstance(node, ast.Subscript)
+            and isinstance(node.slice, ast.Constant)
+            and isinstance(node.slice.value, str)
+            and node.slice.value.startswith("_")
+        ):
+            raise UnsafeExpressionError(
+                f"Access to key '{node.slice.value}' is not allowed"
+            )
+
+
+@lru_cache(maxsize=512)
+def _compile_expression(expression: str) -> CodeType:
+    """解析、检查并编译自定义表达式，同一表达式只处理一次
+    
+    Args:
+        expression: 表达式源码
+        
+    Returns:
+        编译后的代码对象
+        
+    Raises:
+        SyntaxError: 表达式语法错误
+        UnsafeExpressionError: 表达式包含不允许的语法
+    """
+    tree = ast.parse(expression, mode="eval")
+    _check_expression(tree)
+    # 检查通过后再改写，表达式本身不能引用_guarded_mul
+    tree = ast.fix_missing_locations(_GuardMultiplication().visit(tree))
+    return compile(tree, "<transform-node>", "eval")
+
 
 class TransformNodeExecutor(NodeExecutor):
     """转换节点执行器
@@ -59,7 +324,13 @@ class TransformNodeExecutor(NodeExecutor):
     }
     """
 
-    TRANSFORM_TYPES = ["mapping", "filter", "merge", "extract", "custom"]
+    __slots__ = ()
+
+    pure = True
+
+    # 错误提示按此顺序展示，成员判断使用frozenset
+    TRANSFORM_TYPES_DISPLAY = ("mapping", "filter", "merge", "extract", "custom")
+    TRANSFORM_TYPES = frozenset(TRANSFORM_TYPES_DISPLAY)
 
     def __init__(self, node_id: str):
         """初始化转换节点执行器
@@ -69,6 +340,21 @@ class TransformNodeExecutor(NodeExecutor):
         """
         super().__init__(node_id, "transform")
 
+    def is_cacheable(self, node_config: Dict[str, Any]) -> bool:
+        """自定义表达式可以读取执行ID，其结果不跨执行缓存"""
+        return node_config.get("transform_type") != "custom"
+
+    def cache_inputs(self, node_config: Dict[str, Any], context: ExecutionContext) -> Any:
+        """合并转换读取sources中各节点的输出，其余类型使用默认输入"""
+        if node_config.get("transform_type") != "merge":
+            return super().cache_inputs(node_config, context)
+        
+        get_node_output = context.get_node_output
+        return (
+            node_config,
+            {source: get_node_output(source) for source in node_config.get("sources", ())},
+        )
+
     def validate_config(self, config: Dict[str, Any]) -> bool:
         """验证节点配置
         
@@ -91,7 +377,7 @@ class TransformNodeExecutor(NodeExecutor):
         if transform_type not in self.TRANSFORM_TYPES:
             raise NodeValidationError(
                 f"Invalid transform_type: {transform_type}. "
-                f"Supported types: {', '.join(self.TRANSFORM_TYPES)}"
+                f"Supported types: {', '.join(self.TRANSFORM_TYPES_DISPLAY)}"
             )
         
         # 根据转换类型验证特定字段
@@ -126,6 +412,15 @@ class TransformNodeExecutor(NodeExecutor):
             expression = config["expression"]
             if not isinstance(expression, str) or not expression.strip():
                 raise NodeValidationError("expression must be a non-empty string")
+            
+            # 不含变量引用的表达式提前编译，语法错误在验证阶段暴露
+            if "{{" not in expression:
+                try:
+                    _compile_expression(expression)
+                except SyntaxError as e:
+                    raise NodeValidationError(f"Invalid expression syntax: {e.msg}")
+                except UnsafeExpressionError as e:
+                    raise NodeValidationError(f"Unsafe expression: {str(e)}")
         
         return True
 
@@ -155,25 +450,18 @@ class TransformNodeExecutor(NodeExecutor):
             )
             
             # 根据转换类型执行相应操作
-            if transform_type == "mapping":
-                output = self._execute_mapping(node_config, context)
-            elif transform_type == "filter":
-                output = self._execute_filter(node_config, context)
-            elif transform_type == "extract":
-                output = self._execute_extract(node_config, context)
-            elif transform_type == "merge":
-                output = self._execute_merge(node_config, context)
-            elif transform_type == "custom":
-                output = self._execute_custom(node_config, context)
-            else:
+            handler = self.HANDLERS.get(transform_type)
+            if handler is None:
                 raise NodeExecutionError(f"Unsupported transform type: {transform_type}")
+            output = handler(self, node_config, context)
             
             self.log_info(
                 f"Transform completed, output type: {type(output).__name__}",
                 context
             )
             
-            return NodeResult(
+            # 内部构造的结果无需校验
+            return NodeResult.model_construct(
                 node_id=self.node_id,
                 status="success",
                 output=output,
@@ -193,6 +481,9 @@ class TransformNodeExecutor(NodeExecutor):
     ) -> Dict[str, Any]:
         """执行字段映射
         
+        模板的解析结果由上下文的_parse_template按模板文本缓存，
+        同一映射多次执行只做一次正则扫描；不含 {{ 的字面值不进入解析。
+        
         Args:
             node_config: 节点配置
             context: 执行上下文
@@ -202,20 +493,19 @@ class TransformNodeExecutor(NodeExecutor):
         """
         mappings = node_config["mappings"]
         output = {}
+        debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
         
         for output_field, template in mappings.items():
-            # 解析模板中的变量
-            if isinstance(template, str):
+            # 只有包含变量引用的字符串需要解析，其余值原样输出
+            if isinstance(template, str) and "{{" in template:
                 value = context.resolve_variables(template)
             else:
                 value = template
             
             output[output_field] = value
             
-            self.log_debug(
-                f"Mapped field: {output_field} = {value}",
-                context
-            )
+            if debug_enabled:
+                self.log_debug("Mapped field: %s = %s", context, output_field, value)
         
         return output
 
@@ -242,13 +532,22 @@ class TransformNodeExecutor(NodeExecutor):
         else:
             input_data = context.input_data
         
-        if not isinstance(input_data, dict):
+        # 普通dict先用类型比较，再兼容dict子类
+        if not (type(input_data) is dict or isinstance(input_data, dict)):
             raise NodeExecutionError(
                 f"Filter transform requires dict input, got {type(input_data).__name__}"
             )
         
-        # 过滤字段
-        output = {field: input_data.get(field) for field in fields if field in input_data}
+        # 过滤字段，保持配置中的字段顺序；字段齐全时一次取出所有值
+        values = _get_all_fields(input_data, fields)
+        if values is not None:
+            output = dict(zip(fields, values))
+        else:
+            output = {
+                field: value
+                for field in fields
+                if (value := input_data.get(field, _MISSING)) is not _MISSING
+            }
         
         self.log_info(
             f"Filtered {len(output)} fields from {len(input_data)} total fields",
@@ -283,7 +582,7 @@ class TransformNodeExecutor(NodeExecutor):
         # 如果只提取一个字段，直接返回值
         if len(fields) == 1:
             field = fields[0]
-            if isinstance(input_data, dict):
+            if type(input_data) is dict or isinstance(input_data, dict):
                 value = input_data.get(field)
             else:
                 value = None
@@ -292,12 +591,17 @@ class TransformNodeExecutor(NodeExecutor):
             return value
         
         # 提取多个字段，返回字典
-        if not isinstance(input_data, dict):
+        if not (type(input_data) is dict or isinstance(input_data, dict)):
             raise NodeExecutionError(
                 f"Extract transform requires dict input, got {type(input_data).__name__}"
             )
         
-        output = {field: input_data.get(field) for field in fields}
+        # 字段齐全时一次取出所有值，有字段缺失时逐个取值并以None填充
+        values = _get_all_fields(input_data, fields)
+        if values is not None:
+            output = dict(zip(fields, values))
+        else:
+            output = {field: input_data.get(field) for field in fields}
         
         self.log_info(f"Extracted {len(output)} fields", context)
         
@@ -310,6 +614,10 @@ class TransformNodeExecutor(NodeExecutor):
     ) -> Dict[str, Any]:
         """执行数据合并
         
+        先取出所有源节点的输出，再按源顺序合并。节点输出目前保存在内存中，
+        取值为同步字典查找；若改为从外部存储加载，只需将取值一步改为
+        asyncio.gather 并发获取，合并逻辑不变。
+        
         Args:
             node_config: 节点配置
             context: 执行上下文
@@ -320,9 +628,11 @@ class TransformNodeExecutor(NodeExecutor):
         sources = node_config["sources"]
         output = {}
         
-        for source_node_id in sources:
-            source_data = context.get_node_output(source_node_id)
-            
+        # 取值与合并分开，合并顺序始终与sources一致
+        get_node_output = context.get_node_output
+        source_outputs = [get_node_output(source_node_id) for source_node_id in sources]
+        
+        for source_node_id, source_data in zip(sources, source_outputs):
             if source_data is None:
                 self.log_warning(
                     f"Source node {source_node_id} has no output, skipping",
@@ -330,20 +640,18 @@ class TransformNodeExecutor(NodeExecutor):
                 )
                 continue
             
-            if isinstance(source_data, dict):
+            if type(source_data) is dict or isinstance(source_data, dict):
                 # 合并字典
                 output.update(source_data)
                 self.log_debug(
-                    f"Merged data from node {source_node_id}: {len(source_data)} fields",
-                    context
+                    "Merged data from node %s: %d fields",
+                    context,
+                    source_node_id, len(source_data),
                 )
             else:
                 # 非字典数据，使用节点ID作为键
                 output[source_node_id] = source_data
-                self.log_debug(
-                    f"Added data from node {source_node_id} as field",
-                    context
-                )
+                self.log_debug("Added data from node %s as field", context, source_node_id)
         
         self.log_info(
             f"Merged data from {len(sources)} sources, total fields: {len(output)}",
@@ -359,7 +667,7 @@ class TransformNodeExecutor(NodeExecutor):
     ) -> Any:
         """执行自定义转换
         
-        使用简单的表达式评估。出于安全考虑，仅支持基本的数据操作。
+        表达式在编译前按白名单检查语法树，不允许可逃逸受限环境的写法。
         
         Args:
             node_config: 节点配置
@@ -377,36 +685,6 @@ class TransformNodeExecutor(NodeExecutor):
         else:
             input_data = context.input_data
         
-        # 准备安全的执行环境
-        # 注意：这是一个简化的实现，生产环境应该使用更安全的沙箱
-        safe_globals = {
-            "__builtins__": {
-                "len": len,
-                "str": str,
-                "int": int,
-                "float": float,
-                "bool": bool,
-                "list": list,
-                "dict": dict,
-                "tuple": tuple,
-                "set": set,
-                "sum": sum,
-                "min": min,
-                "max": max,
-                "abs": abs,
-                "round": round,
-                "sorted": sorted,
-                "reversed": reversed,
-                "enumerate": enumerate,
-                "zip": zip,
-                "map": map,
-                "filter": filter,
-                "any": any,
-                "all": all,
-            },
-            "json": json,
-        }
-        
         safe_locals = {
             "input": input_data,
             "context": {
@@ -417,7 +695,7 @@ class TransformNodeExecutor(NodeExecutor):
         
         try:
             # 评估表达式
-            result = eval(expression, safe_globals, safe_locals)
+            result = eval(_compile_expression(expression), _SAFE_GLOBALS, safe_locals)
             
             self.log_info(
                 f"Custom expression evaluated successfully, result type: {type(result).__name__}",
@@ -430,3 +708,12 @@ class TransformNodeExecutor(NodeExecutor):
             error_msg = f"Error evaluating custom expression: {str(e)}"
             self.log_error(error_msg, context)
             raise NodeExecutionError(error_msg) from e
+
+    # 转换类型到处理方法的分派表
+    HANDLERS = {
+        "mapping": _execute_mapping,
+        "filter": _execute_filter,
+        "extract": _execute_extract,
+        "merge": _execute_merge,
+        "custom": _execute_custom,
+    }
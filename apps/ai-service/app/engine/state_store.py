@@ -0,0 +1,102 @@
+"""执行状态存储"""
+
+import logging
+from typing import Any, Dict, Optional
+
+import orjson
+import redis.asyncio as redis
+
+from app.core.config import get_settings
+from app.core.serialization import json_dumps
+
+logger = logging.getLogger(__name__)
+
+
+class StateStoreError(Exception):
+    """状态存储错误"""
+
+    pass
+
+
+class RedisStateStore:
+    """基于Redis的执行状态存储
+
+    执行结束后将状态和日志写入Redis并设置过期时间，
+    使已完成的执行不再常驻进程内存，多个worker也可共享查询。
+
+    键格式: workflow:state:{execution_id}
+    """
+
+    KEY_PREFIX = "workflow:state:"
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        ttl_seconds: Optional[int] = None,
+        client: Optional[redis.Redis] = None,
+    ):
+        """初始化状态存储
+
+        Args:
+            redis_url: Redis地址，默认从配置读取
+            ttl_seconds: 状态过期时间（秒），默认从配置读取
+            client: 已创建的Redis客户端（可选，主要用于测试）
+        """
+        settings = get_settings()
+
+        self.redis_url = redis_url or settings.redis_url
+        self.ttl_seconds = ttl_seconds or settings.state_ttl_seconds
+
+        if client is None:
+            if not self.redis_url:
+                raise StateStoreError("Redis URL is not configured")
+            client = redis.from_url(self.redis_url)
+        self.client = client
+
+        logger.info(f"RedisStateStore initialized: ttl={self.ttl_seconds}s")
+
+    def _key(self, execution_id: str) -> str:
+        """获取执行状态的Redis键"""
+        return f"{self.KEY_PREFIX}{execution_id}"
+
+    async def save(self, execution_id: str, state: Dict[str, Any]) -> None:
+        """保存执行状态并设置过期时间
+
+        Args:
+            execution_id: 执行ID
+            state: 执行状态，如 {"status": {...}, "logs": [...]}
+
+        Raises:
+            StateStoreError: 保存失败
+        """
+        try:
+            data = json_dumps(state)
+            await self.client.set(self._key(execution_id), data, ex=self.ttl_seconds)
+        except Exception as e:
+            raise StateStoreError(f"Failed to save state for {execution_id}: {str(e)}") from e
+
+    async def load(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """读取执行状态
+
+        Args:
+            execution_id: 执行ID
+
+        Returns:
+            执行状态，不存在或已过期时返回None
+
+        Raises:
+            StateStoreError: 读取失败
+        """
+        try:
+            data = await self.client.get(self._key(execution_id))
+            if data is None:
+                return None
+            # 损坏或非本服务写入的值同样按读取失败处理
+            return orjson.loads(data)
+        except Exception as e:
+            raise StateStoreError(f"Failed to load state for {execution_id}: {str(e)}") from e
+
+    async def close(self) -> None:
+        """关闭Redis连接"""
+        await self.client.aclose()
+        logger.info("RedisStateStore client closed")
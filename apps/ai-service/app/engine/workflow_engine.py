@@ -1,18 +1,46 @@
 """工作流执行引擎"""
 
 import asyncio
-from typing import Any, Dict, List, Optional, Callable, Set
-from collections import defaultdict
+import copy
+import hashlib
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Callable, Set, Tuple
+from collections import OrderedDict, defaultdict
 import logging
 
-from app.engine.context import ExecutionContext
+import orjson
+
+from app.core.config import get_settings
+from app.engine.context import ExecutionContext, current_context
 from app.engine.nodes.base import NodeExecutor, NodeExecutionError
+from app.engine.nodes.cache import content_key
 from app.schemas.workflow import WorkflowDefinition, FlowNode, FlowEdge
 from app.schemas.node import NodeResult
 
 logger = logging.getLogger(__name__)
 
 
+class ExecutionPlan(NamedTuple):
+    """已验证无环的执行图拓扑
+    
+    节点以整数下标表示，调度时用列表下标代替字符串键的字典查找。
+    """
+
+    # 下标对应的节点ID
+    node_ids: Tuple[str, ...]
+    # 下标对应节点的下游节点下标
+    children: Tuple[Tuple[int, ...], ...]
+    # 下标对应节点的初始入度
+    in_degree: Tuple[int, ...]
+    # 图为单条链时按执行顺序排列的节点下标，否则为None
+    chain: Optional[Tuple[int, ...]] = None
+
+
+# 执行计划缓存 {(节点ID序列, 边序列): plan}
+# 只依赖图的拓扑，同一工作流的多次执行（配置不同也可）共享同一计划
+_PLAN_CACHE: Dict[Tuple[Tuple[str, ...], Tuple[Tuple[str, str], ...]], ExecutionPlan] = {}
+_PLAN_CACHE_SIZE = 1024
+
+
 class WorkflowEngineError(Exception):
     """工作流引擎错误"""
 
@@ -38,14 +66,50 @@ class WorkflowEngine:
     - 支持错误处理和重试
     """
 
-    def __init__(self, executor_registry: Optional[Dict[str, type]] = None):
+    # 执行器实例缓存的最大条目数，超出时整体清空
+    EXECUTOR_CACHE_SIZE = 1024
+
+    def __init__(
+        self,
+        executor_registry: Optional[Dict[str, type]] = None,
+        max_parallel_nodes: Optional[int] = None,
+        result_cache_size: Optional[int] = None,
+        node_type_limits: Optional[Dict[str, int]] = None,
+    ):
         """初始化工作流引擎
         
         Args:
             executor_registry: 节点执行器注册表 {node_type: ExecutorClass}
+            max_parallel_nodes: 单次执行中同时运行的最大节点数，默认从配置读取
+            result_cache_size: 纯节点结果缓存的最大条目数，0表示不缓存，默认从配置读取
+            node_type_limits: 按节点类型限制所有执行中同时运行的节点数 {node_type: limit}，
+                默认限制LLM节点的并发数
         """
+        settings = get_settings()
+
         self.executor_registry = executor_registry or {}
+        self.max_parallel_nodes = max_parallel_nodes or settings.max_parallel_nodes
+        self.result_cache_size = (
+            settings.node_result_cache_size if result_cache_size is None else result_cache_size
+        )
         self.logger = logger
+        # 执行器实例缓存 {(node_type, node_id): executor}
+        # 执行器不保存执行状态，同一节点在多次执行间复用同一实例；
+        # 命中时一次查找同时完成类型分派和实例获取，注册执行器时清除该类型的实例
+        self._executor_cache: Dict[Tuple[str, str], NodeExecutor] = {}
+        # 已通过验证的节点配置摘要 {(node_type, node_id): content_key(config)}，
+        # 配置内容不变时再次执行跳过配置验证
+        self._validated_configs: Dict[Tuple[str, str], bytes] = {}
+        # 已注册节点类型的缓存，注册新执行器时失效
+        self._types_cache: Optional[FrozenSet[str]] = None
+        # 按节点类型的并发限制，在引擎的所有执行间共享，用于控制对Ollama等上游的压力
+        if node_type_limits is None:
+            node_type_limits = {"llm": settings.max_concurrent_llm_nodes}
+        self._type_semaphores: Dict[str, asyncio.Semaphore] = {
+            node_type: asyncio.Semaphore(limit) for node_type, limit in node_type_limits.items()
+        }
+        # 纯节点结果缓存 {内容摘要: 成功的执行结果}，按最近使用淘汰
+        self._result_cache: "OrderedDict[str, NodeResult]" = OrderedDict()
 
     def register_executor(self, node_type: str, executor_class: type) -> None:
         """注册节点执行器
@@ -60,6 +124,17 @@ class WorkflowEngine:
             )
         
         self.executor_registry[node_type] = executor_class
+        self._types_cache = None
+        self._executor_cache = {
+            key: executor
+            for key, executor in self._executor_cache.items()
+            if key[0] != node_type
+        }
+        self._validated_configs = {
+            key: config
+            for key, config in self._validated_configs.items()
+            if key[0] != node_type
+        }
         self.logger.info(f"Registered executor for node type: {node_type}")
 
     async def execute_workflow(
@@ -92,20 +167,18 @@ class WorkflowEngine:
             input_data=input_data,
             callback=callback,
         )
+        context_token = current_context.set(context)
 
         try:
             # 开始执行
             context.start()
 
-            # 构建执行图
-            execution_graph = self._build_execution_graph(definition)
-            
-            # 验证图的有效性
-            self._validate_graph(execution_graph)
+            # 获取执行计划（构建执行图并检测循环）
+            plan = self._compile_plan(definition)
 
             # 执行工作流
             output_data = await self._execute_graph(
-                execution_graph,
+                plan,
                 definition.nodes,
                 context,
             )
@@ -131,19 +204,102 @@ class WorkflowEngine:
                 "summary": context.get_execution_summary(),
             }
 
+        finally:
+            # 等待排队中的事件全部分发给回调
+            await context.close()
+            current_context.reset(context_token)
+
+    def _compile_plan(self, definition: WorkflowDefinition) -> ExecutionPlan:
+        """获取工作流定义对应的执行计划
+        
+        计划按节点ID和边构成的拓扑缓存，拓扑相同的工作流再次执行时
+        跳过构图和循环检测。构建失败（如存在循环）的拓扑不会缓存。
+        
+        Args:
+            definition: 工作流定义
+            
+        Returns:
+            ExecutionPlan: 执行计划
+            
+        Raises:
+            WorkflowEngineError: 图无效
+        """
+        key = (
+            tuple(node.id for node in definition.nodes),
+            tuple((edge.source, edge.target) for edge in definition.edges),
+        )
+        plan = _PLAN_CACHE.get(key)
+        if plan is not None:
+            return plan
+        
+        graph = self._build_execution_graph(definition)
+        in_degree = self._compute_in_degree(graph)
+        
+        node_ids = tuple(graph)
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        children = tuple(
+            tuple(index[target] for target in graph[node_id]) for node_id in node_ids
+        )
+        degrees = tuple(in_degree[node_id] for node_id in node_ids)
+        plan = ExecutionPlan(
+            node_ids=node_ids,
+            children=children,
+            in_degree=degrees,
+            chain=self._find_chain(children, degrees),
+        )
+        
+        if len(_PLAN_CACHE) >= _PLAN_CACHE_SIZE:
+            _PLAN_CACHE.clear()
+        _PLAN_CACHE[key] = plan
+        return plan
+
+    @staticmethod
+    def _find_chain(
+        children: Tuple[Tuple[int, ...], ...],
+        in_degree: Tuple[int, ...],
+    ) -> Optional[Tuple[int, ...]]:
+        """识别单条链拓扑
+        
+        只有一个起始节点，且每个节点至多一个上游和一个下游时，
+        图是一条链，可以不经调度器按顺序执行。
+        
+        Args:
+            children: 下标对应节点的下游节点下标
+            in_degree: 下标对应节点的初始入度
+            
+        Returns:
+            按执行顺序排列的节点下标，不是单条链时返回None
+        """
+        roots = [index for index, degree in enumerate(in_degree) if degree == 0]
+        if len(roots) != 1 or any(len(targets) > 1 for targets in children):
+            return None
+
+        chain = roots
+        while children[chain[-1]]:
+            chain.append(children[chain[-1]][0])
+
+        # 图已验证无环，链未覆盖所有节点说明存在其他分量
+        if len(chain) != len(in_degree):
+            return None
+        return tuple(chain)
+
     def _build_execution_graph(
         self,
         definition: WorkflowDefinition,
     ) -> Dict[str, List[str]]:
         """构建执行图
         
-        将工作流定义转换为邻接表表示的有向图。
+        将工作流定义转换为邻接表表示的有向图。重复的边只保留一条，
+        自环在构图时直接报错，无需等到DFS循环检测。
         
         Args:
             definition: 工作流定义
             
         Returns:
             执行图 {node_id: [dependent_node_ids]}
+            
+        Raises:
+            WorkflowEngineError: 存在自环
         """
         graph: Dict[str, List[str]] = defaultdict(list)
         
@@ -153,209 +309,264 @@ class WorkflowEngine:
                 graph[node.id] = []
         
         # 构建边
+        seen: Set[Tuple[str, str]] = set()
         for edge in definition.edges:
-            graph[edge.source].append(edge.target)
+            source, target = edge.source, edge.target
+            if source == target:
+                raise WorkflowEngineError(
+                    f"Workflow contains circular dependencies: {source} -> {target}"
+                )
+            if (source, target) in seen:
+                continue
+            seen.add((source, target))
+            graph[source].append(target)
         
         self.logger.info(
-            f"Built execution graph with {len(graph)} nodes and "
-            f"{len(definition.edges)} edges"
+            f"Built execution graph with {len(graph)} nodes and {len(seen)} edges"
         )
         
         return dict(graph)
 
-    def _validate_graph(self, graph: Dict[str, List[str]]) -> None:
-        """验证图的有效性
-        
-        检查:
-        - 是否存在循环依赖
-        - 是否存在孤立节点
-        
-        Args:
-            graph: 执行图
-            
-        Raises:
-            WorkflowEngineError: 图无效
-        """
-        # 检测循环依赖
-        if self._has_cycle(graph):
-            raise WorkflowEngineError("Workflow contains circular dependencies")
-        
-        self.logger.info("Graph validation passed")
-
-    def _has_cycle(self, graph: Dict[str, List[str]]) -> bool:
-        """检测图中是否存在循环
+    def _compute_in_degree(self, graph: Dict[str, List[str]]) -> Dict[str, int]:
+        """计算各节点入度并检测循环依赖
         
-        使用DFS算法检测循环。
+        存在循环依赖时在执行前报错，不会执行任何节点。
         
         Args:
             graph: 执行图
             
         Returns:
-            是否存在循环
+            各节点的初始入度 {node_id: in_degree}
+            
+        Raises:
+            WorkflowEngineError: 没有起始节点、边指向不存在的节点或存在循环依赖
         """
-        visited: Set[str] = set()
-        rec_stack: Set[str] = set()
-
-        def dfs(node: str) -> bool:
-            visited.add(node)
-            rec_stack.add(node)
-
-            for neighbor in graph.get(node, []):
-                if neighbor not in visited:
-                    if dfs(neighbor):
-                        return True
-                elif neighbor in rec_stack:
-                    return True
+        if not graph:
+            raise WorkflowEngineError("No start nodes found in workflow")
 
-            rec_stack.remove(node)
-            return False
+        # 计算每个节点的入度，图中包含所有节点，边的目标不存在时直接报错
+        in_degree: Dict[str, int] = {node_id: 0 for node_id in graph}
+        for targets in graph.values():
+            for target in targets:
+                try:
+                    in_degree[target] += 1
+                except KeyError:
+                    raise WorkflowEngineError(f"Node not found: {target}") from None
 
-        for node in graph:
-            if node not in visited:
-                if dfs(node):
-                    return True
+        self._check_cycles(graph)
 
-        return False
+        return in_degree
 
-    def _get_start_nodes(self, graph: Dict[str, List[str]]) -> List[str]:
-        """获取起始节点（没有入边的节点）
+    def _check_cycles(self, graph: Dict[str, List[str]]) -> None:
+        """检测循环依赖
+        
+        使用显式栈的迭代DFS三色标记：白色未访问，灰色在当前路径上，
+        黑色已完成。沿边遇到灰色节点说明存在环。不复制入度表，也没有递归开销。
         
         Args:
             graph: 执行图
             
-        Returns:
-            起始节点列表
+        Raises:
+            WorkflowEngineError: 存在循环依赖，错误信息包含环上的节点
         """
-        all_nodes = set(graph.keys())
-        nodes_with_incoming = set()
-        
-        for targets in graph.values():
-            nodes_with_incoming.update(targets)
-        
-        start_nodes = list(all_nodes - nodes_with_incoming)
-        
-        if not start_nodes:
-            # 如果没有起始节点，可能是所有节点都有入边，选择第一个节点
-            start_nodes = [list(graph.keys())[0]] if graph else []
-        
-        self.logger.info(f"Start nodes: {start_nodes}")
-        return start_nodes
+        white, gray, black = 0, 1, 2
+        color = dict.fromkeys(graph, white)
+
+        for root in graph:
+            if color[root] != white:
+                continue
+
+            color[root] = gray
+            path = [root]
+            stack = [iter(graph[root])]
+
+            while stack:
+                target = next(stack[-1], None)
+                if target is None:
+                    # 所有后继已完成
+                    color[path.pop()] = black
+                    stack.pop()
+                elif color[target] == white:
+                    color[target] = gray
+                    path.append(target)
+                    stack.append(iter(graph[target]))
+                elif color[target] == gray:
+                    cycle = path[path.index(target):] + [target]
+                    raise WorkflowEngineError(
+                        f"Workflow contains circular dependencies: {' -> '.join(cycle)}"
+                    )
 
-    def _get_node_by_id(
+    async def _execute_graph(
         self,
-        node_id: str,
+        plan: ExecutionPlan,
         nodes: List[FlowNode],
-    ) -> Optional[FlowNode]:
-        """根据ID获取节点
+        context: ExecutionContext,
+    ) -> Any:
+        """执行工作流图
+        
+        按依赖关系动态调度：节点的所有上游执行完成后立即启动，不等待同层
+        其他节点，互不依赖的节点并行执行，并发数受max_parallel_nodes限制。
+        节点在同一个TaskGroup中运行，任一节点失败时取消其余仍在运行的节点。
         
         Args:
-            node_id: 节点ID
+            plan: 已验证无环的执行计划
             nodes: 节点列表
+            context: 执行上下文
             
         Returns:
-            节点或None
+            输出数据
+            
+        Raises:
+            WorkflowEngineError: 节点不存在或节点执行失败
         """
-        for node in nodes:
-            if node.id == node_id:
-                return node
-        return None
+        if plan.chain is not None:
+            return await self._execute_chain(plan, nodes, context)
+
+        # 计划在多次执行间共享，入度在副本上递减
+        in_degree = list(plan.in_degree)
+        children = plan.children
+        node_ids = plan.node_ids
+
+        # 按下标排列的节点定义，只在此处按ID查找一次
+        node_map: Dict[str, FlowNode] = {node.id: node for node in nodes}
+        nodes_by_index = [node_map.get(node_id) for node_id in node_ids]
+
+        # 按完成顺序记录的节点下标
+        executed_nodes: List[int] = []
+        output_index: Optional[int] = None
+        semaphore = asyncio.Semaphore(self.max_parallel_nodes)
+
+        def start(index: int) -> None:
+            nonlocal output_index
+            node = nodes_by_index[index]
+            if not node:
+                raise WorkflowEngineError(f"Node not found: {node_ids[index]}")
+
+            # 检查是否是输出节点
+            if node.type == "output":
+                output_index = index
+
+            task_group.create_task(run(index, node))
+
+        async def run(index: int, node: FlowNode) -> None:
+            try:
+                result = await self._execute_node_limited(node, context, semaphore)
+            except Exception as e:
+                raise WorkflowEngineError(
+                    f"Node {node.id} execution failed: {str(e)}"
+                ) from e
+
+            # 检查节点是否执行成功
+            if result.status == "failed":
+                raise WorkflowEngineError(f"Node {node.id} failed: {result.error}")
+
+            executed_nodes.append(index)
+
+            # 下游节点的依赖全部完成后立即启动
+            for target in children[index]:
+                in_degree[target] -= 1
+                if in_degree[target] == 0:
+                    start(target)
+
+        # 任一节点失败时TaskGroup取消其余仍在运行的节点
+        try:
+            async with asyncio.TaskGroup() as task_group:
+                # 启动所有起始节点（入度为0的节点）
+                for index, degree in enumerate(in_degree):
+                    if degree == 0:
+                        start(index)
+        except* WorkflowEngineError as group:
+            raise group.exceptions[0]
+
+        # 返回输出节点的结果，如果没有输出节点则返回所有节点的输出
+        if output_index is not None:
+            return context.get_node_output(node_ids[output_index])
+        else:
+            return {
+                node_ids[index]: context.get_node_output(node_ids[index])
+                for index in executed_nodes
+            }
 
-    async def _execute_graph(
+    async def _execute_chain(
         self,
-        graph: Dict[str, List[str]],
+        plan: ExecutionPlan,
         nodes: List[FlowNode],
         context: ExecutionContext,
     ) -> Any:
-        """执行工作流图
+        """按顺序执行单条链拓扑的工作流
         
-        使用拓扑排序执行节点，支持并行执行。
+        链上的节点不可能并行，直接逐个执行，省去TaskGroup、入度表
+        和每次执行的并发信号量；节点类型的全局并发限制仍然生效。
         
         Args:
-            graph: 执行图
+            plan: 单条链的执行计划
             nodes: 节点列表
             context: 执行上下文
             
         Returns:
-            输出数据
+            输出数据，与_execute_graph一致
+            
+        Raises:
+            WorkflowEngineError: 节点不存在或节点执行失败
         """
-        # 计算每个节点的入度
-        in_degree: Dict[str, int] = {node_id: 0 for node_id in graph}
-        for targets in graph.values():
-            for target in targets:
-                in_degree[target] = in_degree.get(target, 0) + 1
-
-        # 获取起始节点（入度为0的节点）
-        ready_nodes = [node_id for node_id, degree in in_degree.items() if degree == 0]
+        node_ids = plan.node_ids
+        node_map: Dict[str, FlowNode] = {node.id: node for node in nodes}
+        output_id: Optional[str] = None
+
+        for index in plan.chain:
+            node = node_map.get(node_ids[index])
+            if not node:
+                raise WorkflowEngineError(f"Node not found: {node_ids[index]}")
+
+            if node.type == "output":
+                output_id = node.id
+
+            try:
+                type_semaphore = self._type_semaphores.get(node.type)
+                if type_semaphore is None:
+                    result = await self._execute_node(node, context)
+                else:
+                    async with type_semaphore:
+                        result = await self._execute_node(node, context)
+            except Exception as e:
+                raise WorkflowEngineError(
+                    f"Node {node.id} execution failed: {str(e)}"
+                ) from e
+
+            if result.status == "failed":
+                raise WorkflowEngineError(f"Node {node.id} failed: {result.error}")
+
+        # 返回输出节点的结果，如果没有输出节点则返回所有节点的输出
+        if output_id is not None:
+            return context.get_node_output(output_id)
+        return {
+            node_ids[index]: context.get_node_output(node_ids[index]) for index in plan.chain
+        }
+
+    async def _execute_node_limited(
+        self,
+        node: FlowNode,
+        context: ExecutionContext,
+        semaphore: asyncio.Semaphore,
+    ) -> NodeResult:
+        """在并发限制下执行单个节点
         
-        if not ready_nodes:
-            raise WorkflowEngineError("No start nodes found in workflow")
-
-        # 执行节点
-        executed_nodes: Set[str] = set()
-        output_node_id: Optional[str] = None
-
-        while ready_nodes:
-            # 并行执行所有就绪的节点
-            tasks = []
-            current_batch = ready_nodes.copy()
-            ready_nodes.clear()
-
-            for node_id in current_batch:
-                node = self._get_node_by_id(node_id, nodes)
-                if not node:
-                    raise WorkflowEngineError(f"Node not found: {node_id}")
-
-                # 检查是否是输出节点
-                if node.type == "output":
-                    output_node_id = node_id
-
-                # 创建执行任务
-                task = self._execute_node(node, context)
-                tasks.append((node_id, task))
-
-            # 等待当前批次的所有节点执行完成
-            results = await asyncio.gather(
-                *[task for _, task in tasks],
-                return_exceptions=True,
-            )
-
-            # 处理执行结果
-            for (node_id, _), result in zip(tasks, results):
-                if isinstance(result, Exception):
-                    raise WorkflowEngineError(
-                        f"Node {node_id} execution failed: {str(result)}"
-                    )
-
-                executed_nodes.add(node_id)
-
-                # 检查节点是否执行成功
-                if result.status == "failed":
-                    raise WorkflowEngineError(
-                        f"Node {node_id} failed: {result.error}"
-                    )
-
-                # 更新后续节点的入度
-                for target_id in graph.get(node_id, []):
-                    in_degree[target_id] -= 1
-                    if in_degree[target_id] == 0:
-                        ready_nodes.append(target_id)
-
-        # 检查是否所有节点都已执行
-        if len(executed_nodes) != len(graph):
-            unexecuted = set(graph.keys()) - executed_nodes
-            raise WorkflowEngineError(
-                f"Not all nodes were executed. Unexecuted nodes: {unexecuted}"
-            )
-
-        # 返回输出节点的结果，如果没有输出节点则返回最后一个节点的结果
-        if output_node_id:
-            return context.get_node_output(output_node_id)
-        else:
-            # 返回所有节点的输出
-            return {
-                node_id: context.get_node_output(node_id)
-                for node_id in executed_nodes
-            }
+        先占用本次执行的并发名额，再占用节点类型的全局名额。
+        
+        Args:
+            node: 节点定义
+            context: 执行上下文
+            semaphore: 限制并发节点数的信号量
+            
+        Returns:
+            节点执行结果
+        """
+        async with semaphore:
+            type_semaphore = self._type_semaphores.get(node.type)
+            if type_semaphore is None:
+                return await self._execute_node(node, context)
+            async with type_semaphore:
+                return await self._execute_node(node, context)
 
     async def _execute_node(
         self,
@@ -374,25 +585,93 @@ class WorkflowEngine:
         Raises:
             WorkflowEngineError: 节点执行错误
         """
-        # 获取节点执行器
-        executor_class = self.executor_registry.get(node.type)
-        if not executor_class:
-            raise WorkflowEngineError(
-                f"No executor registered for node type: {node.type}"
+        # 获取执行器实例，未缓存时查注册表创建
+        key = (node.type, node.id)
+        executor = self._executor_cache.get(key)
+        if executor is None:
+            executor_class = self.executor_registry.get(node.type)
+            if not executor_class:
+                raise WorkflowEngineError(
+                    f"No executor registered for node type: {node.type}"
+                )
+            
+            executor = executor_class(node_id=node.id, node_type=node.type)
+            if len(self._executor_cache) >= self.EXECUTOR_CACHE_SIZE:
+                self._executor_cache.clear()
+                self._validated_configs.clear()
+            self._executor_cache[key] = executor
+
+        node_config = node.data.config
+
+        # 纯节点在输入相同时直接复用之前的结果
+        cache_key = None
+        if self.result_cache_size > 0 and executor.is_cacheable(node_config):
+            cache_key = self._result_cache_key(node, executor, context)
+            cached = self._result_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                self._result_cache.move_to_end(cache_key)
+                return executor.restore(cached, context)
+
+        # 执行节点，同一配置内容只验证一次
+        config_key = content_key(node_config)
+        validated = config_key is not None and self._validated_configs.get(key) == config_key
+        result = await executor.run(node_config, context, validated=validated)
+        if not validated and config_key is not None and result.status == "success":
+            self._validated_configs[key] = config_key
+
+        if cache_key is not None and result.status == "success":
+            # 缓存输出的深拷贝，调用方和下游节点修改输出不会影响缓存
+            self._result_cache[cache_key] = result.model_copy(
+                update={"output": copy.deepcopy(result.output)}
             )
-
-        # 创建执行器实例
-        executor = executor_class(node_id=node.id, node_type=node.type)
-
-        # 执行节点
-        result = await executor.run(node.data.config, context)
+            while len(self._result_cache) > self.result_cache_size:
+                self._result_cache.popitem(last=False)
 
         return result
 
-    def get_registered_node_types(self) -> List[str]:
+    def _result_cache_key(
+        self,
+        node: FlowNode,
+        executor: NodeExecutor,
+        context: ExecutionContext,
+    ) -> Optional[str]:
+        """计算节点结果缓存的内容摘要
+        
+        摘要只覆盖节点自身和执行器声明的输入（解析后的配置及读取的上游输出），
+        与上下文大小和并行分支的完成顺序无关。
+        
+        Args:
+            node: 节点定义
+            executor: 节点执行器
+            context: 执行上下文
+            
+        Returns:
+            摘要字符串，配置无效或数据无法序列化时返回None（不缓存）
+        """
+        try:
+            payload = orjson.dumps(
+                {
+                    "id": node.id,
+                    "type": node.type,
+                    "inputs": executor.cache_inputs(node.data.config, context),
+                },
+                option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+            )
+        except Exception:
+            # 配置错误留给执行时的校验报告
+            return None
+        
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def get_registered_node_types(self) -> FrozenSet[str]:
         """获取已注册的节点类型
         
+        结果缓存到下次注册执行器为止，重复调用和成员判断不再分配新对象。
+        
         Returns:
-            节点类型列表
+            节点类型集合
         """
-        return list(self.executor_registry.keys())
+        types = self._types_cache
+        if types is None:
+            types = self._types_cache = frozenset(self.executor_registry)
+        return types
@@ -5,9 +5,11 @@ from typing import AsyncGenerator
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
 from app.core import get_logger, get_settings, setup_logging
+from app.core.cache import CacheMiddleware
+from app.services import ExecutionService, OllamaService
 
 # 设置日志
 setup_logging()
@@ -26,13 +28,18 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     )
 
     # 启动时的初始化逻辑
-    # TODO: 初始化数据库连接、Redis连接等
+    # Ollama客户端和执行服务在启动时创建一次，所有请求共用同一个连接池
+    app.state.ollama_service = OllamaService()
+    app.state.execution_service = ExecutionService(ollama_service=app.state.ollama_service)
+    # TODO: 初始化数据库连接等
 
     yield
 
     # 关闭时的清理逻辑
     logger.info("shutting_down_application")
-    # TODO: 关闭数据库连接、Redis连接等
+    # 执行服务清理时同时关闭Ollama客户端
+    await app.state.execution_service.cleanup()
+    # TODO: 关闭数据库连接等
 
 
 def create_app() -> FastAPI:
@@ -47,8 +54,12 @@ def create_app() -> FastAPI:
         redoc_url="/redoc",
         openapi_url="/openapi.json",
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
 
+    # 缓存被轮询的状态/日志端点（在CORS内层，避免缓存按Origin变化的响应头）
+    app.add_middleware(CacheMiddleware)
+
     # 配置CORS
     app.add_middleware(
         CORSMiddleware,
@@ -64,9 +75,9 @@ def create_app() -> FastAPI:
 
     # 健康检查端点
     @app.get("/health", tags=["Health"])
-    async def health_check() -> JSONResponse:
+    async def health_check() -> ORJSONResponse:
         """健康检查端点"""
-        return JSONResponse(
+        return ORJSONResponse(
             content={
                 "status": "healthy",
                 "app": settings.app_name,
@@ -76,9 +87,9 @@ def create_app() -> FastAPI:
 
     # 根路径
     @app.get("/", tags=["Root"])
-    async def root() -> JSONResponse:
+    async def root() -> ORJSONResponse:
         """根路径"""
-        return JSONResponse(
+        return ORJSONResponse(
             content={
                 "message": f"Welcome to {settings.app_name}",
                 "version": settings.app_version,
@@ -107,5 +118,7 @@ if __name__ == "__main__":
         host=settings.host,
         port=settings.port,
         reload=settings.debug,
+        loop=settings.server_loop,
+        http=settings.server_http,
         log_level=settings.log_level.lower(),
     )
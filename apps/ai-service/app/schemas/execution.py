@@ -4,13 +4,15 @@ from typing import Any, Dict, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
 
+from app.schemas.workflow import WorkflowDefinition
+
 
 class ExecutionCreate(BaseModel):
     """执行请求"""
 
     execution_id: str
     workflow_id: str
-    definition: Dict[str, Any]
+    definition: WorkflowDefinition
     input_data: Dict[str, Any] = Field(default_factory=dict)
 
 
@@ -46,3 +48,4 @@ class ExecutionLog(BaseModel):
     message: str
     metadata: Optional[Dict[str, Any]] = None
     timestamp: datetime = Field(default_factory=datetime.now)
+    count: int = 1  # 合并的连续重复日志条数
@@ -1,12 +1,15 @@
 """工作流相关的Pydantic schemas"""
 
+import sys
 from typing import Any, Dict, List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 class NodePosition(BaseModel):
     """节点位置"""
 
+    model_config = ConfigDict(frozen=True)
+
     x: float
     y: float
 
@@ -14,6 +17,8 @@ class NodePosition(BaseModel):
 class NodeData(BaseModel):
     """节点数据"""
 
+    model_config = ConfigDict(frozen=True)
+
     label: str
     config: Dict[str, Any] = Field(default_factory=dict)
 
@@ -21,15 +26,25 @@ class NodeData(BaseModel):
 class FlowNode(BaseModel):
     """流程节点"""
 
+    model_config = ConfigDict(frozen=True)
+
     id: str
     type: str  # input, llm, condition, transform, output, loop, merge
     position: NodePosition
     data: NodeData
 
+    @field_validator("id", "type", mode="after")
+    @classmethod
+    def _intern(cls, v: str) -> str:
+        """驻留节点ID和类型字符串，执行器查找和图构建时的字典比较更快"""
+        return sys.intern(v)
+
 
 class FlowEdge(BaseModel):
     """流程边"""
 
+    model_config = ConfigDict(frozen=True)
+
     id: str
     source: str
     target: str
@@ -37,9 +52,20 @@ class FlowEdge(BaseModel):
     targetHandle: Optional[str] = None
     label: Optional[str] = None
 
+    @field_validator("source", "target", mode="after")
+    @classmethod
+    def _intern(cls, v: str) -> str:
+        """驻留端点ID字符串，与节点ID共享同一对象"""
+        return sys.intern(v)
+
 
 class WorkflowDefinition(BaseModel):
-    """工作流定义"""
+    """工作流定义
+    
+    工作流图及其节点在执行期间只读，执行计划和执行器缓存依赖这一点。
+    """
+
+    model_config = ConfigDict(frozen=True)
 
     nodes: List[FlowNode]
     edges: List[FlowEdge]
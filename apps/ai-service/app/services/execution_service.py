@@ -1,11 +1,17 @@
 """执行服务"""
 
 import asyncio
-from typing import Any, Dict, Optional, Callable
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Dict, Optional, Callable, Set, Union
 from datetime import datetime
 import logging
 
+from app.core.config import get_settings
 from app.engine.workflow_engine import WorkflowEngine, WorkflowEngineError
+from app.engine.state_store import RedisStateStore, StateStoreError
 from app.engine.nodes import (
     LLMNodeExecutor,
     ConditionNodeExecutor,
@@ -15,7 +21,7 @@ from app.engine.nodes import (
 )
 from app.services.ollama_service import OllamaService
 from app.schemas.workflow import WorkflowDefinition
-from app.schemas.execution import ExecutionStatus, ExecutionLog
+from app.schemas.execution import ExecutionResponse, ExecutionStatus, ExecutionLog
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +32,28 @@ class ExecutionServiceError(Exception):
     pass
 
 
+@dataclass(slots=True)
+class ExecutionState:
+    """内存中的执行状态"""
+
+    execution_id: str
+    workflow_id: str
+    status: str
+    input_data: Dict[str, Any]
+    output_data: Any = None
+    error_message: Optional[str] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    current_node: Optional[str] = None
+    progress: float = 0.0
+    # 超出max_logs被丢弃的最早日志条数
+    dropped_logs: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为对外返回和持久化使用的字典"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
 class ExecutionService:
     """执行服务
     
@@ -36,20 +64,48 @@ class ExecutionService:
     - 处理执行控制（暂停、恢复、停止）
     """
 
-    def __init__(self, ollama_service: Optional[OllamaService] = None):
+    # 每个订阅者的事件队列容量
+    EVENT_QUEUE_SIZE = 1024
+
+    # 终止状态，进入这些状态后不会再产生事件
+    TERMINAL_STATUSES = frozenset({"completed", "failed", "stopped"})
+
+    def __init__(
+        self,
+        ollama_service: Optional[OllamaService] = None,
+        state_store: Optional[RedisStateStore] = None,
+    ):
         """初始化执行服务
         
         Args:
             ollama_service: Ollama服务实例
+            state_store: 执行状态存储，默认在配置了Redis时创建；
+                未配置时已完成的执行保留在内存中
         """
+        self.logger = logger
+        # 日志级别到日志方法的映射，记录日志时直接查表
+        self._log_dispatch: Dict[str, Callable[..., None]] = {
+            level: getattr(self.logger, level)
+            for level in ("debug", "info", "warning", "error", "critical")
+        }
+        settings = get_settings()
+        
         self.ollama_service = ollama_service or OllamaService()
         self.workflow_engine = self._create_workflow_engine()
         
+        if state_store is None and settings.redis_url:
+            state_store = RedisStateStore()
+        self.state_store = state_store
+        
         # 执行状态存储 {execution_id: status}
-        self.executions: Dict[str, Dict[str, Any]] = {}
+        self.executions: Dict[str, ExecutionState] = {}
         
-        # 执行日志存储 {execution_id: [logs]}
-        self.execution_logs: Dict[str, list] = {}
+        # 执行日志存储 {execution_id: deque[logs]}，每个执行最多保留max_logs条
+        # 日志只记录单调时钟读数，读取时再换算为时间戳
+        self._clock_wall = time.time()
+        self._clock_perf = time.perf_counter()
+        self.max_logs = settings.max_logs_per_execution
+        self.execution_logs: Dict[str, deque] = {}
         
         # 执行任务存储 {execution_id: Task}
         self.execution_tasks: Dict[str, asyncio.Task] = {}
@@ -57,7 +113,15 @@ class ExecutionService:
         # 执行控制标志 {execution_id: {"paused": bool, "stopped": bool}}
         self.execution_controls: Dict[str, Dict[str, bool]] = {}
         
-        self.logger = logger
+        # 限制同时运行的工作流数，超出的执行保持pending状态排队
+        self._execution_semaphore = asyncio.Semaphore(settings.max_concurrent_executions)
+        
+        # 执行事件订阅者 {execution_id: {Queue}}
+        self.subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        
+        # 只保存在内存中的已结束执行，按结束顺序排列，超出上限时淘汰最早的
+        self.max_retained_executions = settings.max_retained_executions
+        self._retained: "OrderedDict[str, None]" = OrderedDict()
 
     def _create_workflow_engine(self) -> WorkflowEngine:
         """创建工作流引擎并注册节点执行器
@@ -81,42 +145,42 @@ class ExecutionService:
         self,
         execution_id: str,
         workflow_id: str,
-        definition: Dict[str, Any],
+        definition: Union[WorkflowDefinition, Dict[str, Any]],
         input_data: Dict[str, Any],
-    ) -> Dict[str, Any]:
+    ) -> ExecutionResponse:
         """触发工作流执行（异步）
         
         Args:
             execution_id: 执行ID
             workflow_id: 工作流ID
-            definition: 工作流定义
+            definition: 工作流定义，API层已校验的模型直接使用，字典会先校验
             input_data: 输入数据
             
         Returns:
-            执行初始状态
+            ExecutionResponse: 执行初始状态
+            
+        Raises:
+            ExecutionServiceError: 工作流定义无效
         """
-        # 验证工作流定义
-        try:
-            workflow_def = WorkflowDefinition(**definition)
-        except Exception as e:
-            raise ExecutionServiceError(f"Invalid workflow definition: {str(e)}")
+        # 验证工作流定义，已校验的模型不再重复校验
+        if isinstance(definition, WorkflowDefinition):
+            workflow_def = definition
+        else:
+            try:
+                workflow_def = WorkflowDefinition(**definition)
+            except Exception as e:
+                raise ExecutionServiceError(f"Invalid workflow definition: {str(e)}")
 
         # 初始化执行状态
-        self.executions[execution_id] = {
-            "execution_id": execution_id,
-            "workflow_id": workflow_id,
-            "status": "pending",
-            "input_data": input_data,
-            "output_data": None,
-            "error_message": None,
-            "started_at": None,
-            "completed_at": None,
-            "current_node": None,
-            "progress": 0.0,
-        }
+        self.executions[execution_id] = ExecutionState(
+            execution_id=execution_id,
+            workflow_id=workflow_id,
+            status="pending",
+            input_data=input_data,
+        )
         
         # 初始化日志
-        self.execution_logs[execution_id] = []
+        self.execution_logs[execution_id] = deque(maxlen=self.max_logs)
         
         # 初始化控制标志
         self.execution_controls[execution_id] = {
@@ -133,7 +197,7 @@ class ExecutionService:
 
         # 创建异步执行任务
         task = asyncio.create_task(
-            self._execute_workflow_async(
+            self._execute_workflow_limited(
                 execution_id,
                 workflow_id,
                 workflow_def,
@@ -142,7 +206,44 @@ class ExecutionService:
         )
         self.execution_tasks[execution_id] = task
 
-        return self.executions[execution_id]
+        # 字段均来自已校验的请求，跳过重复校验直接构造
+        return ExecutionResponse.model_construct(
+            id=execution_id,
+            workflow_id=workflow_id,
+            status="pending",
+            input_data=input_data,
+            output_data=None,
+            error_message=None,
+            started_at=None,
+            completed_at=None,
+        )
+
+    async def _execute_workflow_limited(
+        self,
+        execution_id: str,
+        workflow_id: str,
+        definition: WorkflowDefinition,
+        input_data: Dict[str, Any],
+    ) -> None:
+        """在并发限制下异步执行工作流
+        
+        Args:
+            execution_id: 执行ID
+            workflow_id: 工作流ID
+            definition: 工作流定义
+            input_data: 输入数据
+        """
+        try:
+            async with self._execution_semaphore:
+                await self._execute_workflow_async(
+                    execution_id,
+                    workflow_id,
+                    definition,
+                    input_data,
+                )
+        finally:
+            # 排队期间被停止时_execute_workflow_async不会运行，在此清理任务
+            self.execution_tasks.pop(execution_id, None)
 
     async def _execute_workflow_async(
         self,
@@ -162,7 +263,7 @@ class ExecutionService:
         try:
             # 更新状态为running
             self._update_status(execution_id, "running")
-            self.executions[execution_id]["started_at"] = datetime.now().isoformat()
+            self.executions[execution_id].started_at = datetime.now()
             
             self._add_log(
                 execution_id,
@@ -171,15 +272,18 @@ class ExecutionService:
             )
 
             # 创建状态回调函数
-            def status_callback(node_id: str, status: str, data: Any = None):
-                """节点状态回调"""
-                self.executions[execution_id]["current_node"] = node_id
-                self._add_log(
-                    execution_id,
-                    "info",
-                    f"Node {node_id} status: {status}",
-                    metadata={"node_id": node_id, "data": data},
-                )
+            def status_callback(event: Dict[str, Any]) -> None:
+                """执行上下文事件回调，推送给订阅者
+                
+                执行状态事件只由服务在更新（终止状态为持久化）之后推送，
+                上下文的status事件不转发，避免订阅者收到重复事件。
+                """
+                event_type = event["type"]
+                if event_type == "status":
+                    return
+                if event_type == "node_status":
+                    self.executions[execution_id].current_node = event["node_id"]
+                self._publish(execution_id, event)
 
             # 执行工作流
             result = await self.workflow_engine.execute_workflow(
@@ -193,26 +297,26 @@ class ExecutionService:
             # 检查是否被停止
             if self.execution_controls[execution_id]["stopped"]:
                 self._update_status(execution_id, "stopped")
-                self.executions[execution_id]["completed_at"] = datetime.now().isoformat()
+                self.executions[execution_id].completed_at = datetime.now()
                 self._add_log(execution_id, "info", "Execution stopped by user")
                 return
 
             # 更新执行结果
             if result["status"] == "completed":
                 self._update_status(execution_id, "completed")
-                self.executions[execution_id]["output_data"] = result["output"]
-                self.executions[execution_id]["progress"] = 1.0
+                self.executions[execution_id].output_data = result["output"]
+                self.executions[execution_id].progress = 1.0
                 self._add_log(execution_id, "info", "Workflow execution completed successfully")
             else:
                 self._update_status(execution_id, "failed")
-                self.executions[execution_id]["error_message"] = result.get("error")
+                self.executions[execution_id].error_message = result.get("error")
                 self._add_log(
                     execution_id,
                     "error",
                     f"Workflow execution failed: {result.get('error')}",
                 )
 
-            self.executions[execution_id]["completed_at"] = datetime.now().isoformat()
+            self.executions[execution_id].completed_at = datetime.now()
 
         except Exception as e:
             # 处理执行错误
@@ -220,8 +324,8 @@ class ExecutionService:
             self.logger.exception(error_msg)
             
             self._update_status(execution_id, "failed")
-            self.executions[execution_id]["error_message"] = error_msg
-            self.executions[execution_id]["completed_at"] = datetime.now().isoformat()
+            self.executions[execution_id].error_message = error_msg
+            self.executions[execution_id].completed_at = datetime.now()
             
             self._add_log(execution_id, "error", error_msg)
 
@@ -230,16 +334,170 @@ class ExecutionService:
             if execution_id in self.execution_tasks:
                 del self.execution_tasks[execution_id]
 
+        # 被停止的执行由stop_execution在写入最终状态后持久化
+        if not self.execution_controls[execution_id]["stopped"]:
+            await self._persist_execution(execution_id)
+
+    async def _persist_execution(self, execution_id: str) -> None:
+        """将已结束的执行写入状态存储并释放内存
+        
+        未配置状态存储或写入失败时保留内存中的状态，查询仍然可用，
+        但内存中最多保留max_retained_executions个已结束的执行。
+        
+        Args:
+            execution_id: 执行ID
+        """
+        execution = self.executions.get(execution_id)
+        snapshot = execution.to_dict() if execution is not None else None
+
+        if self.state_store is None:
+            self._retain(execution_id)
+        else:
+            state = {
+                "status": snapshot,
+                "logs": [
+                    self._export_log(log) for log in self.execution_logs.get(execution_id, ())
+                ],
+            }
+
+            try:
+                await self.state_store.save(execution_id, state)
+            except StateStoreError as e:
+                self.logger.warning(f"Keeping execution {execution_id} in memory: {e}")
+                self._retain(execution_id)
+            else:
+                self.evict(execution_id)
+
+        # 最终状态在写入后才推送，订阅者收到后查询即可得到最终结果
+        if snapshot is not None:
+            self._publish_final_status(execution_id, snapshot)
+
+    def _publish_final_status(self, execution_id: str, snapshot: Dict[str, Any]) -> None:
+        """推送执行的终止状态事件
+        
+        Args:
+            execution_id: 执行ID
+            snapshot: 执行状态字典
+        """
+        event: Dict[str, Any] = {
+            "type": "status",
+            "execution_id": execution_id,
+            "status": snapshot["status"],
+        }
+        if snapshot["status"] == "completed":
+            event["output"] = snapshot["output_data"]
+        elif snapshot["status"] == "failed":
+            event["error"] = snapshot["error_message"]
+        self._publish(execution_id, event)
+
+    def _retain(self, execution_id: str) -> None:
+        """将已结束的执行保留在内存中，超出上限时淘汰最早结束的执行
+        
+        Args:
+            execution_id: 执行ID
+        """
+        self._retained[execution_id] = None
+        self._retained.move_to_end(execution_id)
+        while len(self._retained) > self.max_retained_executions:
+            oldest, _ = self._retained.popitem(last=False)
+            self.evict(oldest)
+            self.logger.debug(f"Evicted execution {oldest} from memory")
+
+    def evict(self, execution_id: str) -> None:
+        """释放执行在内存中的状态、日志和控制标志
+        
+        已持久化的执行仍可从状态存储查询。
+        
+        Args:
+            execution_id: 执行ID
+        """
+        self.executions.pop(execution_id, None)
+        self.execution_logs.pop(execution_id, None)
+        self.execution_controls.pop(execution_id, None)
+        self._retained.pop(execution_id, None)
+
+    async def _load_persisted(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """从状态存储读取已结束的执行
+        
+        Args:
+            execution_id: 执行ID
+            
+        Returns:
+            持久化的执行状态，不存在时返回None
+        """
+        if self.state_store is None:
+            return None
+
+        try:
+            return await self.state_store.load(execution_id)
+        except StateStoreError as e:
+            self.logger.warning(str(e))
+            return None
+
     def _update_status(self, execution_id: str, status: str) -> None:
         """更新执行状态
         
+        非终止状态立即推送给订阅者；终止状态由_persist_execution在写入后推送。
+        
         Args:
             execution_id: 执行ID
             status: 新状态
         """
         if execution_id in self.executions:
-            self.executions[execution_id]["status"] = status
+            self.executions[execution_id].status = status
             self.logger.info(f"Execution {execution_id} status updated to {status}")
+            if status in self.TERMINAL_STATUSES:
+                return
+            self._publish(execution_id, {
+                "type": "status",
+                "execution_id": execution_id,
+                "status": status,
+            })
+
+    def subscribe(self, execution_id: str) -> asyncio.Queue:
+        """订阅执行事件
+        
+        Args:
+            execution_id: 执行ID
+            
+        Returns:
+            事件队列，执行上下文产生的事件会推送到该队列
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.EVENT_QUEUE_SIZE)
+        self.subscribers.setdefault(execution_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, execution_id: str, queue: asyncio.Queue) -> None:
+        """取消订阅执行事件
+        
+        Args:
+            execution_id: 执行ID
+            queue: subscribe返回的事件队列
+        """
+        queues = self.subscribers.get(execution_id)
+        if queues is None:
+            return
+        
+        queues.discard(queue)
+        if not queues:
+            del self.subscribers[execution_id]
+
+    def _publish(self, execution_id: str, event: Dict[str, Any]) -> None:
+        """向所有订阅者推送事件
+        
+        订阅者消费过慢导致队列已满时丢弃该事件，避免阻塞工作流执行。
+        
+        Args:
+            execution_id: 执行ID
+            event: 事件数据
+        """
+        for queue in self.subscribers.get(execution_id, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.logger.warning(
+                    f"Event queue full for execution {execution_id}, dropping event"
+                )
 
     def _add_log(
         self,
@@ -258,8 +516,14 @@ class ExecutionService:
             node_id: 节点ID
             metadata: 元数据
         """
-        if execution_id not in self.execution_logs:
-            self.execution_logs[execution_id] = []
+        logs = self.execution_logs.get(execution_id)
+        if logs is None:
+            logs = self.execution_logs[execution_id] = deque(maxlen=self.max_logs)
+        elif len(logs) == logs.maxlen:
+            # 最早的日志将被丢弃，只记录条数
+            execution = self.executions.get(execution_id)
+            if execution is not None:
+                execution.dropped_logs += 1
 
         log_entry = {
             "execution_id": execution_id,
@@ -267,27 +531,52 @@ class ExecutionService:
             "level": level,
             "message": message,
             "metadata": metadata,
-            "timestamp": datetime.now().isoformat(),
+            "perf_time": time.perf_counter(),
         }
         
-        self.execution_logs[execution_id].append(log_entry)
+        logs.append(log_entry)
+
+        # 有订阅者时增量推送，订阅者无需轮询get_execution_logs
+        if execution_id in self.subscribers:
+            self._publish(execution_id, {"type": "log", **self._export_log(log_entry)})
         
         # 同时记录到日志系统
-        log_method = getattr(self.logger, level, self.logger.info)
+        log_method = self._log_dispatch.get(level, self.logger.info)
         log_method(f"[{execution_id}] {message}", extra={"metadata": metadata})
 
-    def get_execution_status(self, execution_id: str) -> Optional[Dict[str, Any]]:
+    def _export_log(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """将内存中的日志转换为对外格式，单调时钟读数换算为时间戳
+        
+        Args:
+            entry: 内存中的日志
+            
+        Returns:
+            带timestamp字段的日志副本
+        """
+        log = dict(entry)
+        elapsed = log.pop("perf_time") - self._clock_perf
+        log["timestamp"] = datetime.fromtimestamp(self._clock_wall + elapsed)
+        return log
+
+    async def get_execution_status(self, execution_id: str) -> Optional[Dict[str, Any]]:
         """获取执行状态
         
+        运行中的执行从内存读取，已结束的执行从状态存储读取。
+        
         Args:
             execution_id: 执行ID
             
         Returns:
             执行状态或None
         """
-        return self.executions.get(execution_id)
+        execution = self.executions.get(execution_id)
+        if execution is not None:
+            return execution.to_dict()
+
+        state = await self._load_persisted(execution_id)
+        return state["status"] if state else None
 
-    def get_execution_logs(
+    async def get_execution_logs(
         self,
         execution_id: str,
         level: Optional[str] = None,
@@ -303,17 +592,34 @@ class ExecutionService:
         Returns:
             日志列表
         """
-        logs = self.execution_logs.get(execution_id, [])
+        logs = self.execution_logs.get(execution_id)
+        # 内存中的日志需要换算时间戳，持久化的日志已是对外格式
+        export = self._export_log
+        if logs is None:
+            state = await self._load_persisted(execution_id)
+            logs = state["logs"] if state else None
+            export = None
         
-        # 按级别过滤
-        if level:
-            logs = [log for log in logs if log["level"] == level]
+        if not logs:
+            return []
         
-        # 限制数量
-        if limit:
-            logs = logs[-limit:]
+        if not limit:
+            if level:
+                selected = [log for log in logs if log["level"] == level]
+            else:
+                selected = list(logs)
+        else:
+            # 限制数量时从最新的日志反向取，只遍历需要的部分
+            entries = reversed(logs)
+            if level:
+                entries = (log for log in entries if log["level"] == level)
+            
+            selected = list(islice(entries, limit))
+            selected.reverse()
         
-        return logs
+        if export is None:
+            return selected
+        return [export(log) for log in selected]
 
     async def stop_execution(self, execution_id: str) -> bool:
         """停止执行
@@ -343,6 +649,7 @@ class ExecutionService:
 
         self._update_status(execution_id, "stopped")
         self._add_log(execution_id, "info", "Execution stopped")
+        await self._persist_execution(execution_id)
         
         return True
 
@@ -358,7 +665,7 @@ class ExecutionService:
         if execution_id not in self.executions:
             return False
 
-        if self.executions[execution_id]["status"] != "running":
+        if self.executions[execution_id].status != "running":
             return False
 
         # 设置暂停标志
@@ -382,7 +689,7 @@ class ExecutionService:
         if execution_id not in self.executions:
             return False
 
-        if self.executions[execution_id]["status"] != "paused":
+        if self.executions[execution_id].status != "paused":
             return False
 
         # 清除暂停标志
@@ -404,5 +711,9 @@ class ExecutionService:
         # 关闭Ollama服务
         await self.ollama_service.close()
         
+        # 关闭状态存储
+        if self.state_store is not None:
+            await self.state_store.close()
+        
         self.logger.info("Execution service cleaned up")
 
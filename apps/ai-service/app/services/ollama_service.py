@@ -1,13 +1,17 @@
 """Ollama服务客户端"""
 
-import json
+import asyncio
 import logging
+import socket
+import time
+from collections import OrderedDict
 from typing import Any, AsyncIterator, Optional
 
 import httpx
+import orjson
 from tenacity import (
-    retry,
-    retry_if_exception_type,
+    AsyncRetrying,
+    retry_if_exception,
     stop_after_attempt,
     wait_exponential,
 )
@@ -16,6 +20,49 @@ from app.core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# 请求体由orjson预先序列化，需要显式声明内容类型
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# 关闭Nagle算法：流式生成逐token返回小块NDJSON，
+# Nagle与延迟ACK叠加会让每个数据块多等待数十毫秒
+_SOCKET_OPTIONS = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)]
+
+# 网关错误说明请求未到达Ollama，可以安全重试
+_RETRYABLE_STATUS_CODES = frozenset({502, 503, 504})
+
+
+def _should_retry(exc: BaseException) -> bool:
+    """判断错误是否可以重试
+
+    只重试请求尚未被Ollama处理的错误：连接失败、连接超时、连接池等待超时和网关错误。
+    读取超时说明生成已经开始，重试会让模型重复生成（拉取模型也可能正常耗时数分钟），不重试。
+
+    Args:
+        exc: 请求抛出的异常
+
+    Returns:
+        bool: 是否重试
+    """
+    if isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in _RETRYABLE_STATUS_CODES
+    return False
+
+
+# 共享的重试策略，重试状态保存在策略对象上，每次调用使用copy()得到独立副本
+_RETRY = AsyncRetrying(
+    retry=retry_if_exception(_should_retry),
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=1, max=10),
+    reraise=True,
+)
+# 拉取模型只重试2次
+_PULL_RETRY = _RETRY.copy(
+    stop=stop_after_attempt(2),
+    wait=wait_exponential(multiplier=1, min=2, max=20),
+)
+
 
 class OllamaServiceError(Exception):
     """Ollama服务错误基类"""
@@ -35,6 +82,34 @@ class OllamaModelNotFoundError(OllamaServiceError):
     pass
 
 
+async def _iter_ndjson_lines(response: httpx.Response) -> AsyncIterator[bytes]:
+    """按行切分NDJSON响应流
+
+    直接在原始字节上查找换行符，不做解码，每行交给orjson按字节解析。
+
+    Args:
+        response: 流式HTTP响应
+
+    Yields:
+        bytes: 去除首尾空白后的非空行
+    """
+    buffer = bytearray()
+    async for chunk in response.aiter_bytes():
+        buffer.extend(chunk)
+        start = 0
+        while (newline := buffer.find(b"\n", start)) != -1:
+            line = bytes(buffer[start:newline]).strip()
+            start = newline + 1
+            if line:
+                yield line
+        del buffer[:start]
+
+    # 最后一行可能没有换行符
+    line = bytes(buffer).strip()
+    if line:
+        yield line
+
+
 class OllamaService:
     """Ollama服务客户端
 
@@ -51,6 +126,8 @@ class OllamaService:
         base_url: Optional[str] = None,
         timeout: Optional[float] = None,
         max_connections: Optional[int] = None,
+        models_cache_ttl: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
     ):
         """初始化Ollama服务客户端
 
@@ -58,14 +135,54 @@ class OllamaService:
             base_url: Ollama服务地址，默认从配置读取
             timeout: 请求超时时间（秒），默认从配置读取
             max_connections: 最大连接数，默认从配置读取
+            models_cache_ttl: 模型列表缓存时间（秒），0表示不缓存，默认从配置读取
+            transport: 自定义HTTP transport（可选，主要用于测试）
         """
         settings = get_settings()
 
         self.base_url = base_url or settings.ollama_base_url
         self.timeout = timeout or settings.ollama_timeout
         self.max_connections = max_connections or settings.ollama_max_connections
+        self.http2 = settings.ollama_http2
+        # 预先拼接各API端点地址
+        self._url_root = f"{self.base_url}/"
+        self._url_generate = f"{self.base_url}/api/generate"
+        self._url_tags = f"{self.base_url}/api/tags"
+        self._url_show = f"{self.base_url}/api/show"
+        self._url_pull = f"{self.base_url}/api/pull"
+
+        self.models_cache_ttl = (
+            settings.ollama_models_cache_ttl if models_cache_ttl is None else models_cache_ttl
+        )
+
+        # 模型列表缓存 (获取时间, 模型列表)，锁用于合并并发的刷新请求
+        self._models_cache: Optional[tuple[float, list[dict[str, Any]]]] = None
+        self._models_lock = asyncio.Lock()
+
+        # 模型详细信息缓存 {模型名称: 信息}，每个模型一把锁合并并发查询
+        self._show_cache: dict[str, dict[str, Any]] = {}
+        self._show_locks: dict[str, asyncio.Lock] = {}
+
+        # 确定性生成的响应缓存 {(模型, 提示词, 参数): (过期时间, 响应)}，按LRU淘汰
+        self.response_cache_size = settings.ollama_response_cache_size
+        self.response_cache_ttl = settings.ollama_response_cache_ttl
+        self._response_cache: OrderedDict[tuple[str, str, bytes], tuple[float, str]] = (
+            OrderedDict()
+        )
 
-        # 配置连接池和超时
+        # 配置连接池，传入自定义transport时连接池参数需设置在transport上
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(
+                    max_keepalive_connections=self.max_connections,
+                    max_connections=self.max_connections * 2,
+                    keepalive_expiry=settings.ollama_keepalive_expiry,  # 长时间生成之间保持连接
+                ),
+                http2=self.http2,  # 启用后多个并发流复用同一连接
+                socket_options=_SOCKET_OPTIONS,
+            )
+
+        # 配置超时
         self.client = httpx.AsyncClient(
             timeout=httpx.Timeout(
                 timeout=self.timeout,
@@ -73,25 +190,37 @@ class OllamaService:
                 read=self.timeout,  # 读取超时使用配置值
                 write=30.0,  # 写入超时30秒
             ),
-            limits=httpx.Limits(
-                max_keepalive_connections=self.max_connections,
-                max_connections=self.max_connections * 2,
-                keepalive_expiry=30.0,  # 保持连接30秒
-            ),
+            transport=transport,
             follow_redirects=True,
         )
+        self._http_version_logged = False
 
         logger.info(
             f"OllamaService initialized: base_url={self.base_url}, "
-            f"timeout={self.timeout}s, max_connections={self.max_connections}"
+            f"timeout={self.timeout}s, max_connections={self.max_connections}, "
+            f"http2={self.http2}"
         )
 
-    @retry(
-        retry=retry_if_exception_type((httpx.ConnectError, httpx.TimeoutException)),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
-        reraise=True,
-    )
+    @classmethod
+    def configure_loop(cls) -> bool:
+        """使用uvloop作为事件循环实现
+
+        流式生成每个token都要经过一次事件循环调度，uvloop的调度开销更低。
+        必须在事件循环启动前（asyncio.run之前）调用；
+        通过uvicorn启动的服务由SERVER_LOOP配置，无需调用。
+
+        Returns:
+            bool: uvloop是否可用并已启用
+        """
+        try:
+            import uvloop
+        except ImportError:
+            logger.info("uvloop not installed, using default asyncio event loop")
+            return False
+
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        return True
+
     async def generate(
         self,
         model: str,
@@ -107,6 +236,9 @@ class OllamaService:
             stream: 是否使用流式响应
             **kwargs: 其他参数（temperature, top_p, top_k 等）
 
+        temperature为0或指定seed的非流式调用结果是确定的，会被缓存；
+        其他调用每次都请求Ollama。
+
         Returns:
             str: 非流式响应时返回完整文本
             AsyncIterator[str]: 流式响应时返回异步迭代器
@@ -116,7 +248,7 @@ class OllamaService:
             OllamaModelNotFoundError: 模型未找到
             OllamaServiceError: 其他服务错误
         """
-        url = f"{self.base_url}/api/generate"
+        url = self._url_generate
         payload = {
             "model": model,
             "prompt": prompt,
@@ -128,10 +260,25 @@ class OllamaService:
             if stream:
                 return self._stream_generate(url, payload)
             else:
-                response = await self.client.post(url, json=payload)
-                response.raise_for_status()
-                data = response.json()
-                return data.get("response", "")
+                cache_key = self._response_cache_key(model, prompt, kwargs)
+                if cache_key is not None:
+                    cached = self._get_cached_response(cache_key)
+                    if cached is not None:
+                        return cached
+
+                content = orjson.dumps(payload)
+                async for attempt in _RETRY.copy():
+                    with attempt:
+                        response = await self.client.post(
+                            url, content=content, headers=_JSON_HEADERS
+                        )
+                        response.raise_for_status()
+                data = orjson.loads(response.content)
+                text = data.get("response", "")
+
+                if cache_key is not None:
+                    self._store_response(cache_key, text)
+                return text
 
         except httpx.ConnectError as e:
             logger.error(f"Failed to connect to Ollama service: {e}")
@@ -151,6 +298,117 @@ class OllamaService:
             logger.error(f"Unexpected error calling Ollama: {e}")
             raise OllamaServiceError(f"Unexpected error: {str(e)}") from e
 
+    def _response_cache_key(
+        self, model: str, prompt: str, params: dict[str, Any]
+    ) -> Optional[tuple[str, str, bytes]]:
+        """获取确定性生成的缓存键，结果不确定或未启用缓存时返回None
+
+        Args:
+            model: 模型名称
+            prompt: 提示词
+            params: 生成参数
+
+        Returns:
+            缓存键 (模型, 提示词, 排序后的参数JSON)
+        """
+        if self.response_cache_size <= 0 or self.response_cache_ttl <= 0:
+            return None
+
+        # 参数既可能直接传入，也可能放在Ollama的options中
+        options = params.get("options") or {}
+        temperature = params.get("temperature", options.get("temperature"))
+        seeded = "seed" in params or "seed" in options
+        if temperature != 0 and not seeded:
+            return None
+
+        try:
+            encoded = orjson.dumps(params, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            return None
+        return (model, prompt, encoded)
+
+    def _get_cached_response(self, key: tuple[str, str, bytes]) -> Optional[str]:
+        """获取未过期的缓存响应，没有时返回None"""
+        entry = self._response_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, text = entry
+        if expires_at <= time.monotonic():
+            del self._response_cache[key]
+            return None
+        self._response_cache.move_to_end(key)
+        return text
+
+    def _store_response(self, key: tuple[str, str, bytes], text: str) -> None:
+        """写入响应缓存并淘汰超出容量的条目"""
+        self._response_cache[key] = (time.monotonic() + self.response_cache_ttl, text)
+        self._response_cache.move_to_end(key)
+        while len(self._response_cache) > self.response_cache_size:
+            self._response_cache.popitem(last=False)
+
+    async def generate_many(
+        self,
+        model: str,
+        prompts: list[str],
+        concurrency: int = 4,
+        **kwargs: Any,
+    ) -> list[str]:
+        """并发调用生成接口处理多个提示词
+
+        Args:
+            model: 模型名称
+            prompts: 提示词列表
+            concurrency: 最大并发请求数
+            **kwargs: 其他参数，同generate
+
+        Returns:
+            list[str]: 与prompts顺序一致的生成结果
+
+        Raises:
+            OllamaConnectionError: 连接失败
+            OllamaModelNotFoundError: 模型未找到
+            OllamaServiceError: 其他服务错误
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def generate_one(prompt: str) -> str:
+            async with semaphore:
+                return await self.generate(model=model, prompt=prompt, stream=False, **kwargs)
+
+        return list(await asyncio.gather(*(generate_one(prompt) for prompt in prompts)))
+
+    async def generate_bytes(
+        self,
+        model: str,
+        prompt: str,
+        **kwargs: Any,
+    ) -> AsyncIterator[bytes]:
+        """流式生成UTF-8编码的文本片段
+
+        每个片段只编码一次，可直接交给StreamingResponse等按字节发送的消费方；
+        在Python中处理文本时使用generate(stream=True)。
+
+        Args:
+            model: 模型名称
+            prompt: 提示词
+            **kwargs: 其他参数，同generate
+
+        Yields:
+            bytes: UTF-8编码的文本片段
+
+        Raises:
+            OllamaModelNotFoundError: 模型未找到
+            OllamaServiceError: 其他服务错误
+        """
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": True,
+            **kwargs,
+        }
+        async for text in self._stream_generate(self._url_generate, payload):
+            yield text.encode()
+
     async def _stream_generate(
         self, url: str, payload: dict[str, Any]
     ) -> AsyncIterator[str]:
@@ -164,21 +422,25 @@ class OllamaService:
             str: 生成的文本片段
         """
         try:
-            async with self.client.stream("POST", url, json=payload) as response:
+            response = await self._open_stream(_RETRY, url, payload)
+            try:
                 response.raise_for_status()
 
-                async for line in response.aiter_lines():
-                    if line.strip():
-                        try:
-                            data = json.loads(line)
-                            if "response" in data:
-                                yield data["response"]
-                            # 检查是否完成
-                            if data.get("done", False):
-                                break
-                        except json.JSONDecodeError:
-                            logger.warning(f"Failed to parse JSON line: {line}")
-                            continue
+                async for line in _iter_ndjson_lines(response):
+                    try:
+                        data = orjson.loads(line)
+                        # 每个token一次查找，跳过空片段（如最后的done消息）
+                        text = data.get("response")
+                        if text:
+                            yield text
+                        # 检查是否完成
+                        if data.get("done", False):
+                            break
+                    except orjson.JSONDecodeError:
+                        logger.warning(f"Failed to parse JSON line: {line}")
+                        continue
+            finally:
+                await response.aclose()
 
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 404:
@@ -190,15 +452,11 @@ class OllamaService:
             logger.error(f"Error in stream generation: {e}")
             raise OllamaServiceError(f"Stream error: {str(e)}") from e
 
-    @retry(
-        retry=retry_if_exception_type((httpx.ConnectError, httpx.TimeoutException)),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
-        reraise=True,
-    )
     async def list_models(self) -> list[dict[str, Any]]:
         """获取可用模型列表
 
+        缓存有效期内直接返回缓存结果，并发的刷新请求只访问一次Ollama。
+
         Returns:
             list[dict]: 模型信息列表，每个模型包含 name, size, modified_at 等字段
 
@@ -206,12 +464,52 @@ class OllamaService:
             OllamaConnectionError: 连接失败
             OllamaServiceError: 其他服务错误
         """
-        url = f"{self.base_url}/api/tags"
+        cached = self._get_cached_models()
+        if cached is not None:
+            return cached
+
+        async with self._models_lock:
+            # 等待锁期间其他请求可能已刷新缓存
+            cached = self._get_cached_models()
+            if cached is not None:
+                return cached
+
+            models = await self._fetch_models()
+            if self.models_cache_ttl > 0:
+                self._models_cache = (time.monotonic(), models)
+            return list(models)
+
+    def _get_cached_models(self) -> Optional[list[dict[str, Any]]]:
+        """获取未过期的缓存模型列表，没有时返回None"""
+        if self._models_cache is None:
+            return None
+        fetched_at, models = self._models_cache
+        if time.monotonic() - fetched_at >= self.models_cache_ttl:
+            return None
+        return list(models)
+
+    def invalidate_models_cache(self) -> None:
+        """清除模型列表缓存，下次调用list_models时重新获取"""
+        self._models_cache = None
+
+    async def _fetch_models(self) -> list[dict[str, Any]]:
+        """从Ollama获取模型列表
+
+        Returns:
+            list[dict]: 模型信息列表
+
+        Raises:
+            OllamaConnectionError: 连接失败
+            OllamaServiceError: 其他服务错误
+        """
+        url = self._url_tags
 
         try:
-            response = await self.client.get(url)
-            response.raise_for_status()
-            data = response.json()
+            async for attempt in _RETRY.copy():
+                with attempt:
+                    response = await self.client.get(url)
+                    response.raise_for_status()
+            data = orjson.loads(response.content)
             models = data.get("models", [])
 
             logger.info(f"Retrieved {len(models)} models from Ollama")
@@ -229,15 +527,12 @@ class OllamaService:
             logger.error(f"Error listing models: {e}")
             raise OllamaServiceError(f"Failed to list models: {str(e)}") from e
 
-    @retry(
-        retry=retry_if_exception_type((httpx.ConnectError, httpx.TimeoutException)),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
-        reraise=True,
-    )
     async def show_model(self, model: str) -> dict[str, Any]:
         """获取模型详细信息
 
+        模型信息在拉取新版本前不会变化，按模型名称缓存；
+        同一模型的并发查询只访问一次Ollama。
+
         Args:
             model: 模型名称
 
@@ -249,13 +544,51 @@ class OllamaService:
             OllamaConnectionError: 连接失败
             OllamaServiceError: 其他服务错误
         """
-        url = f"{self.base_url}/api/show"
+        cached = self._show_cache.get(model)
+        if cached is not None:
+            return cached
+
+        lock = self._show_locks.setdefault(model, asyncio.Lock())
+        async with lock:
+            # 等待锁期间其他请求可能已获取
+            cached = self._show_cache.get(model)
+            if cached is not None:
+                return cached
+
+            try:
+                data = await self._fetch_model_info(model)
+            finally:
+                self._show_locks.pop(model, None)
+
+            self._show_cache[model] = data
+            return data
+
+    async def _fetch_model_info(self, model: str) -> dict[str, Any]:
+        """从Ollama获取模型详细信息
+
+        Args:
+            model: 模型名称
+
+        Returns:
+            dict: 模型详细信息
+
+        Raises:
+            OllamaModelNotFoundError: 模型未找到
+            OllamaConnectionError: 连接失败
+            OllamaServiceError: 其他服务错误
+        """
+        url = self._url_show
         payload = {"name": model}
 
         try:
-            response = await self.client.post(url, json=payload)
-            response.raise_for_status()
-            data = response.json()
+            content = orjson.dumps(payload)
+            async for attempt in _RETRY.copy():
+                with attempt:
+                    response = await self.client.post(
+                        url, content=content, headers=_JSON_HEADERS
+                    )
+                    response.raise_for_status()
+            data = orjson.loads(response.content)
 
             logger.info(f"Retrieved info for model: {model}")
             return data
@@ -274,12 +607,6 @@ class OllamaService:
             logger.error(f"Error showing model info: {e}")
             raise OllamaServiceError(f"Failed to get model info: {str(e)}") from e
 
-    @retry(
-        retry=retry_if_exception_type((httpx.ConnectError, httpx.TimeoutException)),
-        stop=stop_after_attempt(2),  # 拉取模型只重试2次
-        wait=wait_exponential(multiplier=1, min=2, max=20),
-        reraise=True,
-    )
     async def pull_model(self, model: str) -> AsyncIterator[dict[str, Any]]:
         """拉取新模型
 
@@ -293,29 +620,35 @@ class OllamaService:
             OllamaConnectionError: 连接失败
             OllamaServiceError: 其他服务错误
         """
-        url = f"{self.base_url}/api/pull"
+        url = self._url_pull
         payload = {"name": model, "stream": True}
 
         try:
             logger.info(f"Starting to pull model: {model}")
 
-            async with self.client.stream("POST", url, json=payload, timeout=None) as response:
+            response = await self._open_stream(_PULL_RETRY, url, payload, timeout=None)
+            try:
                 response.raise_for_status()
 
-                async for line in response.aiter_lines():
-                    if line.strip():
-                        try:
-                            data = json.loads(line)
-                            yield data
-
-                            # 记录完成状态
-                            if data.get("status") == "success":
-                                logger.info(f"Successfully pulled model: {model}")
-                                break
-
-                        except json.JSONDecodeError:
-                            logger.warning(f"Failed to parse JSON line: {line}")
-                            continue
+                async for line in _iter_ndjson_lines(response):
+                    try:
+                        data = orjson.loads(line)
+                        yield data
+
+                        # 记录完成状态
+                        if data.get("status") == "success":
+                            logger.info(f"Successfully pulled model: {model}")
+                            self.invalidate_models_cache()
+                            self._show_cache.pop(model, None)
+                            # 模型更新后旧的生成结果不再有效
+                            self._response_cache.clear()
+                            break
+
+                    except orjson.JSONDecodeError:
+                        logger.warning(f"Failed to parse JSON line: {line}")
+                        continue
+            finally:
+                await response.aclose()
 
         except httpx.ConnectError as e:
             logger.error(f"Failed to connect to Ollama service: {e}")
@@ -326,6 +659,35 @@ class OllamaService:
             logger.error(f"Error pulling model: {e}")
             raise OllamaServiceError(f"Failed to pull model: {str(e)}") from e
 
+    async def _open_stream(
+        self,
+        policy: AsyncRetrying,
+        url: str,
+        payload: dict[str, Any],
+        timeout: Any = httpx.USE_CLIENT_DEFAULT,
+    ) -> httpx.Response:
+        """发送流式POST请求，连接失败或网关错误时按重试策略重试
+
+        Args:
+            policy: 重试策略
+            url: API端点URL
+            payload: 请求负载
+            timeout: 请求超时，默认使用客户端配置
+
+        Returns:
+            httpx.Response: 未读取响应体的流式响应，调用方负责关闭
+        """
+        request = self.client.build_request(
+            "POST", url, content=orjson.dumps(payload), headers=_JSON_HEADERS, timeout=timeout
+        )
+        async for attempt in policy.copy():
+            with attempt:
+                response = await self.client.send(request, stream=True)
+                if response.status_code in _RETRYABLE_STATUS_CODES:
+                    await response.aclose()
+                    response.raise_for_status()
+        return response
+
     async def health_check(self) -> bool:
         """健康检查
 
@@ -333,7 +695,11 @@ class OllamaService:
             bool: 服务是否健康
         """
         try:
-            response = await self.client.get(f"{self.base_url}/")
+            response = await self.client.get(self._url_root)
+            if not self._http_version_logged:
+                # 记录一次实际协商的协议版本，确认HTTP/2是否生效
+                logger.info(f"Ollama negotiated protocol: {response.http_version}")
+                self._http_version_logged = True
             return response.status_code == 200
         except Exception as e:
             logger.error(f"Health check failed: {e}")
@@ -152,4 +152,6 @@ async def main():
 
 
 if __name__ == "__main__":
+    # 可用时使用uvloop，需在asyncio.run之前设置
+    OllamaService.configure_loop()
     asyncio.run(main())
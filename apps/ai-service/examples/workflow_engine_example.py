@@ -10,11 +10,12 @@ from pathlib import Path
 # 添加项目根目录到Python路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from app.engine import WorkflowEngine, ExecutionContext, NodeExecutor
 from app.schemas.workflow import WorkflowDefinition, FlowNode, FlowEdge, NodeData, NodePosition
 from app.schemas.node import NodeResult
+from app.services import OllamaService
 
 
 class SimpleInputExecutor(NodeExecutor):
@@ -28,7 +29,7 @@ class SimpleInputExecutor(NodeExecutor):
         """返回输入数据"""
         self.log_info("Processing input data", context)
         
-        return NodeResult(
+        return NodeResult.model_construct(
             node_id=self.node_id,
             status="success",
             output=context.input_data,
@@ -54,21 +55,35 @@ class SimpleTransformExecutor(NodeExecutor):
         self.log_info(f"Transforming data from node: {source_node}", context)
         
         # 转换：将所有字符串值转换为大写
-        output = {}
-        for key, value in input_data.items():
-            if isinstance(value, str):
-                output[key] = value.upper()
-            else:
-                output[key] = value
+        output = self.transform_record(input_data)
         
-        output["transformed"] = True
-        
-        return NodeResult(
+        return NodeResult.model_construct(
             node_id=self.node_id,
             status="success",
             output=output,
         )
 
+    @staticmethod
+    def transform_record(record: Dict[str, Any]) -> Dict[str, Any]:
+        """将一条记录中的字符串值转换为大写
+        
+        示例数据中不会出现str的子类，用type(v) is str代替isinstance判断。
+        """
+        str_type = str
+        upper = str.upper
+        output = {
+            key: (upper(value) if type(value) is str_type else value)
+            for key, value in record.items()
+        }
+        output["transformed"] = True
+        return output
+
+    @classmethod
+    def transform_batch(cls, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """批量转换多条记录"""
+        transform = cls.transform_record
+        return [transform(record) for record in records]
+
     def validate_config(self, config: Dict[str, Any]) -> bool:
         return True
 
@@ -95,7 +110,7 @@ class SimpleOutputExecutor(NodeExecutor):
             "workflow_id": context.workflow_id,
         }
         
-        return NodeResult(
+        return NodeResult.model_construct(
             node_id=self.node_id,
             status="success",
             output=output,
@@ -173,7 +188,7 @@ async def main():
     engine.register_executor("transform", SimpleTransformExecutor)
     engine.register_executor("output", SimpleOutputExecutor)
     
-    print(f"   已注册的节点类型: {engine.get_registered_node_types()}")
+    print(f"   已注册的节点类型: {sorted(engine.get_registered_node_types())}")
     print()
 
     # 3. 创建工作流定义
@@ -245,4 +260,6 @@ async def main():
 
 
 if __name__ == "__main__":
+    # 可用时使用uvloop，需在asyncio.run之前设置
+    OllamaService.configure_loop()
     asyncio.run(main())
@@ -1,11 +1,22 @@
 """Pytest配置和fixtures"""
 
+import asyncio
+import sys
+
 import pytest
 from fastapi.testclient import TestClient
 
 from app.main import create_app
 
 
+def pytest_configure(config):
+    """异步测试使用与生产环境一致的uvloop事件循环（uvloop不支持Windows）"""
+    if sys.platform != "win32":
+        import uvloop
+
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
 @pytest.fixture
 def app():
     """创建测试应用实例"""
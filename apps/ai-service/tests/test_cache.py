@@ -0,0 +1,59 @@
+"""测试响应缓存中间件"""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.cache import CacheMiddleware
+
+
+def create_counting_app():
+    """创建记录处理次数的测试应用"""
+    app = FastAPI()
+    app.add_middleware(CacheMiddleware, rules=[(r"/execute/[^/]+/status$", 60.0)])
+    app.state.calls = 0
+
+    @app.get("/execute/{execution_id}/status")
+    async def status(execution_id: str):
+        app.state.calls += 1
+        return {"execution_id": execution_id, "calls": app.state.calls}
+
+    @app.get("/other")
+    async def other():
+        app.state.calls += 1
+        return {"calls": app.state.calls}
+
+    return app
+
+
+def test_cache_hit_within_ttl():
+    """测试TTL内重复请求命中缓存"""
+    app = create_counting_app()
+    client = TestClient(app)
+
+    first = client.get("/execute/e1/status")
+    second = client.get("/execute/e1/status")
+
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == first.json()
+    assert app.state.calls == 1
+
+    # 不同的路径和查询参数使用不同的缓存键
+    assert client.get("/execute/e1/status?x=1").headers["x-cache"] == "MISS"
+    assert client.get("/execute/e2/status").headers["x-cache"] == "MISS"
+
+
+def test_cache_bypass():
+    """测试no-cache请求和未匹配的路径不使用缓存"""
+    app = create_counting_app()
+    client = TestClient(app)
+
+    client.get("/execute/e1/status")
+    response = client.get("/execute/e1/status", headers={"Cache-Control": "no-cache"})
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["calls"] == 2
+
+    client.get("/other")
+    response = client.get("/other")
+    assert "x-cache" not in response.headers
+    assert response.json()["calls"] == 4
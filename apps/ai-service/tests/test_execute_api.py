@@ -0,0 +1,92 @@
+"""执行事件推送端点测试"""
+
+import asyncio
+
+import httpx
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services.execution_service import ExecutionService, ExecutionState
+
+
+def start_execution(service: ExecutionService, execution_id: str) -> None:
+    """在服务中登记一个运行中的执行"""
+    service.executions[execution_id] = ExecutionState(
+        execution_id=execution_id, workflow_id="wf-1", status="running", input_data={}
+    )
+    service.execution_controls[execution_id] = {"paused": False, "stopped": False}
+
+
+async def finish_execution(service: ExecutionService, execution_id: str) -> None:
+    """按服务的顺序结束执行：更新状态、写入结果、持久化"""
+    service._update_status(execution_id, "completed")
+    service.executions[execution_id].output_data = {"answer": 42}
+    await service._persist_execution(execution_id)
+
+
+def test_events_websocket(app):
+    """测试WebSocket推送快照、执行事件和唯一的终止状态后关闭连接"""
+    with TestClient(app) as client:
+        service = app.state.execution_service
+        start_execution(service, "exec-1")
+
+        with client.websocket_connect("/api/v1/execute/exec-1/events") as websocket:
+            assert websocket.receive_json() == {
+                "type": "status",
+                "execution_id": "exec-1",
+                "status": "running",
+            }
+
+            websocket.portal.call(service._add_log, "exec-1", "info", "hello")
+            websocket.portal.call(finish_execution, service, "exec-1")
+
+            log = websocket.receive_json()
+            assert log["type"] == "log"
+            assert log["message"] == "hello"
+
+            assert websocket.receive_json() == {
+                "type": "status",
+                "execution_id": "exec-1",
+                "status": "completed",
+                "output": {"answer": 42},
+            }
+
+
+@pytest.mark.asyncio
+async def test_events_sse(app):
+    """测试SSE推送执行事件，终止状态只推送一次"""
+    service = ExecutionService()
+    app.state.execution_service = service
+    start_execution(service, "exec-1")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        request = asyncio.create_task(client.get("/api/v1/execute/exec-1/events"))
+
+        # 等待端点订阅后再推送事件
+        while "exec-1" not in service.subscribers:
+            await asyncio.sleep(0)
+        service._add_log("exec-1", "info", "hello")
+        await finish_execution(service, "exec-1")
+
+        response = await request
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [
+        (block.split("\n")[0], orjson.loads(block.split("\n")[1][len("data: "):]))
+        for block in response.text.strip().split("\n\n")
+    ]
+    assert [(name, event.get("status")) for name, event in events] == [
+        ("event: status", "running"),
+        ("event: log", None),
+        ("event: status", "completed"),
+    ]
+    assert events[-1][1]["output"] == {"answer": 42}
+
+
+def test_events_unknown_execution(app):
+    """测试订阅不存在的执行返回404"""
+    with TestClient(app) as client:
+        response = client.get("/api/v1/execute/missing/events")
+    assert response.status_code == 404
@@ -0,0 +1,324 @@
+"""执行服务测试"""
+
+import asyncio
+
+import orjson
+import pytest
+
+from app.core import json_dumps
+from app.engine.context import ExecutionContext
+from app.engine.nodes.base import NodeExecutor
+from app.engine.nodes.output_node import OutputNodeExecutor
+from app.engine.state_store import RedisStateStore, StateStoreError
+from app.schemas.execution import ExecutionResponse
+from app.schemas.node import NodeResult
+from app.services.execution_service import ExecutionService, ExecutionState
+
+
+class FakeRedis:
+    """内存实现的Redis客户端，仅支持状态存储用到的命令"""
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.expires[key] = ex
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def execution_service():
+    """创建执行服务实例"""
+    return ExecutionService()
+
+
+@pytest.mark.asyncio
+async def test_publish_to_subscribers(execution_service):
+    """测试事件推送给所有订阅者"""
+    queue1 = execution_service.subscribe("exec-1")
+    queue2 = execution_service.subscribe("exec-1")
+    other = execution_service.subscribe("exec-2")
+
+    event = {"type": "node_status", "execution_id": "exec-1", "node_id": "n1", "status": "running"}
+    execution_service._publish("exec-1", event)
+
+    assert queue1.get_nowait() == event
+    assert queue2.get_nowait() == event
+    assert other.empty()
+
+
+@pytest.mark.asyncio
+async def test_publish_drops_when_queue_full(execution_service):
+    """测试订阅者队列已满时丢弃事件而不阻塞"""
+    execution_service.EVENT_QUEUE_SIZE = 1
+    queue = execution_service.subscribe("exec-1")
+
+    execution_service._publish("exec-1", {"type": "log", "message": "first"})
+    execution_service._publish("exec-1", {"type": "log", "message": "second"})
+
+    assert queue.qsize() == 1
+    assert queue.get_nowait()["message"] == "first"
+
+
+@pytest.mark.asyncio
+async def test_service_logs_pushed_to_subscribers(execution_service):
+    """测试服务日志增量推送给订阅者"""
+    queue = execution_service.subscribe("exec-1")
+
+    execution_service._add_log("exec-1", "info", "hello")
+
+    event = queue.get_nowait()
+    assert event["type"] == "log"
+    assert event["message"] == "hello"
+    assert "timestamp" in event
+    assert "perf_time" not in event
+
+
+@pytest.mark.asyncio
+async def test_unsubscribe_removes_empty_entry(execution_service):
+    """测试取消订阅后清理订阅表"""
+    queue = execution_service.subscribe("exec-1")
+    execution_service.unsubscribe("exec-1", queue)
+
+    assert "exec-1" not in execution_service.subscribers
+
+    # 重复取消订阅不报错
+    execution_service.unsubscribe("exec-1", queue)
+
+
+@pytest.mark.asyncio
+async def test_update_status_publishes_event(execution_service):
+    """测试执行状态变化推送给订阅者"""
+    execution_service.executions["exec-1"] = ExecutionState(
+        execution_id="exec-1", workflow_id="wf-1", status="pending", input_data={}
+    )
+    queue = execution_service.subscribe("exec-1")
+
+    execution_service._update_status("exec-1", "running")
+
+    event = await asyncio.wait_for(queue.get(), timeout=1)
+    assert event == {"type": "status", "execution_id": "exec-1", "status": "running"}
+
+
+@pytest.mark.asyncio
+async def test_get_execution_logs_limit_and_level(execution_service):
+    """测试日志按级别过滤并返回最新的limit条"""
+    for i in range(5):
+        execution_service._add_log("exec-1", "info", f"info {i}")
+        execution_service._add_log("exec-1", "error", f"error {i}")
+
+    logs = await execution_service.get_execution_logs("exec-1", level="error", limit=2)
+    assert [log["message"] for log in logs] == ["error 3", "error 4"]
+
+    assert len(await execution_service.get_execution_logs("exec-1")) == 10
+    assert await execution_service.get_execution_logs("missing") == []
+
+
+@pytest.mark.asyncio
+async def test_execution_logs_are_bounded(execution_service):
+    """测试日志超出上限时丢弃最早的日志，并在执行状态中记录丢弃的条数"""
+    execution_service.max_logs = 3
+    execution_service.executions["exec-1"] = ExecutionState(
+        execution_id="exec-1", workflow_id="wf-1", status="running", input_data={}
+    )
+    for i in range(5):
+        execution_service._add_log("exec-1", "info", f"log {i}")
+
+    logs = await execution_service.get_execution_logs("exec-1")
+    assert [log["message"] for log in logs] == ["log 2", "log 3", "log 4"]
+
+    status = await execution_service.get_execution_status("exec-1")
+    assert status["dropped_logs"] == 2
+
+
+@pytest.mark.asyncio
+async def test_finished_execution_moves_to_state_store():
+    """测试已结束的执行写入状态存储并从内存释放"""
+    fake_redis = FakeRedis()
+    store = RedisStateStore(ttl_seconds=60, client=fake_redis)
+    service = ExecutionService(state_store=store)
+
+    service.executions["exec-1"] = ExecutionState(
+        execution_id="exec-1", workflow_id="wf-1", status="completed", input_data={}
+    )
+    service.execution_controls["exec-1"] = {"paused": False, "stopped": False}
+    service._add_log("exec-1", "info", "done")
+
+    await service._persist_execution("exec-1")
+
+    assert "exec-1" not in service.executions
+    assert "exec-1" not in service.execution_logs
+    assert fake_redis.expires["workflow:state:exec-1"] == 60
+
+    status = await service.get_execution_status("exec-1")
+    assert status["status"] == "completed"
+
+    logs = await service.get_execution_logs("exec-1")
+    assert [log["message"] for log in logs] == ["done"]
+
+    assert await service.get_execution_status("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_state_store_load_corrupt_value():
+    """测试读取到损坏的状态时抛出StateStoreError"""
+    fake_redis = FakeRedis()
+    store = RedisStateStore(ttl_seconds=60, client=fake_redis)
+    fake_redis.data["workflow:state:exec-1"] = b"not json"
+
+    with pytest.raises(StateStoreError):
+        await store.load("exec-1")
+    assert await store.load("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_finished_executions_in_memory_are_bounded(execution_service):
+    """测试未配置状态存储时内存中只保留最近结束的执行"""
+    execution_service.state_store = None
+    execution_service.max_retained_executions = 2
+
+    for i in range(3):
+        execution_id = f"exec-{i}"
+        execution_service.executions[execution_id] = ExecutionState(
+            execution_id=execution_id, workflow_id="wf-1", status="completed", input_data={}
+        )
+        execution_service.execution_controls[execution_id] = {"paused": False, "stopped": False}
+        execution_service._add_log(execution_id, "info", "done")
+        await execution_service._persist_execution(execution_id)
+
+    assert list(execution_service.executions) == ["exec-1", "exec-2"]
+    assert list(execution_service.execution_logs) == ["exec-1", "exec-2"]
+    assert await execution_service.get_execution_status("exec-0") is None
+
+    execution_service.evict("exec-1")
+    assert list(execution_service.executions) == ["exec-2"]
+
+
+@pytest.mark.asyncio
+async def test_execute_workflow_returns_response_model(execution_service):
+    """测试触发执行直接返回ExecutionResponse"""
+    definition = {
+        "nodes": [
+            {
+                "id": "input-1",
+                "type": "input",
+                "position": {"x": 0, "y": 0},
+                "data": {"label": "Input", "config": {}},
+            },
+        ],
+        "edges": [],
+    }
+
+    response = await execution_service.execute_workflow(
+        execution_id="exec-1",
+        workflow_id="wf-1",
+        definition=definition,
+        input_data={"text": "hi"},
+    )
+
+    assert isinstance(response, ExecutionResponse)
+    assert response.id == "exec-1"
+    assert response.status == "pending"
+    assert response.input_data == {"text": "hi"}
+
+    await execution_service.execution_tasks["exec-1"]
+
+
+@pytest.mark.asyncio
+async def test_bytes_output_persisted_and_pushed_as_json_text():
+    """测试输出节点as_bytes的结果持久化和推送时是JSON文本而非bytes的repr"""
+    executor = OutputNodeExecutor(node_id="output-1")
+    context = ExecutionContext(
+        execution_id="exec-1", workflow_id="wf-1", input_data={"text": "你好"}
+    )
+    context.set_node_output("input-1", {"text": "你好"})
+    result = await executor.run(
+        {"source_node": "input-1", "format": "json", "as_bytes": True}, context
+    )
+    assert isinstance(result.output, bytes)
+
+    fake_redis = FakeRedis()
+    service = ExecutionService(state_store=RedisStateStore(ttl_seconds=60, client=fake_redis))
+    service.executions["exec-1"] = ExecutionState(
+        execution_id="exec-1",
+        workflow_id="wf-1",
+        status="completed",
+        input_data={},
+        output_data=result.output,
+    )
+    service.execution_controls["exec-1"] = {"paused": False, "stopped": False}
+    await service._persist_execution("exec-1")
+
+    persisted = orjson.loads(fake_redis.data["workflow:state:exec-1"])
+    assert orjson.loads(persisted["status"]["output_data"]) == {"text": "你好"}
+
+    # WebSocket/SSE推送使用相同的序列化
+    event = {"type": "status", "status": "completed", "output": result.output}
+    pushed = orjson.loads(json_dumps(event))
+    assert orjson.loads(pushed["output"]) == {"text": "你好"}
+
+
+class EchoExecutor(NodeExecutor):
+    """返回工作流输入的测试执行器"""
+
+    async def execute(self, node_config, context):
+        return NodeResult.model_construct(
+            node_id=self.node_id, status="success", output=context.input_data
+        )
+
+    def validate_config(self, config):
+        return True
+
+
+@pytest.mark.asyncio
+async def test_status_events_published_once_after_persisting():
+    """测试每个执行状态只推送一次，终止状态在持久化之后推送"""
+    fake_redis = FakeRedis()
+    service = ExecutionService(state_store=RedisStateStore(ttl_seconds=60, client=fake_redis))
+    service.workflow_engine.register_executor("echo", EchoExecutor)
+    definition = {
+        "nodes": [
+            {
+                "id": "echo-1",
+                "type": "echo",
+                "position": {"x": 0, "y": 0},
+                "data": {"label": "Echo", "config": {}},
+            },
+        ],
+        "edges": [],
+    }
+
+    persisted_when_completed = []
+    original_publish = service._publish
+
+    def publish(execution_id, event):
+        if event["type"] == "status" and event["status"] == "completed":
+            persisted_when_completed.append("workflow:state:exec-1" in fake_redis.data)
+        original_publish(execution_id, event)
+
+    service._publish = publish
+    queue = service.subscribe("exec-1")
+    await service.execute_workflow(
+        execution_id="exec-1",
+        workflow_id="wf-1",
+        definition=definition,
+        input_data={"text": "hi"},
+    )
+    await service.execution_tasks["exec-1"]
+
+    statuses = []
+    while not queue.empty():
+        event = queue.get_nowait()
+        if event["type"] == "status":
+            statuses.append(event)
+
+    assert [event["status"] for event in statuses] == ["running", "completed"]
+    assert statuses[-1]["output"] == {"echo-1": {"text": "hi"}}
+    assert persisted_when_completed == [True]
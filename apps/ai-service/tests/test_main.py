@@ -1,5 +1,9 @@
 """测试主应用"""
 
+import asyncio
+import sys
+
+import pytest
 from fastapi.testclient import TestClient
 
 
@@ -21,3 +25,18 @@ def test_root(client: TestClient):
     assert "message" in data
     assert "version" in data
     assert "docs" in data
+
+
+def test_lifespan_shares_ollama_client(app):
+    """测试应用生命周期内执行服务复用同一个Ollama客户端"""
+    with TestClient(app):
+        assert app.state.execution_service.ollama_service is app.state.ollama_service
+    assert app.state.ollama_service.client.is_closed
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uvloop不支持Windows")
+async def test_async_tests_run_on_uvloop():
+    """测试异步测试运行在uvloop事件循环上"""
+    import uvloop
+
+    assert isinstance(asyncio.get_running_loop(), uvloop.Loop)
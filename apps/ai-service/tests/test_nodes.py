@@ -0,0 +1,287 @@
+"""内置节点执行器测试"""
+
+import pytest
+
+from app.engine.context import ExecutionContext
+from app.engine.nodes.cache import CompiledCache
+from app.engine.nodes.condition_node import ConditionNodeExecutor
+from app.engine.nodes.input_node import InputNodeExecutor
+from app.engine.nodes.output_node import OutputNodeExecutor
+from app.engine.nodes.transform_node import TransformNodeExecutor
+
+
+@pytest.fixture
+def context():
+    """创建执行上下文"""
+    return ExecutionContext(
+        execution_id="test-exec",
+        workflow_id="test-workflow",
+        input_data={"name": "Alice", "age": 30},
+    )
+
+
+@pytest.mark.asyncio
+async def test_output_json_unserializable_returns_raw_data(context):
+    """测试JSON格式化遇到无法序列化的值时返回原始数据，而不是转成字符串"""
+    value = object()
+    context.set_node_output("node1", {"value": value, "big": 2**70})
+
+    result = await OutputNodeExecutor(node_id="output").run(
+        {"source_node": "node1", "format": "json"}, context
+    )
+
+    assert result.status == "success"
+    assert result.output == {"value": value, "big": 2**70}
+
+
+def test_compiled_cache_keys_on_content():
+    """测试编译缓存按内容命中、原地修改后重新编译，并按容量淘汰"""
+    calls = []
+
+    def compile_fn(config):
+        calls.append(config)
+        return sorted(config["items"])
+
+    cache = CompiledCache(compile_fn, maxsize=2)
+    config = {"items": [3, 1]}
+
+    assert cache.get(config) == [1, 3]
+    assert cache.get({"items": [3, 1]}) == [1, 3]
+    assert len(calls) == 1
+
+    config["items"].append(2)
+    assert cache.get(config) == [1, 2, 3]
+    assert len(calls) == 2
+
+    cache.get({"items": []})
+    assert len(cache) == 2
+    # 不可序列化的配置不缓存
+    assert cache.get({"items": [], "extra": object()}) == []
+    assert len(cache) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("field,op,value,matched", [
+    ("input.age", "eq", 30, True),
+    ("input.age", "eq", 31, False),
+    ("input.age", "ne", 31, True),
+    ("input.age", "ne", 30, False),
+    ("input.age", "gt", 29, True),
+    ("input.age", "gt", 30, False),
+    ("input.age", "gte", 30, True),
+    ("input.age", "gte", 31, False),
+    ("input.age", "lt", 31, True),
+    ("input.age", "lt", 30, False),
+    ("input.age", "lte", 30, True),
+    ("input.age", "lte", 29, False),
+    ("input.name", "contains", "lic", True),
+    ("input.name", "contains", "Bob", False),
+    ("input.name", "in", ["Alice", "Bob"], True),
+    ("input.name", "in", ["Bob"], False),
+    # 字段缺失时比较操作跳过，落到默认分支
+    ("input.missing", "gt", 0, False),
+])
+async def test_condition_operators(context, field, op, value, matched):
+    """测试各操作符的评估结果"""
+    config = {
+        "conditions": [{"field": field, "operator": op, "value": value, "branch": "yes"}],
+        "default_branch": "no",
+    }
+
+    result = await ConditionNodeExecutor(node_id="cond").run(config, context)
+
+    assert result.status == "success"
+    assert result.output["branch"] == ("yes" if matched else "no")
+    assert result.output["matched_condition"] == (0 if matched else None)
+
+
+def switch_config(*values):
+    """构建对input.name做eq比较的switch形式配置"""
+    return {
+        "conditions": [
+            {"field": "input.name", "operator": "eq", "value": value, "branch": f"b{i}"}
+            for i, value in enumerate(values)
+        ],
+        "default_branch": "other",
+    }
+
+
+@pytest.mark.asyncio
+async def test_condition_eq_table(context):
+    """测试switch形式的eq条件：命中、重复值取第一个、未命中走默认分支"""
+    executor = ConditionNodeExecutor(node_id="cond")
+
+    result = await executor.run(switch_config("Bob", "Alice", "Alice"), context)
+    assert result.output["branch"] == "b1"
+    assert result.output["matched_condition"] == 1
+    assert result.output["actual_value"] == "Alice"
+
+    result = await executor.run(switch_config("Bob", "Carol"), context)
+    assert result.output == {"branch": "other", "matched_condition": None}
+
+    # 不可哈希的比较值退回逐条评估
+    context = ExecutionContext(
+        execution_id="test-exec", workflow_id="test-workflow", input_data={"name": ["Alice"]}
+    )
+    result = await executor.run(switch_config("Bob", ["Alice"]), context)
+    assert result.output["branch"] == "b1"
+
+
+@pytest.mark.asyncio
+async def test_condition_without_match_or_default_fails(context):
+    """测试没有条件满足且没有默认分支时节点失败"""
+    config = switch_config("Bob", "Carol")
+    del config["default_branch"]
+
+    result = await ConditionNodeExecutor(node_id="cond").run(config, context)
+
+    assert result.status == "failed"
+    assert "No conditions matched" in result.error
+
+
+@pytest.mark.asyncio
+async def test_condition_config_mutated_after_first_run(context):
+    """测试首次执行后原地修改条件配置，再次执行按新配置评估"""
+    executor = ConditionNodeExecutor(node_id="cond")
+    config = switch_config("Bob", "Alice")
+
+    assert (await executor.run(config, context)).output["branch"] == "b1"
+
+    config["conditions"][1]["value"] = "Carol"
+    assert (await executor.run(config, context)).output["branch"] == "other"
+
+    # 改为非switch形式后，跳转表不再适用
+    config["conditions"][0].update({"operator": "ne", "value": "Bob"})
+    result = await executor.run(config, context)
+    assert result.output["branch"] == "b0"
+    assert result.output["operator"] == "ne"
+
+
+@pytest.mark.asyncio
+async def test_input_defaults(context):
+    """测试默认值只补充缺失的字段，输入已有的字段保持不变"""
+    executor = InputNodeExecutor(node_id="input")
+
+    result = await executor.run({"defaults": {"age": 0, "email": "none"}}, context)
+    assert result.output == {"name": "Alice", "age": 30, "email": "none"}
+
+    result = await executor.run({"defaults": {"age": 0}}, context)
+    assert result.output is context.input_data
+
+
+@pytest.mark.asyncio
+async def test_input_schema_mutated_after_first_run(context):
+    """测试首次执行后原地修改schema，再次执行按新schema验证"""
+    executor = InputNodeExecutor(node_id="input")
+    config = {
+        "validate": True,
+        "schema": {"name": {"type": "string", "required": True}},
+    }
+
+    assert (await executor.run(config, context)).status == "success"
+
+    config["schema"]["email"] = {"type": "string", "required": True}
+    result = await executor.run(config, context)
+    assert result.status == "failed"
+    assert "'email' is missing" in result.error
+
+    del config["schema"]["email"]
+    config["schema"]["age"] = {"type": "string"}
+    result = await executor.run(config, context)
+    assert result.status == "failed"
+    assert "expected string, got number" in result.error
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("config,expected", [
+    ({}, {"a": 1, "b": "x", "c": [1]}),
+    ({"fields": ["a", "c"]}, {"a": 1, "c": [1]}),
+    ({"exclude_fields": ["a"]}, {"b": "x", "c": [1]}),
+    ({"format": "json"}, '{"a":1,"b":"x","c":[1]}'),
+    ({"format": "json", "as_bytes": True}, b'{"a":1,"b":"x","c":[1]}'),
+    ({"format": "json", "pretty": True, "fields": ["a"]}, '{\n  "a": 1\n}'),
+    ({"format": "text", "fields": ["a", "b"]}, "a: 1\nb: x"),
+    ({"format": "custom", "template": "b={{output.b}}"}, "b=x"),
+])
+async def test_output_plan(context, config, expected):
+    """测试输出节点的字段过滤和各格式化方式"""
+    context.set_node_output("node1", {"a": 1, "b": "x", "c": [1]})
+
+    result = await OutputNodeExecutor(node_id="output").run(
+        {"source_node": "node1", **config}, context
+    )
+
+    assert result.output == expected
+
+
+@pytest.mark.asyncio
+async def test_output_config_mutated_after_first_run(context):
+    """测试首次执行后原地修改输出配置，再次执行按新配置输出"""
+    context.set_node_output("node1", {"a": 1, "b": "x"})
+    executor = OutputNodeExecutor(node_id="output")
+    config = {"source_node": "node1", "fields": ["a"]}
+
+    assert (await executor.run(config, context)).output == {"a": 1}
+
+    config["fields"].append("b")
+    assert (await executor.run(config, context)).output == {"a": 1, "b": "x"}
+
+    config["format"] = "text"
+    assert (await executor.run(config, context)).output == "a: 1\nb: x"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("transform_type,fields,expected", [
+    ("filter", ["age", "name"], {"age": 30, "name": "Alice"}),
+    ("filter", ["name", "missing"], {"name": "Alice"}),
+    ("extract", ["name"], "Alice"),
+    ("extract", ["missing"], None),
+    ("extract", ["age", "name"], {"age": 30, "name": "Alice"}),
+    ("extract", ["name", "missing"], {"name": "Alice", "missing": None}),
+])
+async def test_transform_fields(context, transform_type, fields, expected):
+    """测试filter和extract按配置顺序取字段，缺失字段分别省略和填充None"""
+    result = await TransformNodeExecutor(node_id="transform").run(
+        {"transform_type": transform_type, "fields": fields}, context
+    )
+
+    assert result.output == expected
+    if isinstance(expected, dict):
+        assert list(result.output) == list(expected)
+
+
+@pytest.mark.asyncio
+async def test_transform_mapping_and_merge(context):
+    """测试字段映射解析模板，合并按源顺序覆盖并跳过无输出的源"""
+    executor = TransformNodeExecutor(node_id="transform")
+
+    result = await executor.run(
+        {
+            "transform_type": "mapping",
+            "mappings": {"user": "{{input.name}}", "greeting": "Hi {{input.name}}", "n": 1},
+        },
+        context,
+    )
+    assert result.output == {"user": "Alice", "greeting": "Hi Alice", "n": 1}
+
+    context.set_node_output("node1", {"a": 1, "b": 1})
+    context.set_node_output("node2", {"b": 2})
+    context.set_node_output("node3", "text")
+    result = await executor.run(
+        {"transform_type": "merge", "sources": ["node1", "missing", "node2", "node3"]},
+        context,
+    )
+    assert result.output == {"a": 1, "b": 2, "node3": "text"}
+
+
+@pytest.mark.asyncio
+async def test_transform_filter_requires_dict(context):
+    """测试filter的输入不是字典时节点失败"""
+    context.set_node_output("node1", ["a"])
+
+    result = await TransformNodeExecutor(node_id="transform").run(
+        {"transform_type": "filter", "fields": ["a"], "source_node": "node1"}, context
+    )
+
+    assert result.status == "failed"
+    assert "requires dict input" in result.error
@@ -1,11 +1,13 @@
 """测试OllamaService"""
 
-import json
-from unittest.mock import AsyncMock, Mock, patch
+import asyncio
 
 import httpx
+import orjson
 import pytest
+from tenacity import wait_none
 
+from app.services import ollama_service as ollama_module
 from app.services.ollama_service import (
     OllamaConnectionError,
     OllamaModelNotFoundError,
@@ -14,129 +16,257 @@ from app.services.ollama_service import (
 )
 
 
+@pytest.fixture(autouse=True)
+def no_retry_wait(monkeypatch):
+    """重试时不等待，避免测试变慢"""
+    monkeypatch.setattr(ollama_module, "_RETRY", ollama_module._RETRY.copy(wait=wait_none()))
+    monkeypatch.setattr(
+        ollama_module, "_PULL_RETRY", ollama_module._PULL_RETRY.copy(wait=wait_none())
+    )
+
+
+@pytest.fixture
+def routes():
+    """模拟的Ollama接口 {(方法, 路径): 响应或处理函数}"""
+    return {}
+
+
+@pytest.fixture
+def requests():
+    """模拟transport收到的请求"""
+    return []
+
+
 @pytest.fixture
-def ollama_service():
-    """创建OllamaService实例"""
-    return OllamaService(base_url="http://test-ollama:11434", timeout=30.0, max_connections=5)
+def ollama_service(routes, requests):
+    """创建使用模拟transport的OllamaService实例
+
+    请求经过httpx完整的序列化流程，只在transport层返回模拟响应。
+    """
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        route = routes[(request.method, request.url.path)]
+        if callable(route):
+            route = route(request)
+            if asyncio.iscoroutine(route):
+                route = await route
+        return route
+
+    return OllamaService(
+        base_url="http://test-ollama:11434",
+        timeout=30.0,
+        max_connections=5,
+        transport=httpx.MockTransport(handler),
+    )
+
+
+def raise_error(error):
+    """返回抛出指定错误的处理函数"""
+
+    def handler(request):
+        raise error
+
+    return handler
 
 
 @pytest.mark.asyncio
-async def test_generate_non_stream(ollama_service):
+async def test_generate_non_stream(ollama_service, routes, requests):
     """测试非流式生成"""
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {"response": "Hello, world!"}
+    routes[("POST", "/api/generate")] = httpx.Response(200, json={"response": "Hello, world!"})
+
+    result = await ollama_service.generate(
+        model="llama2", prompt="Say hello", stream=False, temperature=0.7
+    )
+
+    assert result == "Hello, world!"
+    assert len(requests) == 1
+    assert requests[0].headers["content-type"] == "application/json"
+    assert orjson.loads(requests[0].content) == {
+        "model": "llama2",
+        "prompt": "Say hello",
+        "stream": False,
+        "temperature": 0.7,
+    }
 
-    with patch.object(ollama_service.client, "post", new_callable=AsyncMock) as mock_post:
-        mock_post.return_value = mock_response
 
-        result = await ollama_service.generate(model="llama2", prompt="Say hello", stream=False)
+@pytest.mark.asyncio
+async def test_generate_caches_deterministic_responses(ollama_service, routes, requests):
+    """测试只缓存temperature为0的非流式生成结果"""
+    routes[("POST", "/api/generate")] = httpx.Response(200, json={"response": "Hello, world!"})
 
+    for _ in range(2):
+        result = await ollama_service.generate(model="llama2", prompt="Say hello", temperature=0)
         assert result == "Hello, world!"
-        mock_post.assert_called_once()
+    assert len(requests) == 1
+
+    # 随机采样的调用不缓存
+    for _ in range(2):
+        await ollama_service.generate(model="llama2", prompt="Say hello", temperature=0.7)
+    assert len(requests) == 3
 
 
 @pytest.mark.asyncio
-async def test_generate_connection_error(ollama_service):
+async def test_generate_many(ollama_service, routes):
+    """测试并发生成时限制并发数并保持结果顺序"""
+    running = 0
+    max_running = 0
+
+    async def generate(request):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        prompt = orjson.loads(request.content)["prompt"]
+        return httpx.Response(200, json={"response": prompt.upper()})
+
+    routes[("POST", "/api/generate")] = generate
+
+    results = await ollama_service.generate_many(
+        model="llama2", prompts=["a", "b", "c", "d", "e"], concurrency=2
+    )
+
+    assert results == ["A", "B", "C", "D", "E"]
+    assert max_running == 2
+
+
+@pytest.mark.asyncio
+async def test_generate_connection_error(ollama_service, routes, requests):
     """测试连接错误"""
-    with patch.object(
-        ollama_service.client, "post", new_callable=AsyncMock
-    ) as mock_post:
-        mock_post.side_effect = httpx.ConnectError("Connection failed")
+    routes[("POST", "/api/generate")] = raise_error(httpx.ConnectError("Connection failed"))
+
+    with pytest.raises(OllamaConnectionError):
+        await ollama_service.generate(model="llama2", prompt="test", stream=False)
 
-        with pytest.raises(OllamaConnectionError):
-            await ollama_service.generate(model="llama2", prompt="test", stream=False)
+    # 连接错误按重试策略重试3次
+    assert len(requests) == 3
 
 
 @pytest.mark.asyncio
-async def test_generate_model_not_found(ollama_service):
-    """测试模型未找到错误"""
-    mock_response = Mock()
-    mock_response.status_code = 404
+async def test_generate_retries_only_transient_errors(ollama_service, routes, requests):
+    """测试网关错误重试，读取超时不重试"""
+    responses = iter([httpx.Response(503), httpx.Response(200, json={"response": "ok"})])
+    routes[("POST", "/api/generate")] = lambda request: next(responses)
+
+    assert await ollama_service.generate(model="llama2", prompt="test") == "ok"
+    assert len(requests) == 2
 
-    with patch.object(ollama_service.client, "post", new_callable=AsyncMock) as mock_post:
-        mock_post.side_effect = httpx.HTTPStatusError(
-            "Not found", request=Mock(), response=mock_response
-        )
+    requests.clear()
+    routes[("POST", "/api/generate")] = raise_error(httpx.ReadTimeout("Read timed out"))
 
-        with pytest.raises(OllamaModelNotFoundError):
-            await ollama_service.generate(model="invalid", prompt="test", stream=False)
+    with pytest.raises(OllamaServiceError):
+        await ollama_service.generate(model="llama2", prompt="test")
+    assert len(requests) == 1
 
 
 @pytest.mark.asyncio
-async def test_list_models(ollama_service):
+async def test_generate_model_not_found(ollama_service, routes):
+    """测试模型未找到错误"""
+    routes[("POST", "/api/generate")] = httpx.Response(404, json={"error": "model not found"})
+
+    with pytest.raises(OllamaModelNotFoundError):
+        await ollama_service.generate(model="invalid", prompt="test", stream=False)
+
+
+@pytest.mark.asyncio
+async def test_list_models(ollama_service, routes):
     """测试获取模型列表"""
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {
-        "models": [
-            {"name": "llama2", "size": 3825819519},
-            {"name": "mistral", "size": 4109865159},
-        ]
-    }
+    routes[("GET", "/api/tags")] = httpx.Response(
+        200,
+        json={
+            "models": [
+                {"name": "llama2", "size": 3825819519},
+                {"name": "mistral", "size": 4109865159},
+            ]
+        },
+    )
+
+    models = await ollama_service.list_models()
+
+    assert len(models) == 2
+    assert models[0]["name"] == "llama2"
+    assert models[1]["name"] == "mistral"
+
+
+@pytest.mark.asyncio
+async def test_list_models_cached(ollama_service, routes, requests):
+    """测试模型列表在缓存有效期内只请求一次，清除缓存后重新获取"""
+    routes[("GET", "/api/tags")] = httpx.Response(200, json={"models": [{"name": "llama2"}]})
 
-    with patch.object(ollama_service.client, "get", new_callable=AsyncMock) as mock_get:
-        mock_get.return_value = mock_response
+    results = await asyncio.gather(*(ollama_service.list_models() for _ in range(3)))
+    assert all(models == [{"name": "llama2"}] for models in results)
+    assert len(requests) == 1
 
-        models = await ollama_service.list_models()
+    # 每次返回独立的列表，调用方增删元素不影响缓存
+    results[0].append({"name": "extra"})
+    assert await ollama_service.list_models() == [{"name": "llama2"}]
+    assert len(requests) == 1
 
-        assert len(models) == 2
-        assert models[0]["name"] == "llama2"
-        assert models[1]["name"] == "mistral"
+    ollama_service.invalidate_models_cache()
+    await ollama_service.list_models()
+    assert len(requests) == 2
 
 
 @pytest.mark.asyncio
-async def test_show_model(ollama_service):
+async def test_show_model(ollama_service, routes, requests):
     """测试获取模型信息"""
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {
-        "modelfile": "FROM llama2",
-        "parameters": "temperature 0.7",
-        "template": "{{ .Prompt }}",
-    }
+    routes[("POST", "/api/show")] = httpx.Response(
+        200,
+        json={
+            "modelfile": "FROM llama2",
+            "parameters": "temperature 0.7",
+            "template": "{{ .Prompt }}",
+        },
+    )
+
+    info = await ollama_service.show_model("llama2")
 
-    with patch.object(ollama_service.client, "post", new_callable=AsyncMock) as mock_post:
-        mock_post.return_value = mock_response
+    assert "modelfile" in info
+    assert "parameters" in info
+    assert "template" in info
+    assert orjson.loads(requests[0].content) == {"name": "llama2"}
 
-        info = await ollama_service.show_model("llama2")
 
-        assert "modelfile" in info
-        assert "parameters" in info
-        assert "template" in info
+@pytest.mark.asyncio
+async def test_show_model_cached(ollama_service, routes, requests):
+    """测试同一模型的信息只请求一次"""
+    routes[("POST", "/api/show")] = httpx.Response(200, json={"modelfile": "FROM llama2"})
+
+    results = await asyncio.gather(*(ollama_service.show_model("llama2") for _ in range(3)))
+    await ollama_service.show_model("llama2")
+
+    assert all(info == {"modelfile": "FROM llama2"} for info in results)
+    assert len(requests) == 1
+    assert not ollama_service._show_locks
 
 
 @pytest.mark.asyncio
-async def test_health_check_success(ollama_service):
+async def test_health_check_success(ollama_service, routes):
     """测试健康检查成功"""
-    mock_response = Mock()
-    mock_response.status_code = 200
-
-    with patch.object(ollama_service.client, "get", new_callable=AsyncMock) as mock_get:
-        mock_get.return_value = mock_response
+    routes[("GET", "/")] = httpx.Response(200, text="Ollama is running")
 
-        result = await ollama_service.health_check()
+    result = await ollama_service.health_check()
 
-        assert result is True
+    assert result is True
 
 
 @pytest.mark.asyncio
-async def test_health_check_failure(ollama_service):
+async def test_health_check_failure(ollama_service, routes):
     """测试健康检查失败"""
-    with patch.object(ollama_service.client, "get", new_callable=AsyncMock) as mock_get:
-        mock_get.side_effect = httpx.ConnectError("Connection failed")
+    routes[("GET", "/")] = raise_error(httpx.ConnectError("Connection failed"))
 
-        result = await ollama_service.health_check()
+    result = await ollama_service.health_check()
 
-        assert result is False
+    assert result is False
 
 
 @pytest.mark.asyncio
 async def test_close(ollama_service):
     """测试关闭客户端"""
-    with patch.object(ollama_service.client, "aclose", new_callable=AsyncMock) as mock_close:
-        await ollama_service.close()
-        mock_close.assert_called_once()
+    await ollama_service.close()
+
+    assert ollama_service.client.is_closed
 
 
 @pytest.mark.asyncio
@@ -145,3 +275,50 @@ async def test_context_manager():
     async with OllamaService(base_url="http://test:11434") as service:
         assert service is not None
         assert isinstance(service, OllamaService)
+
+
+@pytest.mark.asyncio
+async def test_stream_generate_splits_ndjson_chunks(ollama_service, routes):
+    """测试流式响应中跨数据块的NDJSON行被正确切分"""
+
+    class ChunkedStream(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            for chunk in (b'{"response": "He"}\n{"resp', b'onse": "llo"}\r\n\n', b'{"done": true}'):
+                yield chunk
+
+    routes[("POST", "/api/generate")] = lambda request: httpx.Response(
+        200, stream=ChunkedStream()
+    )
+
+    stream = await ollama_service.generate(model="llama2", prompt="Say hello", stream=True)
+    chunks = [chunk async for chunk in stream]
+
+    assert chunks == ["He", "llo"]
+
+
+@pytest.mark.asyncio
+async def test_generate_bytes(ollama_service, routes):
+    """测试流式生成UTF-8字节片段"""
+    routes[("POST", "/api/generate")] = httpx.Response(
+        200, content='{"response": "你好"}\n{"response": "", "done": true}\n'.encode()
+    )
+
+    chunks = [chunk async for chunk in ollama_service.generate_bytes(model="llama2", prompt="hi")]
+
+    assert chunks == ["你好".encode()]
+
+
+@pytest.mark.asyncio
+async def test_pull_model_invalidates_caches(ollama_service, routes, requests):
+    """测试拉取模型成功后清除模型列表缓存"""
+    routes[("GET", "/api/tags")] = httpx.Response(200, json={"models": []})
+    routes[("POST", "/api/pull")] = httpx.Response(
+        200, content=b'{"status": "pulling"}\n{"status": "success"}\n'
+    )
+
+    await ollama_service.list_models()
+    progress = [item async for item in ollama_service.pull_model("tinyllama")]
+    await ollama_service.list_models()
+
+    assert [item["status"] for item in progress] == ["pulling", "success"]
+    assert [request.url.path for request in requests] == ["/api/tags", "/api/pull", "/api/tags"]
@@ -1,13 +1,18 @@
 """工作流引擎测试"""
 
+import asyncio
+
 import pytest
 from typing import Any, Dict
 
 from app.engine import (
     WorkflowEngine,
+    WorkflowEngineError,
     ExecutionContext,
     NodeExecutor,
     NodeExecutionError,
+    NodeValidationError,
+    current_context,
 )
 from app.schemas.workflow import WorkflowDefinition, FlowNode, FlowEdge, NodeData, NodePosition
 from app.schemas.node import NodeResult
@@ -22,7 +27,7 @@ class MockInputExecutor(NodeExecutor):
         context: ExecutionContext,
     ) -> NodeResult:
         # 返回输入数据
-        return NodeResult(
+        return NodeResult.model_construct(
             node_id=self.node_id,
             status="success",
             output=context.input_data,
@@ -41,12 +46,13 @@ class MockTransformExecutor(NodeExecutor):
         context: ExecutionContext,
     ) -> NodeResult:
         # 获取前一个节点的输出
-        input_data = self.get_input_from_context(context, config.get("source_node"))
+        input_data = self.get_input_from_context(context, node_config.get("source_node"))
         
-        # 简单转换：添加一个字段
-        output = {**input_data, "transformed": True}
+        # 简单转换：添加一个字段，dict.copy比**解包重建字典更快
+        output = input_data.copy()
+        output["transformed"] = True
         
-        return NodeResult(
+        return NodeResult.model_construct(
             node_id=self.node_id,
             status="success",
             output=output,
@@ -65,9 +71,9 @@ class MockOutputExecutor(NodeExecutor):
         context: ExecutionContext,
     ) -> NodeResult:
         # 获取前一个节点的输出
-        input_data = self.get_input_from_context(context, config.get("source_node"))
+        input_data = self.get_input_from_context(context, node_config.get("source_node"))
         
-        return NodeResult(
+        return NodeResult.model_construct(
             node_id=self.node_id,
             status="success",
             output=input_data,
@@ -127,6 +133,12 @@ async def test_workflow_engine_initialization(workflow_engine):
     assert "transform" in workflow_engine.get_registered_node_types()
     assert "output" in workflow_engine.get_registered_node_types()
 
+    # 结果被缓存，注册新执行器后失效
+    types = workflow_engine.get_registered_node_types()
+    assert workflow_engine.get_registered_node_types() is types
+    workflow_engine.register_executor("custom", MockTransformExecutor)
+    assert "custom" in workflow_engine.get_registered_node_types()
+
 
 @pytest.mark.asyncio
 async def test_simple_workflow_execution(workflow_engine, simple_workflow):
@@ -167,12 +179,66 @@ async def test_execution_context():
     context.set_node_status("node1", "success")
     assert context.get_node_status("node1") == "success"
     
+    # 测试执行摘要中的节点计数
+    context.set_node_status("node2", "running")
+    context.set_node_status("node2", "failed")
+    summary = context.get_execution_summary()
+    assert summary["node_count"] == 2
+    assert summary["completed_nodes"] == 1
+    assert summary["failed_nodes"] == 1
+    
     # 测试变量解析
     context.set_variable("user", {"name": "Alice"})
     resolved = context.resolve_variables("Hello {{user.name}}!")
     assert resolved == "Hello Alice!"
 
 
+@pytest.mark.asyncio
+async def test_execution_context_deduplicates_events():
+    """测试重复的节点状态和连续相同日志不重复推送"""
+    events = []
+    context = ExecutionContext(
+        execution_id="test-exec-1",
+        workflow_id="test-workflow-1",
+        input_data={},
+        callback=events.append,
+    )
+    
+    context.set_node_status("node1", "running")
+    context.set_node_status("node1", "running")
+    assert [e["status"] for e in events if e["type"] == "node_status"] == ["running"]
+    
+    context.add_log("info", "retrying", node_id="node1")
+    context.add_log("info", "retrying", node_id="node1")
+    context.add_log("info", "done", node_id="node1")
+    
+    assert [(log["message"], log["count"]) for log in context.logs] == [
+        ("retrying", 2),
+        ("done", 1),
+    ]
+    log_events = [e for e in events if e["type"] == "log"]
+    assert [e["count"] for e in log_events] == [1, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_execution_context_counts_dropped_logs():
+    """测试日志超出上限时丢弃最早的日志，并在摘要中记录丢弃的条数"""
+    context = ExecutionContext(
+        execution_id="test-exec-1",
+        workflow_id="test-workflow-1",
+        input_data={},
+        max_logs=2,
+    )
+    
+    for i in range(5):
+        context.add_log("info", f"log {i}")
+    
+    assert [log["message"] for log in context.logs] == ["log 3", "log 4"]
+    summary = context.get_execution_summary()
+    assert summary["log_count"] == 2
+    assert summary["dropped_logs"] == 3
+
+
 @pytest.mark.asyncio
 async def test_execution_context_variable_resolution():
     """测试执行上下文变量解析"""
@@ -192,6 +258,261 @@ async def test_execution_context_variable_resolution():
     assert resolved == "Result: success"
 
 
+@pytest.mark.asyncio
+async def test_execution_context_unresolved_variables():
+    """测试执行上下文未解析变量保持原样"""
+    context = ExecutionContext(
+        execution_id="test-exec-1",
+        workflow_id="test-workflow-1",
+        input_data={"name": "Carol"},
+    )
+    
+    # 不含变量引用的文本原样返回
+    text = "plain text without templates"
+    assert context.resolve_variables(text) is text
+    
+    # 无法解析的变量保留原始占位符
+    resolved = context.resolve_variables("Hi {{ input.name }}, {{input.missing}}!")
+    assert resolved == "Hi Carol, {{input.missing}}!"
+
+
+@pytest.mark.asyncio
+async def test_execution_context_resolves_replaced_variables():
+    """测试重新设置变量后按新值解析"""
+    context = ExecutionContext(
+        execution_id="test-exec-1",
+        workflow_id="test-workflow-1",
+        input_data={},
+    )
+    
+    context.set_node_output("node1", {"result": {"score": 1, "label": "a"}})
+    assert context.resolve_variables("{{nodes.node1.result.score}}") == "1"
+    assert context.resolve_variables("{{nodes.node1.result.label}}") == "a"
+    
+    context.set_node_output("node1", {"result": {"score": 2}})
+    assert context.resolve_variables("{{nodes.node1.result.score}}") == "2"
+    assert context.resolve_variables("{{nodes.node1.result.label}}") == "{{nodes.node1.result.label}}"
+
+
+@pytest.mark.asyncio
+async def test_execution_context_sees_in_place_mutation():
+    """测试变量值被原地修改后解析到最新的值"""
+    context = ExecutionContext(
+        execution_id="test-exec-1",
+        workflow_id="test-workflow-1",
+        input_data={"user": {"name": "a"}},
+    )
+    
+    assert context.resolve_variables("{{input.user.name}}") == "a"
+    context.input_data["user"]["name"] = "b"
+    assert context.resolve_variables("{{input.user.name}}") == "b"
+    
+    # 替换中间字典后，共享该前缀的路径也取到新值
+    output = {"result": {"score": 1, "label": "x"}}
+    context.set_node_output("node1", output)
+    assert context.resolve_variables("{{nodes.node1.result.score}}") == "1"
+    output["result"] = {"score": 2, "label": "y"}
+    assert context.resolve_variables("{{nodes.node1.result.label}}") == "y"
+    assert context._get_nested_value("nodes.node1.result.score") == 2
+
+
+@pytest.mark.asyncio
+async def test_execution_context_scoped_variable():
+    """测试临时变量在退出作用域后恢复"""
+    context = ExecutionContext(
+        execution_id="test-exec-1",
+        workflow_id="test-workflow-1",
+        input_data={"name": "Alice"},
+    )
+    
+    with context.scoped_variable("output", {"score": 1}):
+        assert context.resolve_variables("{{input.name}}: {{output.score}}") == "Alice: 1"
+    
+    assert context.get_variable("output") is None
+    assert context.resolve_variables("{{output.score}}") == "{{output.score}}"
+    
+    context.set_variable("output", {"score": 2})
+    with context.scoped_variable("output", {"score": 3}):
+        assert context.resolve_variables("{{output.score}}") == "3"
+    assert context.resolve_variables("{{output.score}}") == "2"
+
+
+@pytest.mark.asyncio
+async def test_workflow_events_delivered_through_callback(workflow_engine, simple_workflow):
+    """测试执行事件按顺序经回调分发，且支持异步回调"""
+    events = []
+    
+    async def callback(event):
+        events.append(event)
+    
+    await workflow_engine.execute_workflow(
+        execution_id="test-exec-events",
+        workflow_id="test-workflow-1",
+        definition=simple_workflow,
+        input_data={},
+        callback=callback,
+    )
+    
+    status_events = [e["status"] for e in events if e["type"] == "status"]
+    assert status_events[0] == "running"
+    assert status_events[-1] in ("completed", "failed")
+    assert any(e["type"] == "node_status" for e in events)
+    
+    # 日志合并为批量事件推送，且在最终状态之前全部送达
+    batches = [e for e in events if e["type"] == "logs_batch"]
+    assert batches
+    assert events[-1]["type"] == "status"
+    assert not any(e["type"] == "log" for e in events)
+
+
+@pytest.mark.asyncio
+async def test_direct_async_callbacks_tracked_and_awaited(caplog):
+    """测试未启动事件队列时异步回调任务被保留引用、异常被记录、close时等待完成"""
+    delivered = []
+    
+    async def callback(event):
+        await asyncio.sleep(0)
+        if event["type"] == "node_status" and event["status"] == "failed":
+            raise RuntimeError("callback boom")
+        delivered.append(event["status"])
+    
+    context = ExecutionContext(
+        execution_id="test-exec",
+        workflow_id="test-workflow",
+        input_data={},
+        callback=callback,
+    )
+    context.set_node_status("node1", "running")
+    context.set_node_status("node2", "failed")
+    assert len(context._callback_tasks) == 2
+    
+    await context.close()
+    
+    assert delivered == ["running"]
+    assert not context._callback_tasks
+    assert "Event callback failed" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_parallel_nodes_limited_by_max_parallel_nodes():
+    """测试同一批次的节点并行执行且并发数受限"""
+    running = 0
+    max_running = 0
+    
+    class SlowExecutor(NodeExecutor):
+        async def execute(self, node_config, context):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return NodeResult(node_id=self.node_id, status="success", output={})
+        
+        def validate_config(self, config):
+            return True
+    
+    engine = WorkflowEngine(max_parallel_nodes=2)
+    engine.register_executor("slow", SlowExecutor)
+    
+    workflow = WorkflowDefinition(
+        nodes=[
+            FlowNode(
+                id=f"node{i}",
+                type="slow",
+                position=NodePosition(x=0, y=0),
+                data=NodeData(label=f"Slow {i}", config={}),
+            )
+            for i in range(5)
+        ],
+        edges=[],
+    )
+    
+    result = await engine.execute_workflow(
+        execution_id="test-exec-parallel",
+        workflow_id="test-workflow-parallel",
+        definition=workflow,
+        input_data={},
+    )
+    
+    assert result["status"] == "completed"
+    assert max_running == 2
+    
+    # 节点类型限制在并发数之上进一步收紧
+    max_running = 0
+    limited_engine = WorkflowEngine(max_parallel_nodes=5, node_type_limits={"slow": 1})
+    limited_engine.register_executor("slow", SlowExecutor)
+    result = await limited_engine.execute_workflow(
+        execution_id="test-exec-type-limit",
+        workflow_id="test-workflow-parallel",
+        definition=workflow,
+        input_data={},
+    )
+    
+    assert result["status"] == "completed"
+    assert max_running == 1
+
+
+@pytest.mark.asyncio
+async def test_downstream_node_starts_without_waiting_for_slow_peer():
+    """测试下游节点在上游完成后立即启动，不等待同层的慢节点"""
+    events = []
+    
+    class TimedExecutor(NodeExecutor):
+        async def execute(self, node_config, context):
+            events.append(f"start:{self.node_id}")
+            await asyncio.sleep(node_config["delay"])
+            events.append(f"end:{self.node_id}")
+            return NodeResult(node_id=self.node_id, status="success", output={})
+        
+        def validate_config(self, config):
+            return True
+    
+    engine = WorkflowEngine()
+    engine.register_executor("timed", TimedExecutor)
+    
+    workflow = WorkflowDefinition(
+        nodes=[
+            FlowNode(
+                id=node_id,
+                type="timed",
+                position=NodePosition(x=0, y=0),
+                data=NodeData(label=node_id, config={"delay": delay}),
+            )
+            for node_id, delay in [("fast", 0.0), ("slow", 0.05), ("child", 0.0)]
+        ],
+        edges=[FlowEdge(id="edge1", source="fast", target="child")],
+    )
+    
+    result = await engine.execute_workflow(
+        execution_id="test-exec-ready-queue",
+        workflow_id="test-workflow",
+        definition=workflow,
+        input_data={},
+    )
+    
+    assert result["status"] == "completed"
+    assert events.index("end:child") < events.index("end:slow")
+
+
+def test_execution_plan_shared_by_same_topology(workflow_engine, simple_workflow):
+    """测试拓扑相同的工作流共享执行计划"""
+    plan = workflow_engine._compile_plan(simple_workflow)
+    
+    copied = simple_workflow.model_copy(deep=True)
+    copied.nodes[0].data.config["extra"] = True
+    assert workflow_engine._compile_plan(copied) is plan
+    
+    assert plan.node_ids == ("node1", "node2", "node3")
+    assert plan.in_degree == (0, 1, 1)
+    assert plan.children == ((1,), (2,), ())
+    # 单条链拓扑按顺序直接执行
+    assert plan.chain == (0, 1, 2)
+    
+    extra_edge = FlowEdge(id="edge3", source="node1", target="node3")
+    branched = simple_workflow.model_copy(update={"edges": [*simple_workflow.edges, extra_edge]})
+    assert workflow_engine._compile_plan(branched).chain is None
+
+
 @pytest.mark.asyncio
 async def test_graph_validation_cycle_detection(workflow_engine):
     """测试图验证 - 循环检测"""
@@ -228,6 +549,222 @@ async def test_graph_validation_cycle_detection(workflow_engine):
     assert "circular dependencies" in result["error"].lower()
 
 
+def test_execution_graph_rejects_self_loops_and_skips_duplicate_edges(workflow_engine):
+    """测试构图时直接拒绝自环并去除重复边"""
+    nodes = [
+        FlowNode(
+            id=node_id,
+            type="transform",
+            position=NodePosition(x=0, y=0),
+            data=NodeData(label=node_id, config={}),
+        )
+        for node_id in ("node1", "node2")
+    ]
+    
+    duplicated = WorkflowDefinition(
+        nodes=nodes,
+        edges=[
+            FlowEdge(id="edge1", source="node1", target="node2"),
+            FlowEdge(id="edge2", source="node1", target="node2"),
+        ],
+    )
+    plan = workflow_engine._compile_plan(duplicated)
+    assert plan.in_degree == (0, 1)
+    assert plan.children == ((1,), ())
+    
+    self_loop = WorkflowDefinition(
+        nodes=nodes,
+        edges=[FlowEdge(id="edge1", source="node2", target="node2")],
+    )
+    with pytest.raises(WorkflowEngineError, match="node2 -> node2"):
+        workflow_engine._compile_plan(self_loop)
+
+
+@pytest.mark.asyncio
+async def test_executor_instances_reused_across_executions(workflow_engine, simple_workflow):
+    """测试同一节点在多次执行间复用执行器实例"""
+    snapshots = []
+    for i in range(2):
+        await workflow_engine.execute_workflow(
+            execution_id=f"test-exec-reuse-{i}",
+            workflow_id="test-workflow",
+            definition=simple_workflow,
+            input_data={"test": "data"},
+        )
+        snapshots.append(dict(workflow_engine._executor_cache))
+    
+    assert snapshots[0]
+    assert snapshots[0].keys() == snapshots[1].keys()
+    assert all(snapshots[0][key] is snapshots[1][key] for key in snapshots[0])
+    
+    # 重新注册类型后使用新的执行器类
+    workflow_engine.register_executor("input", MockTransformExecutor)
+    node = simple_workflow.nodes[0]
+    context = ExecutionContext(
+        execution_id="test-exec-reuse",
+        workflow_id="test-workflow",
+        input_data={"test": "data"},
+    )
+    await workflow_engine._execute_node(node, context)
+    assert isinstance(workflow_engine._executor_cache[(node.type, node.id)], MockTransformExecutor)
+
+
+@pytest.mark.asyncio
+async def test_node_config_validated_once_per_definition(workflow_engine, simple_workflow):
+    """测试同一工作流定义再次执行时跳过配置验证"""
+    calls = []
+
+    class CountingOutputExecutor(MockOutputExecutor):
+        def validate_config(self, config):
+            calls.append(self.node_id)
+            return True
+
+    workflow_engine.register_executor("output", CountingOutputExecutor)
+    for i in range(2):
+        result = await workflow_engine.execute_workflow(
+            execution_id=f"test-exec-validate-{i}",
+            workflow_id="test-workflow",
+            definition=simple_workflow,
+            input_data={"test": "data"},
+        )
+        assert result["status"] == "completed"
+
+    assert calls == ["node3"]
+
+
+@pytest.mark.asyncio
+async def test_current_context_set_during_execution(workflow_engine, simple_workflow):
+    """测试节点任务中可以通过current_context获取当前执行上下文"""
+    seen = []
+
+    class ContextOutputExecutor(MockOutputExecutor):
+        async def execute(self, node_config, context):
+            seen.append(current_context.get() is context)
+            return await super().execute(node_config, context)
+
+    workflow_engine.register_executor("output", ContextOutputExecutor)
+    await workflow_engine.execute_workflow(
+        execution_id="test-exec-contextvar",
+        workflow_id="test-workflow",
+        definition=simple_workflow,
+        input_data={"test": "data"},
+    )
+
+    assert seen == [True]
+    assert current_context.get(None) is None
+
+
+@pytest.mark.asyncio
+async def test_pure_node_results_cached_across_executions():
+    """测试纯节点在输入相同时复用缓存的结果"""
+    calls = []
+    
+    class CountingInputExecutor(MockInputExecutor):
+        pure = True
+        
+        async def execute(self, node_config, context):
+            calls.append(self.node_id)
+            return await super().execute(node_config, context)
+    
+    engine = WorkflowEngine(result_cache_size=8)
+    engine.register_executor("input", CountingInputExecutor)
+    workflow = WorkflowDefinition(
+        nodes=[
+            FlowNode(
+                id="node1",
+                type="input",
+                position=NodePosition(x=0, y=0),
+                data=NodeData(label="Input", config={}),
+            ),
+        ],
+        edges=[],
+    )
+    
+    results = []
+    for i, input_data in enumerate([{"a": 1}, {"a": 1}, {"a": 2}]):
+        results.append(await engine.execute_workflow(
+            execution_id=f"test-exec-cache-{i}",
+            workflow_id="test-workflow",
+            definition=workflow,
+            input_data=input_data,
+        ))
+    
+    assert calls == ["node1", "node1"]
+    assert [r["output"]["node1"] for r in results] == [{"a": 1}, {"a": 1}, {"a": 2}]
+
+
+@pytest.mark.asyncio
+async def test_pure_node_cache_isolated_from_mutation():
+    """测试缓存的结果与调用方输入和下游修改互不影响"""
+    from app.engine.nodes.input_node import InputNodeExecutor
+    
+    class PlainInputExecutor(InputNodeExecutor):
+        def __init__(self, node_id: str, node_type: str):
+            super().__init__(node_id)
+    
+    engine = WorkflowEngine(result_cache_size=8)
+    engine.register_executor("input", PlainInputExecutor)
+    workflow = WorkflowDefinition(
+        nodes=[
+            FlowNode(
+                id="node1",
+                type="input",
+                position=NodePosition(x=0, y=0),
+                data=NodeData(label="Input", config={}),
+            ),
+        ],
+        edges=[],
+    )
+    
+    first_input = {"items": [1]}
+    first = await engine.execute_workflow(
+        execution_id="test-exec-alias-1",
+        workflow_id="test-workflow",
+        definition=workflow,
+        input_data=first_input,
+    )
+    # 修改第一次的输入和输出，不应影响缓存
+    first_input["items"].append(2)
+    first["output"]["node1"]["items"].append(3)
+    
+    second = await engine.execute_workflow(
+        execution_id="test-exec-alias-2",
+        workflow_id="test-workflow",
+        definition=workflow,
+        input_data={"items": [1]},
+    )
+    assert second["output"]["node1"] == {"items": [1]}
+    
+    second["output"]["node1"]["items"].append(4)
+    third = await engine.execute_workflow(
+        execution_id="test-exec-alias-3",
+        workflow_id="test-workflow",
+        definition=workflow,
+        input_data={"items": [1]},
+    )
+    assert third["output"]["node1"] == {"items": [1]}
+
+
+def test_result_cache_key_ignores_unrelated_context(workflow_engine, simple_workflow):
+    """测试缓存键只取决于节点读取的输入，与其他节点输出和变量无关"""
+    node = simple_workflow.nodes[1]
+    executor = MockTransformExecutor(node_id=node.id, node_type=node.type)
+    context = ExecutionContext(
+        execution_id="test-exec",
+        workflow_id="test-workflow",
+        input_data={"a": 1},
+    )
+    context.set_node_output("node1", {"a": 1})
+    key = workflow_engine._result_cache_key(node, executor, context)
+    
+    context.set_node_output("unrelated", {"large": list(range(100))})
+    context.set_variable("other", "value")
+    assert workflow_engine._result_cache_key(node, executor, context) == key
+    
+    context.set_node_output("node1", {"a": 2})
+    assert workflow_engine._result_cache_key(node, executor, context) != key
+
+
 @pytest.mark.asyncio
 async def test_node_executor_error_handling():
     """测试节点执行器错误处理"""
@@ -265,5 +802,142 @@ async def test_node_executor_error_handling():
     assert "Intentional failure" in result["error"]
 
 
+@pytest.mark.asyncio
+async def test_resolve_config_without_templates_returns_original():
+    """测试不含变量引用的配置直接返回原对象"""
+    executor = MockInputExecutor(node_id="node1", node_type="input")
+    context = ExecutionContext(
+        execution_id="test-exec",
+        workflow_id="test-workflow",
+        input_data={"name": "Alice"},
+    )
+    
+    plain_config = {"model": "llama2", "options": {"temperature": 0.7}, "tags": ["a"]}
+    assert executor._resolve_config_variables(plain_config, context) is plain_config
+    
+    template_config = {"options": {"prompt": "Hello {{input.name}}"}}
+    resolved = executor._resolve_config_variables(template_config, context)
+    assert resolved is not template_config
+    assert resolved["options"]["prompt"] == "Hello Alice"
+    assert template_config["options"]["prompt"] == "Hello {{input.name}}"
+
+
+@pytest.mark.asyncio
+async def test_transform_custom_expression_rejects_unsafe_access():
+    """测试自定义表达式禁止访问双下划线属性"""
+    from app.engine.nodes.transform_node import TransformNodeExecutor
+    
+    executor = TransformNodeExecutor(node_id="node1")
+    context = ExecutionContext(
+        execution_id="test-exec",
+        workflow_id="test-workflow",
+        input_data={"items": [1, 2, 3]},
+    )
+    
+    result = executor._execute_custom({"expression": "sum(input['items'])"}, context)
+    assert result == 6
+    
+    with pytest.raises(NodeValidationError):
+        executor.validate_config(
+            {"transform_type": "custom", "expression": "().__class__.__bases__"}
+        )
+    
+    with pytest.raises(NodeExecutionError):
+        executor._execute_custom({"expression": "json.codecs"}, context)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "expression",
+    [
+        # 通过生成器帧回溯到引擎模块的globals
+        "[z.f_globals['__builtins__']['__import__']('os').getcwd() for L in [[]] "
+        "for _ in [L.append(y.gi_frame.f_back.f_back.f_back for y in L)] for z in L[0]]",
+        "(y for y in input['items'])",
+        "{k: v for k, v in input.items()}",
+        "input['__class__']",
+        "input.__class__",
+        "'{0.__class__}'.format(input)",
+        "dict(**input)",
+        "open('/etc/passwd')",
+        "2 ** 1000000",
+        # 序列重复构造超大值
+        "'a' * 100000 * 100000",
+        "[0] * 100000 * 100000",
+        "100000 * 100000 * (0,)",
+        "_guarded_mul('a', 2)",
+    ],
+)
+async def test_transform_custom_expression_sandbox_escapes_rejected(expression):
+    """测试自定义表达式白名单拦截沙箱逃逸写法"""
+    from app.engine.nodes.transform_node import TransformNodeExecutor
+    
+    executor = TransformNodeExecutor(node_id="node1")
+    context = ExecutionContext(
+        execution_id="test-exec",
+        workflow_id="test-workflow",
+        input_data={"items": [1, 2, 3]},
+    )
+    
+    result = await executor.run(
+        {"transform_type": "custom", "expression": expression}, context
+    )
+    
+    assert result.status == "failed"
+    assert "not allowed" in result.error
+
+
+@pytest.mark.asyncio
+async def test_transform_custom_expression_allows_whitelisted_syntax():
+    """测试白名单内的表达式正常求值"""
+    from app.engine.nodes.transform_node import TransformNodeExecutor
+    
+    executor = TransformNodeExecutor(node_id="node1")
+    context = ExecutionContext(
+        execution_id="test-exec",
+        workflow_id="test-workflow",
+        input_data={"name": " alice ", "items": [3, 1, 2]},
+    )
+    
+    result = await executor.run(
+        {
+            "transform_type": "custom",
+            "expression": (
+                "{'name': input['name'].strip().upper(), 'top': sorted(input['items'])[-1], "
+                "'big': len(input['items']) > 2 and not input.get('missing'), "
+                "'doc': json.loads(json.dumps({'ok': True}))}"
+            ),
+        },
+        context,
+    )
+    
+    assert result.status == "success"
+    assert result.output == {"name": "ALICE", "top": 3, "big": True, "doc": {"ok": True}}
+
+
+@pytest.mark.asyncio
+async def test_transform_custom_expression_multiplication():
+    """测试乘法改写后数值运算和小规模序列重复不受影响"""
+    from app.engine.nodes.transform_node import TransformNodeExecutor
+    
+    executor = TransformNodeExecutor(node_id="node1")
+    context = ExecutionContext(
+        execution_id="test-exec",
+        workflow_id="test-workflow",
+        input_data={"price": 2.5, "count": 4},
+    )
+    
+    result = await executor.run(
+        {
+            "transform_type": "custom",
+            "expression": "[input['price'] * input['count'], 3 * 'ab', [0] * 2, 1 + 2 * 3]",
+        },
+        context,
+    )
+    
+    assert result.status == "success"
+    assert result.output == [10.0, "ababab", [0, 0], 7]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])